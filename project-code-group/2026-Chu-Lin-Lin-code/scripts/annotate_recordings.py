@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""
+Detect and store the R-peak annotations of every dataset recording.
+
+Examples:
+    # annotate all CSVs under dataset.data_dir with the config's detector settings
+    python scripts/annotate_recordings.py
+
+    # the same recordings with multirate detection (stored as separate annotations)
+    python scripts/annotate_recordings.py --detection-fs 50
+
+Annotations are keyed by file content and detector settings (see
+src/tools/annotations.py), so rerunning only detects new or edited
+recordings. Scripts that need beats (e.g. visualize_ecg_conditions.py
+--peaks) load them from the same directory.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.tools.annotations import AnnotationStore, annotation_dir, detector_params
+from src.utils import load_config, setup_logging
+from src.utils.helpers import resolve_data_dir, scan_csv_files
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Store per-recording R-peak annotations")
+    p.add_argument("--config", "-c",
+                   default=str(Path(__file__).parent.parent / "config" / "config.yaml"),
+                   help="Path to configuration file (.yaml)")
+    p.add_argument("--file-glob", default="*.csv", help="File pattern (default: *.csv)")
+    p.add_argument("--detection-fs", type=float, default=None,
+                   help="Override r_peak.detection_fs (multirate detection)")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    logger = setup_logging()
+    config = load_config(args.config)
+
+    overrides = {"detection_fs": args.detection_fs} if args.detection_fs else {}
+    params = detector_params(config, **overrides)
+    store = AnnotationStore(annotation_dir(config))
+
+    records = scan_csv_files(resolve_data_dir(config), args.file_glob)
+    for r in records:
+        ann = store.get(r["path"], params)
+        logger.info(f"{r['person']} | {r['state']} | {r['path'].name}: "
+                    f"{len(ann['r_peaks'])} beats, {len(ann['rr_intervals'])} clean RR")
+
+    print(f"\n[OK] Annotations dir: {store.cache.root}")
+    print(f"[OK] Recordings: {len(records)} ({store.stats['hit']} already stored, {store.stats['miss']} detected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""
+Golden-reference equivalence check of the optimized code paths.
+
+Examples:
+    # synthetic ECG plus the first 4 dataset recordings, and run_dataset variants
+    # (the run_dataset check needs the dataset configured in config.yaml)
+    python scripts/check_equivalence.py --recorded 4
+
+    # record cases only, on synthetic ECG at 700 Hz
+    python scripts/check_equivalence.py --fs 700 --skip-dataset
+
+Writes a per-feature table (max deviation, tolerance, timings) and a per-case
+summary (CSV), prints the summary and exits with status 1 if any feature
+deviates beyond its tolerance.
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.equivalence import (
+    CASES,
+    check_run_dataset,
+    dataset_records,
+    run_equivalence,
+    summarize_equivalence,
+)
+from src.tools.detector_benchmark import synthetic_record
+from src.utils import load_config
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Compare optimized code paths with their reference implementations")
+    p.add_argument("--config", "-c",
+                   default=str(Path(__file__).parent.parent / "config" / "config.yaml"),
+                   help="Path to configuration file (.yaml)")
+    p.add_argument("--recorded", type=int, default=2, help="Number of dataset recordings to check (0 = none)")
+    p.add_argument("--synthetic", type=int, default=3, help="Number of synthetic records")
+    p.add_argument("--fs", type=int, default=500, help="Sampling rate of synthetic records")
+    p.add_argument("--duration", type=float, default=180.0, help="Synthetic record length in seconds")
+    p.add_argument("--cases", nargs="*", default=None, help=f"Subset of {sorted(CASES)}")
+    p.add_argument("--skip-dataset", action="store_true", help="Do not compare run_dataset variants")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per path (best is kept)")
+    p.add_argument("--out", default="reports/equivalence.csv", help="Per-feature results CSV")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = load_config(args.config)
+
+    records = [
+        synthetic_record(args.duration, args.fs, heart_rate=hr, seed=i)
+        for i, hr in enumerate(range(60, 60 + 15 * args.synthetic, 15))
+    ]
+    recorded = dataset_records(config, limit=args.recorded) if args.recorded > 0 else []
+    if args.recorded > 0 and not recorded:
+        print("[WARN] No dataset recordings found; checking synthetic records only")
+    records += recorded
+
+    results = [run_equivalence(records, cases=args.cases, repeat=args.repeat)]
+    if recorded and not args.skip_dataset:
+        with tempfile.TemporaryDirectory(prefix="equivalence-") as workdir:
+            results.append(check_run_dataset(config, Path(workdir), repeat=min(args.repeat, 2)))
+    results = pd.concat(results, ignore_index=True)
+    summary = summarize_equivalence(results)
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(out, index=False)
+    summary.to_csv(out.with_name(out.stem + "_summary.csv"))
+
+    print(summary.to_string(float_format=lambda v: f"{v:.4g}"))
+    failed = results.loc[~results["passed"], ["case", "record", "feature", "max_abs_dev", "atol", "rtol"]]
+    if not failed.empty:
+        print("\n[FAIL] Deviations beyond tolerance:")
+        print(failed.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+        sys.exit(1)
+    print(f"\n[OK] {results['feature'].nunique()} features within tolerance. Saved: {out}")
+
+
+if __name__ == "__main__":
+    main()
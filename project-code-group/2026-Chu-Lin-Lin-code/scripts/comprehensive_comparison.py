@@ -30,6 +30,8 @@ from src.tools.ecg_loader import read_ecg_csv_column
 
 # Import bandpass_filter and detect_r_peaks from src.tools.signal_processor
 from src.tools.signal_processor import bandpass_filter, detect_r_peaks
+from src.tools.segment_scheduler import sliding_window_matrix
+from src.tools.annotations import window_peaks
 
 # -----------------------------
 # Config loading (removed local definition)
@@ -98,29 +100,54 @@ def scan_files(data_dir: Path, persons_cfg, states: list[str], file_glob: str) -
 # -----------------------------
 # Windowing + pass/fail
 # -----------------------------
-def sliding_windows(x: np.ndarray, fs: int, win_sec: int, overlap: float):
+def sliding_windows(x: np.ndarray, fs: int, win_sec: int, overlap: float) -> np.ndarray:
+    """All windows of x as a read-only (n_windows, win) view (no copy)."""
     win = int(win_sec * fs)
     step = max(1, int(win * (1.0 - overlap)))
-    if win <= 0 or len(x) < win:
-        return
-    for start in range(0, len(x) - win + 1, step):
-        yield x[start : start + win]
+    return sliding_window_matrix(x, win, step)
 
-def collect_windows_metrics_for_files(files, fs, sig_cfg, r_cfg, win_sec, overlap, ecg_col, header):
+def window_starts(n_samples: int, fs: int, win_sec: int, overlap: float) -> np.ndarray:
+    """Start index of every row of sliding_windows() for a signal of n_samples."""
+    win = int(win_sec * fs)
+    step = max(1, int(win * (1.0 - overlap)))
+    if n_samples < win:
+        return np.zeros(0, dtype=np.int64)
+    return np.arange(0, n_samples - win + 1, step, dtype=np.int64)
+
+def windowed_peaks(r_peaks: np.ndarray, n_samples: int, fs: int, win_sec: int, overlap: float) -> list:
+    """Recording-level R-peaks split into the windows of sliding_windows()."""
+    return window_peaks(r_peaks, window_starts(n_samples, fs, win_sec, overlap), int(win_sec * fs))
+
+def collect_windows_metrics_for_files(files, fs, sig_cfg, r_cfg, win_sec, overlap, ecg_col, header,
+                                      annotations=None, params=None):
+    """
+    HRV metrics of all valid windows of the given files (baseline collection).
+
+    With an AnnotationStore (and detector params from detector_params()),
+    each file's stored recording-level R-peaks are split into the windows
+    instead of filtering the file and detecting beats window by window.
+    """
     all_metrics = []
     for rf in files:
-        x = read_ecg_csv_column(rf["path"], ecg_col_index=ecg_col, header=header) # Updated call
-
-        # filter
-        x_f = bandpass_filter(
-            x, fs,
-            float(sig_cfg["bandpass_low"]),
-            float(sig_cfg["bandpass_high"]),
-            int(sig_cfg.get("filter_order", 4))
-        )
+        if annotations is not None:
+            ann = annotations.get(rf["path"], params, ecg_col_index=ecg_col, header=header)
+            per_window = windowed_peaks(ann["r_peaks"], ann["n_samples"], fs, win_sec, overlap)
+        else:
+            x = read_ecg_csv_column(rf["path"], ecg_col_index=ecg_col, header=header) # Updated call
+
+            # filter
+            x_f = bandpass_filter(
+                x, fs,
+                float(sig_cfg["bandpass_low"]),
+                float(sig_cfg["bandpass_high"]),
+                int(sig_cfg.get("filter_order", 4))
+            )
 
-        for w in sliding_windows(x_f, fs, win_sec, overlap):
-            peaks = detect_r_peaks(w, fs, min_rr_sec=float(r_cfg["min_rr_sec"]))
+            windows = sliding_windows(x_f, fs, win_sec, overlap)
+            # QRS enhancement of all windows in one call along axis 1
+            per_window = detect_r_peaks(windows, fs, min_rr_sec=float(r_cfg["min_rr_sec"]))
+
+        for peaks in per_window:
             rr = rr_intervals_seconds(peaks, fs)
 
             if rr.size < 2:
@@ -165,16 +192,14 @@ def evaluate_file(
     state: str,
     k_rest: float,
     k_active: float,
+    r_peaks: np.ndarray = None,
 ) -> dict:
-    # Filter
-    ecg = bandpass_filter(
-        ecg_raw,
-        fs=fs,
-        low=float(sig_cfg["bandpass_low"]),
-        high=float(sig_cfg["bandpass_high"]),
-        order=int(sig_cfg.get("filter_order", 4)),
-    )
+    """
+    Window pass rate of one recording against a person's baseline.
 
+    r_peaks: Stored recording-level R-peaks (AnnotationStore.get()); when
+        given, they are split into the windows and no detection is run.
+    """
     min_rr = float(r_cfg["min_rr_sec"])
     max_rr = float(r_cfg["max_rr_sec"])
 
@@ -194,9 +219,22 @@ def evaluate_file(
     total = 0
     passed = 0
 
-    for w in sliding_windows(ecg, fs, win_sec, overlap):
+    if r_peaks is not None:
+        per_window = windowed_peaks(r_peaks, len(ecg_raw), fs, win_sec, overlap)
+    else:
+        # Filter
+        ecg = bandpass_filter(
+            ecg_raw,
+            fs=fs,
+            lowcut=float(sig_cfg["bandpass_low"]),
+            highcut=float(sig_cfg["bandpass_high"]),
+            order=int(sig_cfg.get("filter_order", 4)),
+        )
+        windows = sliding_windows(ecg, fs, win_sec, overlap)
+        per_window = detect_r_peaks(windows, fs, min_rr_sec=min_rr)
+
+    for peaks in per_window:
         total += 1
-        peaks = detect_r_peaks(w, fs, min_rr_sec=min_rr)
         rr = rr_intervals_seconds(peaks, fs)
 
         # 1) Hard physiological RR constraints
@@ -8,6 +8,9 @@ Default behavior (NO arguments):
     -> Run dataset evaluation using ../config/config.yaml
        (dual baseline, Rest/Active, pass_rate for all CSVs)
 
+Watch mode (keeps outputs up to date as recordings arrive):
+    python run_analysis.py --watch [--workers 2] [--poll-interval 10]
+
 Single-file mode (optional, legacy):
     python run_analysis.py --input ecg.txt --output report.pdf
 """
@@ -23,12 +26,9 @@ from src.orchestrator import HRVAnalysisOrchestrator
 from src.utils import setup_logging, load_config
 
 # New imports for report generation
-import pandas as pd
-from src.tools.report_generator import generate_report
-from src.tools.ecg_loader import read_ecg_csv_column
-from src.tools.signal_processor import process_signal
-from src.tools.extended_features import extract_extended_features
-from src.utils.helpers import resolve_data_dir, resolve_sampling_rate
+import json
+from src.tools.aggregates import DATASET_SUMMARY_NAME
+from src.tools.report_generator import generate_dataset_report
 
 # ----------------------------
 # Argument parsing
@@ -42,6 +42,26 @@ def parse_args():
         help="Path to configuration file (.yaml)"
     )
 
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running: poll data_dir and update outputs as recordings arrive"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Watch mode: files processed concurrently (default: processing.watch.workers)"
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=None,
+        help="Watch mode: seconds between scans (default: processing.watch.poll_interval_sec)"
+    )
+
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -70,6 +90,16 @@ def main():
         logger.error(f"Failed to load config: {e}")
         sys.exit(1)
 
+    if args.watch:
+        from src.watcher import DatasetWatcher
+
+        watcher = DatasetWatcher(config, poll_interval=args.poll_interval, workers=args.workers)
+        logger.info(f"Watching {watcher.cfg['data_dir']} (Ctrl-C to stop)...")
+        result = watcher.run()
+        print(f"\n[OK] Watcher stopped. Output dir: {result.get('outdir')}")
+        print(f"[OK] Files processed this session: {result.get('n_processed')}")
+        return
+
     logger.info("Initializing HRV Analysis Agent...")
     orchestrator = HRVAnalysisOrchestrator()
 
@@ -78,18 +108,19 @@ def main():
         logger.info(f"Dataset analysis complete: {result}")
         print(f"\n[OK] Output dir: {result.get('outdir')}")
         print(f"[OK] Files processed: {result.get('n_files')}")
-        print(f"[OK] Wrote: pass_rates.csv, baselines.json, per_file/*.json")
+        print(f"[OK] Wrote: pass_rates.csv, baselines.json, {DATASET_SUMMARY_NAME}, per_file/*.json")
 
-        # --- Generate Overall Analysis Report ---
+        # --- Generate Overall Analysis Report (from the dataset-wide aggregates) ---
         output_dir = Path(result["outdir"])
-        pass_rates_path = output_dir / "pass_rates.csv"
-        
-        if pass_rates_path.exists():
-            df_pass_rates = pd.read_csv(pass_rates_path)
-            
-            # Calculate overall pass rate (e.g., mean of all file pass rates)
-            overall_pass_rate = df_pass_rates["pass_rate"].mean()
-            
+        summary_path = output_dir / DATASET_SUMMARY_NAME
+
+        if summary_path.exists():
+            with open(summary_path, encoding="utf-8") as f:
+                summary = json.load(f)
+
+            # Pooled over all windows of all files
+            overall_pass_rate = summary["overall"]["pass_rate"] or 0.0
+
             # Create a simple summary
             if overall_pass_rate >= 0.95:
                 evaluation_summary = "The system found high consistency with personalized baselines across all analyzed files."
@@ -97,58 +128,19 @@ def main():
                 evaluation_summary = "The system found moderate consistency with personalized baselines; some deviations were noted."
             else:
                 evaluation_summary = "The system indicated low consistency with personalized baselines; significant deviations were observed."
-            
-            # --- Get representative data for the report ---
-            # This is a simplification; in a real scenario, you might pick a representative file
-            # or process a summary of all files.
-            
-            # Find the correct data_dir based on config.
-            data_dir_resolved = resolve_data_dir(config)
-            
-            # Find one CSV file path from the records scanned by the orchestrator
-            all_records = orchestrator._scan_dataset_from_config(data_dir_resolved, config["dataset"]["persons"])
-            
-            if all_records:
-                representative_file_path = all_records[0]["path"]
-                fs = int(config["signal"]["sampling_rate"]) # Get sampling rate from config
-                
-                # Load raw ECG signal
-                raw_ecg_signal = read_ecg_csv_column(representative_file_path)
-                
-                ecg_data_for_report = {
-                    "signal": raw_ecg_signal,
-                    "sampling_rate": fs,
-                    "duration_sec": len(raw_ecg_signal) / fs,
-                    "n_samples": len(raw_ecg_signal),
-                    "file_path": str(representative_file_path)
-                }
-                
-                # Process signal
-                processed_for_report = process_signal(ecg_data_for_report, 
-                                                        filter_low=float(config["signal"].get("bandpass_low", 0.5)),
-                                                        filter_high=float(config["signal"].get("bandpass_high", 20.0)))
-                
-                # Extract features
-                features_for_report = extract_extended_features(processed_for_report["rr_intervals"])
-                
-                report_output_path = output_dir / "overall_analysis_report.md"
-                
-                logger.info(f"Generating overall analysis report to: {report_output_path}")
-                generated_report_path = generate_report(
-                    ecg_data=ecg_data_for_report,
-                    processed=processed_for_report,
-                    features=features_for_report,
-                    pass_rate=overall_pass_rate,
-                    evaluation_summary=evaluation_summary,
-                    output_path=report_output_path,
-                    include_ai_interpretation=False # Assume no ANTHROPIC_API_KEY
-                )
-                print(f"\n[OK] Overall analysis report generated at: {generated_report_path}")
-            else:
-                logger.warning("No records found from orchestrator scan to generate representative report data.")
+
+            report_output_path = output_dir / "overall_analysis_report.md"
+
+            logger.info(f"Generating overall analysis report to: {report_output_path}")
+            generated_report_path = generate_dataset_report(
+                summary,
+                output_path=report_output_path,
+                evaluation_summary=evaluation_summary,
+            )
+            print(f"\n[OK] Overall analysis report generated at: {generated_report_path}")
         else:
-            logger.warning(f"pass_rates.csv not found at {pass_rates_path}, skipping overall report generation.")
-                
+            logger.warning(f"{DATASET_SUMMARY_NAME} not found at {summary_path}, skipping overall report generation.")
+
     except Exception as e:
         logger.error(f"Error during dataset analysis or report generation: {e}")
         if args.verbose:
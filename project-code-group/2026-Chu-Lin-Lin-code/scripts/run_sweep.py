@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+"""
+Parameter sweep over window size, overlap, filter band and RR limits.
+
+Examples:
+    # default grid (window size x overlap x bandpass_high x min_rr_sec)
+    python scripts/run_sweep.py --workers 4
+
+    # custom grid: repeat --grid KEY=V1,V2,... for every swept config key
+    python scripts/run_sweep.py \\
+        --grid features.window_size_sec=30,60 \\
+        --grid signal.bandpass_low=0.5,1.0 \\
+        --grid baseline.k_rest=2.0,2.5
+
+Writes <outdir>/sweep_results.csv (one row per configuration, with pass rates
+and timings) and prints the best configurations.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.sweep import run_sweep
+from src.utils import setup_logging, load_config
+
+
+DEFAULT_GRID = {
+    "features.window_size_sec": [30, 60],
+    "features.overlap": [0.5, 0.75],
+    "signal.bandpass_high": [15.0, 20.0],
+    "r_peak.min_rr_sec": [0.3, 0.4],
+}
+
+
+def parse_grid(items: list[str]) -> dict:
+    """Parse KEY=V1,V2,... arguments; values are read as YAML scalars."""
+    grid = {}
+    for item in items:
+        key, sep, values = item.partition("=")
+        if not sep or not key or not values:
+            raise argparse.ArgumentTypeError(f"Expected KEY=V1,V2,..., got '{item}'")
+        grid[key.strip()] = [yaml.safe_load(v) for v in values.split(",")]
+    return grid
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Sweep dataset-evaluation parameters")
+    p.add_argument("--config", "-c",
+                   default=str(Path(__file__).parent.parent / "config" / "config.yaml"),
+                   help="Path to configuration file (.yaml)")
+    p.add_argument("--grid", action="append", default=[], metavar="KEY=V1,V2",
+                   help="Swept config key and values (repeatable; default: built-in grid)")
+    p.add_argument("--workers", type=int, default=1, help="Processes for parallel configurations")
+    p.add_argument("--outdir", default=None, help="Output directory (default: <output.dir>/sweep)")
+    p.add_argument("--top", type=int, default=10, help="Number of configurations to print")
+    p.add_argument("--verbose", "-v", action="store_true", help="Enable verbose output")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    import logging
+    setup_logging(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    config = load_config(args.config)
+    grid = parse_grid(args.grid) if args.grid else DEFAULT_GRID
+
+    results = run_sweep(config, grid, workers=args.workers,
+                        outdir=Path(args.outdir) if args.outdir else None)
+
+    score_cols = [c for c in results.columns if c.startswith("pass_rate_")]
+    cols = list(grid) + ["pass_rate"] + score_cols + ["n_windows", "total_sec"]
+    best = results.sort_values("pass_rate", ascending=False).head(args.top)
+    print(best[cols].to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    print(f"\n[OK] {len(results)} configurations evaluated "
+          f"({results['shared_by'].rdiv(1).sum():.0f} signal-chain runs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,10 @@ Default (no args):
     python visualize_ecg_conditions.py
 Reads config from ../config/config.yaml
 Outputs figures to reports/figures/ecg_waveforms/
+
+With --peaks, the stored R-peak annotations of each recording (see
+src/tools/annotations.py) are marked on the waveform; recordings without
+annotations for the current detector settings are annotated once first.
 """
 
 import sys
@@ -31,6 +35,7 @@ from src.utils.helpers import (
     scan_csv_files,       # New import
 )
 from src.tools.ecg_loader import pick_ecg_column, pick_time_column # New imports
+from src.tools.annotations import AnnotationStore, annotation_dir, detector_params
 
 
 # Removed local _infer_persons_states and scan_csv_files
@@ -42,6 +47,7 @@ def parse_args():
     p.add_argument("--file-glob", default="*.csv", help="File pattern (default: *.csv)")
     p.add_argument("--max-seconds", type=float, default=None, help="Plot only first N seconds (optional)")
     p.add_argument("--downsample", type=int, default=5, help="Plot every N samples (default: 5)")
+    p.add_argument("--peaks", action="store_true", help="Mark stored R-peak annotations (default: off)")
     return p.parse_args()
 
 
@@ -62,6 +68,9 @@ def main():
     logger.info(f"Sampling rate: {fs} Hz")
     logger.info(f"Output dir: {outdir}")
 
+    annotations = AnnotationStore(annotation_dir(cfg)) if args.peaks else None
+    params = detector_params(cfg, sampling_rate=fs) if args.peaks else None
+
     records = scan_csv_files(data_dir, args.file_glob)
     if not records:
         raise RuntimeError(f"No CSV files found under {data_dir} with pattern {args.file_glob}")
@@ -100,6 +109,11 @@ def main():
 
         plt.figure(figsize=(11.3, 7.87))  # A4 landscape-ish
         plt.plot(t[idx], ecg[idx], linewidth=0.8)
+        if annotations is not None:
+            peaks = annotations.get(f, params)["r_peaks"]
+            peaks = peaks[peaks < len(ecg)]
+            plt.plot(t[peaks], ecg[peaks], "rv", markersize=3, label="R-peaks")
+            plt.legend(loc="upper right")
         plt.xlabel("Time (sec)")
         plt.ylabel(f"ECG ({ecg_col})")
         plt.title(f"{r['person']} | {r['state']} | {f.name}")
@@ -112,6 +126,9 @@ def main():
 
         logger.info(f"Saved: {out_path}")
 
+    if annotations is not None:
+        logger.info(f"R-peak annotations: {annotations.stats['hit']} loaded, {annotations.stats['miss']} detected")
+
 
 if __name__ == "__main__":
     main()
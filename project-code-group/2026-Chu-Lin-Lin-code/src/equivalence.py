@@ -0,0 +1,453 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Golden-reference equivalence harness for optimized code paths.
+
+Every optimized path in the pipeline has a straightforward reference it
+must reproduce. Examples are batched window filtering vs per-window
+process_signal(), or a parallel or out-of-core run_dataset() vs the serial
+in-memory run. A case runs both on the same input and returns named
+outputs ("features"). The harness then compares every feature within its
+own tolerance and times both sides.
+
+Record cases take one record (a dict with 'name', 'signal' and
+'sampling_rate', e.g. from detector_benchmark.synthetic_record() or a
+recorded CSV). Dataset cases compare full run_dataset() outputs
+(pass_rates.csv, baselines.json) between processing settings.
+"""
+
+import copy
+import json
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .orchestrator import HRVAnalysisOrchestrator
+from .tools.extended_features import _compute_multiscale_entropy, _compute_sample_entropy, MSE_MAX_SCALE
+from .tools.segment_scheduler import sliding_window_matrix
+from .tools.signal_processor import process_signal, process_signal_batch
+from .tools.window_store import FEATURE_COLUMNS
+
+
+# (atol, rtol) used for features without their own tolerance
+DEFAULT_TOLERANCE = (1e-9, 1e-9)
+
+# analysis windows of the record cases
+WINDOW_SEC = 30.0
+OVERLAP = 0.5
+
+# float32 signal path (signal.dtype: float32) vs float64. Where two samples
+# of the QRS energy nearly tie, rounding can move an R-peak by one sample;
+# the feature means over all windows must stay within these tolerances
+# (looser for the threshold-count features pNN50 and sample entropy).
+FLOAT32_TOLERANCES = {
+    "r_peaks": (1.0, 0.0),
+    **{f"mean.{name}": (1e-9, 2e-3) for name in FEATURE_COLUMNS},
+    "mean.pnn50": (1e-9, 1e-2),
+    "mean.sample_entropy": (1e-9, 2e-2),
+}
+
+# name -> {"reference": f(record) -> dict, "optimized": f(record) -> dict,
+#          "tolerances": {feature: (atol, rtol)}}
+CASES: dict[str, dict] = {}
+
+# run_dataset variants checked against the serial in-memory run:
+# name -> overrides of the config 'processing' section
+DATASET_VARIANTS = {
+    "workers_2": {"workers": 2, "chunk_windows": 4},
+    "out_of_core": {"out_of_core": {"enabled": True, "block_windows": 8}},
+    "stage_cache": {"stage_cache": {"enabled": True}},
+}
+
+
+def register_case(name: str, reference: Callable[[dict], dict], optimized: Callable[[dict], dict],
+                  tolerances: Optional[dict] = None) -> None:
+    """
+    Register a record case with the harness.
+
+    Args:
+        name: Name shown in the results table.
+        reference: Callable taking a record and returning {feature: values}.
+        optimized: Callable with the same signature and outputs.
+        tolerances: Optional {feature: (atol, rtol)}; others use DEFAULT_TOLERANCE.
+    """
+    CASES[name] = {"reference": reference, "optimized": optimized, "tolerances": dict(tolerances or {})}
+
+
+def compare_features(reference: dict, optimized: dict, tolerances: Optional[dict] = None) -> list[dict]:
+    """
+    Compare named outputs value by value.
+
+    A value passes if |optimized - reference| <= atol + rtol * |reference|
+    (as np.isclose). NaNs must sit at the same positions, and a missing
+    feature or a shape mismatch fails with infinite deviation.
+
+    Args:
+        reference: {feature: array-like} of the reference path.
+        optimized: {feature: array-like} of the optimized path.
+        tolerances: Optional {feature: (atol, rtol)}.
+
+    Returns:
+        list: One dict per reference feature with feature, n_values,
+            max_abs_dev, max_rel_dev, atol, rtol, passed.
+    """
+    tolerances = tolerances or {}
+    rows = []
+    for feature, ref in reference.items():
+        atol, rtol = tolerances.get(feature, DEFAULT_TOLERANCE)
+        ref = np.asarray(ref, dtype=float).ravel()
+        opt = np.asarray(optimized.get(feature, []), dtype=float).ravel()
+        row = {"feature": feature, "n_values": len(ref), "atol": atol, "rtol": rtol}
+
+        if feature not in optimized or ref.shape != opt.shape \
+                or not np.array_equal(np.isnan(ref), np.isnan(opt)):
+            rows.append({**row, "max_abs_dev": np.inf, "max_rel_dev": np.inf, "passed": False})
+            continue
+
+        ok = ~np.isnan(ref)
+        abs_dev = np.abs(opt[ok] - ref[ok])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel_dev = np.where(abs_dev > 0, abs_dev / np.abs(ref[ok]), 0.0)
+        rows.append({
+            **row,
+            "max_abs_dev": float(abs_dev.max()) if abs_dev.size else 0.0,
+            "max_rel_dev": float(rel_dev.max()) if rel_dev.size else 0.0,
+            "passed": bool(np.all(abs_dev <= atol + rtol * np.abs(ref[ok]))),
+        })
+    return rows
+
+
+def _timed(fn: Callable, arg, repeat: int):
+    """(result of the last call, best wall time of repeat calls)."""
+    best = np.inf
+    out = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def run_equivalence(records: Iterable[dict], cases: Optional[Iterable[str]] = None,
+                    repeat: int = 3) -> pd.DataFrame:
+    """
+    Run every record case on every record.
+
+    Args:
+        records: Records ('name', 'signal', 'sampling_rate').
+        cases: Names from CASES to run (default: all registered).
+        repeat: Timed runs per side (best is kept).
+
+    Returns:
+        pd.DataFrame: One row per (case, record, feature) with columns case,
+            record, feature, n_values, max_abs_dev, max_rel_dev, atol, rtol,
+            passed, ref_sec, opt_sec, speedup.
+
+    Raises:
+        KeyError: If an unknown case name is requested.
+    """
+    names = list(CASES) if cases is None else list(cases)
+    for name in names:
+        if name not in CASES:
+            raise KeyError(f"Unknown equivalence case '{name}'. Registered: {sorted(CASES)}")
+
+    rows = []
+    for rec in records:
+        for name in names:
+            case = CASES[name]
+            ref, ref_sec = _timed(case["reference"], rec, repeat)
+            opt, opt_sec = _timed(case["optimized"], rec, repeat)
+            for row in compare_features(ref, opt, case["tolerances"]):
+                rows.append({"case": name, "record": rec["name"], **row,
+                             "ref_sec": ref_sec, "opt_sec": opt_sec,
+                             "speedup": ref_sec / opt_sec if opt_sec > 0 else np.inf})
+    return pd.DataFrame(rows)
+
+
+def summarize_equivalence(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per case: overall pass/fail, worst deviations and speed-up.
+
+    Timings are summed over records (each record counted once), so the
+    speed-up is total reference time over total optimized time.
+
+    Args:
+        results: Output of run_equivalence() and/or check_run_dataset().
+
+    Returns:
+        pd.DataFrame: Indexed by case, with passed, n_features, failed
+            (comma-separated failing features), max_abs_dev, max_rel_dev,
+            ref_sec, opt_sec, speedup.
+    """
+    g = results.groupby("case", sort=False)
+    timing = results.drop_duplicates(["case", "record"]).groupby("case", sort=False)[["ref_sec", "opt_sec"]].sum()
+    summary = pd.DataFrame({
+        "passed": g["passed"].all(),
+        "n_features": g["feature"].nunique(),
+        "failed": g.apply(lambda d: ",".join(sorted(set(d.loc[~d["passed"], "feature"]))),
+                          include_groups=False),
+        "max_abs_dev": g["max_abs_dev"].max(),
+        "max_rel_dev": g["max_rel_dev"].max(),
+    })
+    summary = summary.join(timing)
+    summary["speedup"] = summary["ref_sec"] / summary["opt_sec"]
+    return summary
+
+
+def dataset_records(config: dict, limit: Optional[int] = None) -> list[dict]:
+    """
+    Recorded inputs: the dataset CSVs of a config, with its window and filter settings.
+
+    Args:
+        config: Loaded config.yaml.
+        limit: Maximum number of recordings (default: all).
+
+    Returns:
+        list: Records ('name', 'signal', 'sampling_rate', 'win_sec',
+            'overlap', 'filter_low', 'filter_high') for run_equivalence().
+    """
+    orchestrator = HRVAnalysisOrchestrator()
+    cfg = orchestrator._dataset_settings(config)
+    files = orchestrator._scan_dataset_from_config(cfg["data_dir"], cfg["persons_cfg"])[:limit]
+    return [{
+        "name": Path(HRVAnalysisOrchestrator._detail_filename(rec)).stem,
+        "signal": orchestrator._load_signal(rec["path"]),
+        "sampling_rate": cfg["fs"],
+        "win_sec": cfg["win_sec"],
+        "overlap": cfg["overlap"],
+        "filter_low": cfg["filter_low"],
+        "filter_high": cfg["filter_high"],
+    } for rec in files]
+
+
+# ----------------------------------------------------------------------
+# record cases
+# ----------------------------------------------------------------------
+def _windows(rec: dict) -> np.ndarray:
+    fs = rec["sampling_rate"]
+    win = int(rec.get("win_sec", WINDOW_SEC) * fs)
+    stride = max(1, int(win * (1.0 - rec.get("overlap", OVERLAP))))
+    return sliding_window_matrix(np.asarray(rec["signal"], dtype=float), win, stride)
+
+
+def _band(rec: dict) -> dict:
+    return {"filter_low": rec.get("filter_low", 0.5),
+            "filter_high": rec.get("filter_high", min(20.0, 0.45 * rec["sampling_rate"]))}
+
+
+def _processed_features(results: list[dict]) -> dict:
+    """Concatenated per-window process_signal() outputs."""
+    return {
+        "filtered_signal": np.concatenate([r["filtered_signal"] for r in results]) if results else [],
+        "r_peaks": np.concatenate([r["r_peaks"] for r in results]) if results else [],
+        "rr_intervals": np.concatenate([r["rr_intervals"] for r in results]) if results else [],
+        "n_beats": [r["n_beats"] for r in results],
+    }
+
+
+def _signal_per_window(rec: dict) -> dict:
+    fs = rec["sampling_rate"]
+    return _processed_features([process_signal({"signal": w, "sampling_rate": fs}, **_band(rec))
+                                for w in _windows(rec)])
+
+
+def _signal_batch(rec: dict) -> dict:
+    return _processed_features(process_signal_batch(_windows(rec), rec["sampling_rate"], **_band(rec)))
+
+
+def _peak_features(processed: dict) -> dict:
+    peaks = np.asarray(processed["r_peaks"])
+    return {"r_peaks": peaks, "rr_samples": np.diff(peaks), "n_beats": [len(peaks)]}
+
+
+def _full_rate_peaks(rec: dict) -> dict:
+    return _peak_features(process_signal(rec, **_band(rec)))
+
+
+def _multirate_peaks(rec: dict) -> dict:
+    return _peak_features(process_signal(rec, detection_fs=50.0, **_band(rec)))
+
+
+def _metric_features(metrics: list) -> dict:
+    """Window metrics (None = too few beats) as flat feature arrays."""
+    out = {"valid": [m is not None for m in metrics],
+           "rr": np.concatenate([m["rr"] for m in metrics if m is not None] or [[]])}
+    for key in ("mean_hr_bpm", "sdnn", "rmssd", "lf_hf_ratio"):
+        out[key] = [m[key] if m is not None else np.nan for m in metrics]
+    return out
+
+
+def _window_metrics_loop(rec: dict) -> dict:
+    orch = HRVAnalysisOrchestrator()
+    band = _band(rec)
+    return _metric_features([orch._window_metrics(w, rec["sampling_rate"], band["filter_low"], band["filter_high"])
+                             for w in _windows(rec)])
+
+
+def _window_metrics_batched(rec: dict) -> dict:
+    band = _band(rec)
+    return _metric_features(HRVAnalysisOrchestrator()._window_metrics_batch(
+        _windows(rec), rec["sampling_rate"], band["filter_low"], band["filter_high"]))
+
+
+def _leads(rec: dict) -> np.ndarray:
+    """Three synthetic leads derived from one ECG: scaled, inverted, time-reversed."""
+    x = np.asarray(rec["signal"], dtype=float)
+    return np.column_stack([x, -0.7 * x, x[::-1]])
+
+
+def _leads_one_by_one(rec: dict) -> dict:
+    leads = _leads(rec)
+    results = [process_signal({"signal": leads[:, c], "sampling_rate": rec["sampling_rate"]}, **_band(rec))
+               for c in range(leads.shape[1])]
+    return {"filtered_signal": np.column_stack([r["filtered_signal"] for r in results]),
+            "r_peaks": np.concatenate([r["r_peaks"] for r in results]),
+            "n_beats": [r["n_beats"] for r in results]}
+
+
+def _leads_at_once(rec: dict) -> dict:
+    result = process_signal({"signal": _leads(rec), "sampling_rate": rec["sampling_rate"]}, **_band(rec))
+    return {"filtered_signal": result["filtered_signal"],
+            "r_peaks": np.concatenate([r["r_peaks"] for r in result["leads"]]),
+            "n_beats": [r["n_beats"] for r in result["leads"]]}
+
+
+def _reference_sample_entropy(x: np.ndarray, m: int, r: float) -> float:
+    """Sample entropy by the O(N^2) pair loop (the original implementation)."""
+    def count(template_len):
+        n = len(x) - template_len
+        c = 0
+        for i in range(n):
+            for j in range(i + 1, n):
+                if np.max(np.abs(x[i:i + template_len] - x[j:j + template_len])) < r:
+                    c += 1
+        return c
+
+    if len(x) < m + 2 or r == 0:
+        return np.nan
+    A, B = count(m + 1), count(m)
+    if B == 0:
+        return np.nan
+    return -np.log(A / B) if A > 0 else np.nan
+
+
+def _window_rr(rec: dict) -> list[np.ndarray]:
+    fs = rec["sampling_rate"]
+    return [r["rr_intervals"] for r in process_signal_batch(_windows(rec), fs, **_band(rec))]
+
+
+def _entropy_loop(rec: dict) -> dict:
+    out = {"sample_entropy": [], **{f"mse_{s}": [] for s in range(1, MSE_MAX_SCALE + 1)}}
+    for rr in rec.get("_rr") or _window_rr(rec):
+        r = 0.2 * np.std(rr) if len(rr) else 0.0
+        out["sample_entropy"].append(_reference_sample_entropy(rr, 2, r))
+        for s in range(1, MSE_MAX_SCALE + 1):
+            coarse = rr[:len(rr) // s * s].reshape(-1, s).mean(axis=1)
+            out[f"mse_{s}"].append(_reference_sample_entropy(coarse, 2, r))
+    return out
+
+
+def _entropy_kernel(rec: dict) -> dict:
+    out = {"sample_entropy": [], **{f"mse_{s}": [] for s in range(1, MSE_MAX_SCALE + 1)}}
+    for rr in rec.get("_rr") or _window_rr(rec):
+        out["sample_entropy"].append(_compute_sample_entropy(rr) if len(rr) else np.nan)
+        mse = _compute_multiscale_entropy(rr)
+        for s in range(1, MSE_MAX_SCALE + 1):
+            out[f"mse_{s}"].append(mse[f"mse_{s}"])
+    return out
+
+
+def _dtype_features(rec: dict, dtype) -> dict:
+    """R-peaks, beats and window-mean features with the signal held in dtype."""
+    fs = rec["sampling_rate"]
+    orch = HRVAnalysisOrchestrator()
+    processed = process_signal_batch(_windows(rec).astype(dtype), fs, **_band(rec))
+    metrics = [orch._metrics_from_processed(p, fs) for p in processed]
+    feats = np.array([m["features"] for m in metrics if m is not None]).reshape(-1, len(FEATURE_COLUMNS))
+    out = {"r_peaks": np.concatenate([p["r_peaks"] for p in processed]) if processed else [],
+           "n_beats": [p["n_beats"] for p in processed]}
+    for j, name in enumerate(FEATURE_COLUMNS):
+        col = feats[:, j][np.isfinite(feats[:, j])]
+        out[f"mean.{name}"] = [col.mean() if col.size else np.nan]
+    return out
+
+
+def _float64_signal(rec: dict) -> dict:
+    return _dtype_features(rec, np.float64)
+
+
+def _float32_signal(rec: dict) -> dict:
+    return _dtype_features(rec, np.float32)
+
+
+register_case("signal_batch", _signal_per_window, _signal_batch)
+register_case("multirate_peaks", _full_rate_peaks, _multirate_peaks,
+              tolerances={"r_peaks": (1.0, 0.0), "rr_samples": (2.0, 0.0)})
+register_case("window_metrics", _window_metrics_loop, _window_metrics_batched)
+register_case("multi_lead", _leads_one_by_one, _leads_at_once)
+register_case("entropy", _entropy_loop, _entropy_kernel)
+register_case("float32", _float64_signal, _float32_signal, tolerances=FLOAT32_TOLERANCES)
+
+
+# ----------------------------------------------------------------------
+# dataset cases
+# ----------------------------------------------------------------------
+def _dataset_features(outdir: Path) -> dict:
+    """pass_rates.csv counts and every baselines.json number."""
+    rates = pd.read_csv(outdir / "pass_rates.csv", encoding="utf-8-sig").sort_values("file")
+    features = {col: rates[col].to_numpy(dtype=float) for col in ("n_windows", "n_pass", "pass_rate")}
+
+    baselines = json.loads((outdir / "baselines.json").read_text(encoding="utf-8"))
+    leaves: dict[str, list] = {}
+    for pid in sorted(baselines):
+        for st in sorted(baselines[pid]):
+            for metric, stats in sorted(baselines[pid][st].items()):
+                for stat, value in sorted(stats.items()):
+                    leaves.setdefault(f"baseline.{metric}.{stat}", []).append(
+                        np.nan if value is None else float(value))
+    features.update(leaves)
+    return features
+
+
+def check_run_dataset(config: dict, workdir: Path, variants: Optional[dict] = None,
+                      repeat: int = 1, tolerances: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Compare run_dataset() under each processing variant with the serial in-memory run.
+
+    Args:
+        config: Loaded config.yaml (dataset, signal, features, baseline, ...).
+        workdir: Directory for the output of every run (one subdirectory each).
+        variants: {name: overrides of config['processing']} (default: DATASET_VARIANTS).
+        repeat: Timed runs per variant (best is kept; later runs of the
+            cached variants reuse their caches).
+        tolerances: Optional {feature: (atol, rtol)}.
+
+    Returns:
+        pd.DataFrame: Same columns as run_equivalence(), with case
+            'run_dataset' and the variant name as record.
+    """
+    variants = DATASET_VARIANTS if variants is None else variants
+    workdir = Path(workdir)
+    orchestrator = HRVAnalysisOrchestrator()
+
+    def run(name: str, processing: dict):
+        cfg = copy.deepcopy(config)
+        cfg["processing"] = {"workers": 1, "out_of_core": {"enabled": False},
+                             "stage_cache": {"enabled": False}, "progress": {"enabled": False},
+                             **processing}
+        cfg["output"] = {**cfg.get("output", {}), "dir": str(workdir / name)}
+        return _timed(lambda c: orchestrator.run_dataset(c), cfg, repeat)[1]
+
+    ref_sec = run("reference", {})
+    reference = _dataset_features(workdir / "reference")
+
+    rows = []
+    for name, processing in variants.items():
+        opt_sec = run(name, processing)
+        for row in compare_features(reference, _dataset_features(workdir / name), tolerances):
+            rows.append({"case": "run_dataset", "record": name, **row,
+                         "ref_sec": ref_sec, "opt_sec": opt_sec,
+                         "speedup": ref_sec / opt_sec if opt_sec > 0 else np.inf})
+    return pd.DataFrame(rows)
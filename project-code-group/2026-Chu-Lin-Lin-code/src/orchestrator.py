@@ -6,8 +6,11 @@ This module implements an orchestrator that coordinates an HRV (Heart Rate Varia
 analysis pipeline for stress detection from ECG signals.
 """
 
+import hashlib
 import json
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Any
@@ -20,6 +23,56 @@ from .tools import (
     generate_report
 )
 from .tools.ecg_loader import read_ecg_csv_column # New import
+from .tools.bootstrap import bootstrap_pass_rates
+from .tools.segment_scheduler import (
+    csv_to_memmap,
+    iter_window_blocks,
+    sliding_window_matrix,
+)
+from .tools.signal_processor import (
+    bandpass_filter,
+    compute_rr_intervals,
+    detect_r_peaks,
+    detect_r_peaks_multirate,
+    process_signal_batch,
+    remove_ectopic_beats,
+    signal_dtype,
+)
+from .tools.stage_cache import StageCache, stage_key
+from .tools.sketches import TDigest, robust_stats
+from .tools.aggregates import DATASET_SUMMARY_NAME, aggregate_dataset, write_dataset_summary
+from .tools.feature_store import FEATURE_STORE_NAME, write_feature_store
+from .tools.window_store import FEATURE_COLUMNS, METRIC_FIELDS, WindowStore
+from .utils.progress import ProgressReporter
+
+def _chunk_window_metrics(block: np.ndarray, win: int, stride: int, fs: int,
+                          filter_low: float, filter_high: float,
+                          detection_fs: Optional[float] = None) -> list:
+    """Worker task: metrics of every window of one chunk (windows start at 0, stride apart)."""
+    orchestrator = HRVAnalysisOrchestrator()
+    return orchestrator._window_metrics_batch(sliding_window_matrix(block, win, stride), fs,
+                                              filter_low, filter_high, detection_fs)
+
+
+def _record_stages_task(rec: dict, cfg: dict) -> tuple:
+    """Worker task: _record_stages() of one record, plus the worker's cache stats."""
+    cache = StageCache(cfg["stage_cache"]["dir"])
+    return HRVAnalysisOrchestrator()._record_stages(rec, cfg, cache) + (cache.stats,)
+
+
+def _save_ragged(path: Path, arrays: list) -> None:
+    """Store a list of 1-D arrays as one values buffer plus per-array counts."""
+    counts = np.array([len(a) for a in arrays], dtype=np.int64)
+    values = np.concatenate(arrays) if arrays else np.zeros(0)
+    np.savez(path, values=values, counts=counts)
+
+
+def _load_ragged(path: Path) -> list:
+    """Read a list of arrays written by _save_ragged()."""
+    with np.load(path) as z:
+        values, counts = z["values"], z["counts"]
+    return np.split(values, np.cumsum(counts)[:-1]) if len(counts) else []
+
 
 class HRVAnalysisOrchestrator:
     """
@@ -64,10 +117,101 @@ class HRVAnalysisOrchestrator:
             yield s, s + win
             s += stride
 
-    def _window_metrics(self, ecg_seg: np.ndarray, fs: int, filter_low: float, filter_high: float):
+    def _load_signal(self, fpath: Path, ooc: Optional[dict] = None, dtype: str = "float64") -> np.ndarray:
+        """
+        Load one recording: in memory, or as a memmap of its out-of-core cache.
+
+        ooc: out-of-core settings {"cache_dir", "block_windows"}; when None the
+        whole recording is loaded into memory.
+        dtype: signal dtype (signal.dtype: float64 or float32)
+        """
+        dtype = signal_dtype(dtype)
+        if ooc is None:
+            return read_ecg_csv_column(fpath, dtype=dtype) # Updated call
+
+        fpath = Path(fpath)
+        path_tag = hashlib.sha1(str(fpath.resolve()).encode("utf-8")).hexdigest()[:10]
+        cache_name = f"{fpath.stem}-{path_tag}.f{dtype.itemsize}"
+        return csv_to_memmap(fpath, Path(ooc["cache_dir"]) / cache_name, dtype=dtype)
+
+    def _iter_window_metrics(self, records: list[dict], fs: int, win: int, stride: int,
+                             filter_low: float, filter_high: float,
+                             detection_fs: Optional[float] = None, ooc: Optional[dict] = None,
+                             workers: int = 1, chunk_windows: int = 16,
+                             progress: Optional[ProgressReporter] = None, dtype: str = "float64"):
+        """
+        Yield (record index, start, end, metrics) for every window, in order.
+        progress: if given, told the length of each record when it is loaded.
+        dtype: signal dtype from loading through R-peak detection (float64/float32)
+
+        With workers > 1 each recording is cut into chunks of chunk_windows
+        consecutive windows (overlapping by win - stride samples, so every window
+        lies whole inside one chunk) and the chunks of all recordings are
+        processed on a process pool. Windows are filtered and analysed
+        independently, so the metrics equal the serial ones exactly.
+
+        Either way each chunk is viewed as a (n_windows, win) matrix without
+        copying and filtered in one batched call (_window_metrics_batch()).
+        """
+        if workers <= 1:
+            block_windows = ooc["block_windows"] if ooc else chunk_windows
+            for i, rec in enumerate(records):
+                sig = self._load_signal(rec["path"], ooc, dtype)
+                if progress is not None:
+                    progress.set_length(i, len(sig))
+                for b0, b1, starts in iter_window_blocks(len(sig), win, stride, block_windows):
+                    windows = sliding_window_matrix(np.asarray(sig[b0:b1]), win, stride)
+                    metrics = self._window_metrics_batch(windows, fs, filter_low, filter_high,
+                                                         detection_fs)
+                    for s, m in zip(starts.tolist(), metrics):
+                        yield i, s, s + win, m
+                del sig
+            return
+
+        pending = deque()   # (record index, window starts, future), in submission order
+
+        def drain_one():
+            i, starts, fut = pending.popleft()
+            for s, m in zip(starts.tolist(), fut.result()):
+                yield i, s, s + win, m
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for i, rec in enumerate(records):
+                sig = self._load_signal(rec["path"], ooc, dtype)
+                if progress is not None:
+                    progress.set_length(i, len(sig))
+                for b0, b1, starts in iter_window_blocks(len(sig), win, stride, chunk_windows):
+                    block = np.array(sig[b0:b1])
+                    fut = pool.submit(_chunk_window_metrics, block, win, stride, fs,
+                                      filter_low, filter_high, detection_fs)
+                    pending.append((i, starts, fut))
+                    # bound the number of chunks held in memory
+                    while len(pending) > 2 * workers:
+                        yield from drain_one()
+                del sig
+            while pending:
+                yield from drain_one()
+
+    def _window_metrics(self, ecg_seg: np.ndarray, fs: int, filter_low: float, filter_high: float,
+                        detection_fs: Optional[float] = None):
         ecg_data = {"signal": ecg_seg, "sampling_rate": fs}
-        processed = process_signal(ecg_data, filter_low=filter_low, filter_high=filter_high)
+        processed = process_signal(ecg_data, filter_low=filter_low, filter_high=filter_high,
+                                   detection_fs=detection_fs)
+        return self._metrics_from_processed(processed, fs)
+
+    def _window_metrics_batch(self, windows: np.ndarray, fs: int, filter_low: float,
+                              filter_high: float, detection_fs: Optional[float] = None) -> list:
+        """
+        _window_metrics() of every row of a (n_windows, win) matrix.
+
+        The rows are filtered and QRS-enhanced in one call along axis 1
+        (process_signal_batch()); the result equals the per-window path.
+        """
+        processed = process_signal_batch(windows, fs, filter_low=filter_low,
+                                         filter_high=filter_high, detection_fs=detection_fs)
+        return [self._metrics_from_processed(p, fs) for p in processed]
 
+    def _metrics_from_processed(self, processed: dict, fs: int):
         rr = processed.get("rr_intervals", None)
         if rr is None:
             return None
@@ -88,27 +232,46 @@ class HRVAnalysisOrchestrator:
             "sdnn": float(feats.get("sdnn", np.nan)),
             "rmssd": float(feats.get("rmssd", np.nan)),
             "lf_hf_ratio": float(feats.get("lf_hf_ratio", np.nan)),
+            "features": [float(feats.get(k, np.nan)) for k in FEATURE_COLUMNS],
         }
         return out
 
-    def _fit_baseline(self, rows: list[dict]) -> dict:
+    def _fit_baseline(self, rows, method: str = "mean_std", z_max: Optional[float] = None) -> dict:
             """
-            rows: list of per-window metrics dicts (from _window_metrics)
+            rows: list of per-window metrics dicts (from _window_metrics), or a
+                  window table (WindowStore from _window_table, or a DataFrame
+                  with the same columns) with rr_mean in seconds
+            method: "mean_std" (mean/std) or, via streaming quantile sketches,
+                    "robust" (median/MAD) or "median_iqr"
+            z_max: MAD z-score outlier threshold (robust only; None = keep all)
             """
-            rr_means = []
-            sdnn = []
-            rmssd = []
-
-            for r in rows:
-                rr = np.array(r["rr"], dtype=float)
-
-                # ms -> sec if needed
-                if np.nanmean(rr) > 10:   # e.g., 600~1200 means ms
-                    rr = rr / 1000.0
-
-                rr_means.append(float(np.nanmean(rr)))
-                sdnn.append(float(r["sdnn"]))
-                rmssd.append(float(r["rmssd"]))
+            if isinstance(rows, (pd.DataFrame, WindowStore)):
+                rr_means = np.asarray(rows["rr_mean"], dtype=float)
+                sdnn = np.asarray(rows["sdnn"], dtype=float)
+                rmssd = np.asarray(rows["rmssd"], dtype=float)
+            else:
+                rr_means = []
+                sdnn = []
+                rmssd = []
+
+                for r in rows:
+                    rr = np.array(r["rr"], dtype=float)
+
+                    # ms -> sec if needed
+                    if np.nanmean(rr) > 10:   # e.g., 600~1200 means ms
+                        rr = rr / 1000.0
+
+                    rr_means.append(float(np.nanmean(rr)))
+                    sdnn.append(float(r["sdnn"]))
+                    rmssd.append(float(r["rmssd"]))
+
+            if method != "mean_std":
+                sketches = {
+                    "rr_mean": TDigest().update(rr_means),
+                    "sdnn": TDigest().update(sdnn),
+                    "rmssd": TDigest().update(rmssd),
+                }
+                return self._baseline_from_sketches(sketches, method, z_max)
 
             def stat(x):
                 x = np.array(x, dtype=float)
@@ -124,6 +287,21 @@ class HRVAnalysisOrchestrator:
                 "rmssd": stat(rmssd),
             }
 
+    def _baseline_from_sketches(self, sketches: dict, method: str = "robust",
+                                z_max: Optional[float] = None) -> dict:
+        """
+        Robust baseline from per-metric TDigest sketches (which may have been
+        built in chunks or in other processes and merged).
+        """
+        return {name: robust_stats(d, method, z_max) for name, d in sketches.items()}
+
+    @staticmethod
+    def _center_spread(stat: dict) -> tuple[float, float]:
+        """(center, spread) of one baseline metric: median/scaled MAD or mean/std."""
+        if "center" in stat:
+            return stat["center"], stat["spread"]
+        return stat["mean"], stat["std"]
+
 
     def _in_range(self, x: float, mu: float, sd: float, k: float) -> bool:
         if not np.isfinite(x) or not np.isfinite(mu):
@@ -148,15 +326,444 @@ class HRVAnalysisOrchestrator:
         if not (rr_min <= rr_mean <= rr_max):
             return False
 
-        ok_rr = self._in_range(rr_mean, base["rr_mean"]["mean"], base["rr_mean"]["std"], k)
-        ok_sdnn = self._in_range(m["sdnn"], base["sdnn"]["mean"], base["sdnn"]["std"], k)
-        ok_rmssd = self._in_range(m["rmssd"], base["rmssd"]["mean"], base["rmssd"]["std"], k)
+        ok_rr = self._in_range(rr_mean, *self._center_spread(base["rr_mean"]), k)
+        ok_sdnn = self._in_range(m["sdnn"], *self._center_spread(base["sdnn"]), k)
+        ok_rmssd = self._in_range(m["rmssd"], *self._center_spread(base["rmssd"]), k)
 
         # 你可以調整規則：這裡用「三個都要過」
         return bool(ok_rr and ok_sdnn and ok_rmssd)
 
-    def run_dataset(self, config: dict) -> dict:
-        # ---- config ----
+    def _window_table(self, records: list[dict], fs: int, win: int, stride: int,
+                      filter_low: float, filter_high: float,
+                      detection_fs: Optional[float] = None, ooc: Optional[dict] = None,
+                      workers: int = 1, chunk_windows: int = 16,
+                      progress: Optional[ProgressReporter] = None, dtype: str = "float64") -> WindowStore:
+        """
+        Compute the metrics of every window of every record once, as a columnar table.
+        workers/chunk_windows/dtype: see _iter_window_metrics().
+        progress: optional reporter, updated once per window.
+
+        Rows are ordered by record, then by window start. The WindowStore holds
+        record (index into records), start, end (samples), rr_mean (seconds),
+        sdnn, rmssd, mean_hr_bpm, lf_hf_ratio and the RR intervals of every
+        window in one shared buffer. Windows without usable RR intervals are
+        skipped.
+        """
+        store = WindowStore()
+        windows = self._iter_window_metrics(records, fs, win, stride, filter_low, filter_high,
+                                            detection_fs, ooc, workers, chunk_windows, progress, dtype)
+        for i, s, e, m in windows:
+            self._append_window(store, i, s, e, m)
+            if progress is not None:
+                progress.window_done(i, e)
+        return store
+
+    @staticmethod
+    def _append_window(store: WindowStore, i: int, s: int, e: int, m: Optional[dict]) -> None:
+        """Add the metrics of one window (from _window_metrics) to a window table."""
+        if m is None:
+            return
+        rr = np.array(m["rr"], dtype=float)
+        rr_mean = float(np.nanmean(rr))
+        if rr_mean > 10:   # ms -> sec
+            rr_mean = float(np.nanmean(rr / 1000.0))
+
+        store.append(i, s, e, rr, features=m.get("features"), rr_mean=rr_mean,
+                     **{f: float(m.get(f, np.nan)) for f in METRIC_FIELDS})
+
+    # ------------------------------------------------------------------
+    # memoized stages: load -> filter -> peaks -> rr -> features -> baseline
+    # ------------------------------------------------------------------
+    def _load_stage(self, rec: dict, cfg: dict, cache: StageCache) -> tuple[np.ndarray, str]:
+        """Cached raw signal of one record (read-only memmap) and its load-stage key."""
+        fpath = Path(rec["path"])
+        st = fpath.stat()
+        dtype = signal_dtype(cfg["dtype"])
+        load_key = stage_key("load", [str(fpath.resolve()), st.st_size, st.st_mtime_ns, dtype.name])
+        sig = cache.run(
+            "load", load_key, ".npy",
+            lambda p: np.save(p, np.asarray(self._load_signal(fpath, cfg["ooc"], dtype), dtype=dtype)),
+            lambda p: np.load(p, mmap_mode="r"),
+        )
+        return sig, load_key
+
+    def _record_stages(self, rec: dict, cfg: dict, cache: StageCache) -> tuple[WindowStore, str, int]:
+        """
+        Window table of one record through the cached per-record stages.
+
+        Every stage reads the output of the one before it and is keyed by that
+        stage's key plus the config values it uses:
+
+            load      file path, size, mtime, signal dtype   raw signal (.npy)
+            filter    fs, bandpass_low/high, window, overlap  filtered windows (.npy)
+            peaks     r_peak.detection_fs                    R-peaks per window
+            rr        (ectopic removal)                      clean RR per window
+            features  -                                      WindowStore (record 0)
+
+        Results equal _window_table() for the same record.
+
+        Returns:
+            tuple: (WindowStore, key of the features stage, length in samples)
+        """
+        fs, win, stride = cfg["fs"], cfg["win"], cfg["stride"]
+        block_windows = cfg["ooc"]["block_windows"] if cfg["ooc"] else cfg["chunk_windows"]
+        sig, load_key = self._load_stage(rec, cfg, cache)
+
+        filter_key = stage_key("filter", load_key, {
+            "fs": fs, "bandpass_low": cfg["filter_low"], "bandpass_high": cfg["filter_high"],
+            "win": win, "stride": stride,
+        })
+
+        def build_filtered(p):
+            n_win = (len(sig) - win) // stride + 1 if len(sig) >= win else 0
+            if n_win == 0:
+                np.save(p, np.zeros((0, win), dtype=sig.dtype))
+                return
+            out = np.lib.format.open_memmap(p, mode="w+", dtype=sig.dtype, shape=(n_win, win))
+            for b0, b1, starts in iter_window_blocks(len(sig), win, stride, block_windows):
+                w0 = int(starts[0]) // stride
+                windows = sliding_window_matrix(np.asarray(sig[b0:b1]), win, stride)
+                out[w0:w0 + len(windows)] = bandpass_filter(windows, fs, cfg["filter_low"],
+                                                            cfg["filter_high"], axis=1)
+            out.flush()
+            del out
+
+        filtered = cache.run("filter", filter_key, ".npy", build_filtered,
+                             lambda p: np.load(p, mmap_mode="r"))
+
+        detection_fs = cfg["detection_fs"]
+        peaks_key = stage_key("peaks", filter_key, {"detection_fs": detection_fs})
+
+        def build_peaks(p):
+            peaks = []
+            for w0 in range(0, len(filtered), block_windows):
+                block = np.asarray(filtered[w0:w0 + block_windows])
+                if detection_fs:
+                    peaks.extend(detect_r_peaks_multirate(row, fs, detection_fs=detection_fs)
+                                 for row in block)
+                else:
+                    peaks.extend(detect_r_peaks(block, fs))
+            _save_ragged(p, peaks)
+
+        peaks = cache.run("peaks", peaks_key, ".npz", build_peaks, _load_ragged)
+
+        rr_key = stage_key("rr", peaks_key, {"remove_ectopic": True})
+
+        def build_rr(p):
+            rrs = []
+            for r_peaks in peaks:
+                rr = compute_rr_intervals(r_peaks, fs)
+                rrs.append(remove_ectopic_beats(rr) if len(rr) > 0 else rr)
+            _save_ragged(p, rrs)
+
+        rrs = cache.run("rr", rr_key, ".npz", build_rr, _load_ragged)
+
+        features_key = stage_key("features", rr_key)
+
+        def build_features(p):
+            store = WindowStore()
+            for j, rr in enumerate(rrs):
+                processed = {
+                    "rr_intervals": rr,
+                    "mean_hr_bpm": 60000 / np.mean(rr) if len(rr) > 0 else None,
+                }
+                s0 = j * stride
+                self._append_window(store, 0, s0, s0 + win, self._metrics_from_processed(processed, fs))
+            store.save(p)
+
+        store = cache.run("features", features_key, ".npz", build_features, WindowStore.load)
+        return store, features_key, len(sig)
+
+    def _staged_window_table(self, records: list[dict], cfg: dict, cache: StageCache,
+                             progress: Optional[ProgressReporter] = None) -> tuple[WindowStore, list[str]]:
+        """
+        _window_table() through the memoized stages; records run on a process
+        pool when processing.workers > 1.
+        progress: optional reporter, updated once per record.
+
+        Returns:
+            tuple: (WindowStore of all records, features key of each record)
+        """
+        def finished(i, n_samples):
+            if progress is not None:
+                n_windows = (n_samples - cfg["win"]) // cfg["stride"] + 1 if n_samples >= cfg["win"] else 0
+                progress.file_done(i, n_windows=n_windows, n_samples=n_samples)
+
+        stores, keys = [], []
+        if cfg["workers"] <= 1:
+            for i, rec in enumerate(records):
+                store, key, n_samples = self._record_stages(rec, cfg, cache)
+                stores.append(store)
+                keys.append(key)
+                finished(i, n_samples)
+        else:
+            with ProcessPoolExecutor(max_workers=cfg["workers"]) as pool:
+                results = pool.map(_record_stages_task, records, [cfg] * len(records))
+                for i, (store, key, n_samples, stats) in enumerate(results):
+                    cache.merge_stats(stats)
+                    stores.append(store)
+                    keys.append(key)
+                    finished(i, n_samples)
+
+        return WindowStore.concatenate(stores, records=range(len(stores))), keys
+
+    def _staged_baseline(self, cache: StageCache, table: WindowStore, feature_keys: list[str],
+                         method: str, z_max: Optional[float]) -> dict:
+        """_fit_baseline() of one (person, state) group, memoized on its records' features."""
+        key = stage_key("baseline", feature_keys, {"method": method, "z_max": z_max})
+
+        def build(p):
+            with open(p, "w", encoding="utf-8") as fh:
+                json.dump(self._fit_baseline(table, method=method, z_max=z_max), fh)
+
+        def load(p):
+            with open(p, encoding="utf-8") as fh:
+                return json.load(fh)
+
+        return cache.run("baseline", key, ".json", build, load)
+
+    @staticmethod
+    def _group_mask(table, records: list[dict], person: str, state: str) -> np.ndarray:
+        """Rows of a window table whose record belongs to (person, state)."""
+        in_group = np.array([rec["person"] == person and rec["state"] == state for rec in records],
+                            dtype=bool)
+        return in_group[np.asarray(table["record"], dtype=np.int64)]
+
+    @staticmethod
+    def _in_range_array(x: np.ndarray, mu: np.ndarray, sd: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """Vectorized _in_range() over arrays of windows."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            valid = np.isfinite(x) & np.isfinite(mu)
+            degenerate = ~np.isfinite(sd) | (sd == 0)
+            rel_ok = (np.abs(x - mu) / (np.abs(mu) + 1e-9)) <= 0.10
+            band_ok = ((mu - k * sd) <= x) & (x <= (mu + k * sd))
+        return valid & np.where(degenerate, rel_ok, band_ok)
+
+    def _evaluate_windows(self, table, records: list[dict], baselines: dict,
+                          k_rest: float, k_active: float, rr_min: float, rr_max: float,
+                          record_baselines: Optional[list[dict]] = None) -> np.ndarray:
+        """
+        Pass/fail of every window in a window table (WindowStore or DataFrame);
+        same rule as _window_pass().
+
+        The baseline and k of each window's (person, state) are gathered per
+        record and broadcast to the windows, so all checks are array operations.
+        record_baselines: optional baseline per record (e.g. leave-one-file-out)
+        used instead of the (person, state) baseline.
+        """
+        metrics = ("rr_mean", "sdnn", "rmssd")
+        n_rec = len(records)
+        mu = {c: np.full(n_rec, np.nan) for c in metrics}
+        sd = {c: np.full(n_rec, np.nan) for c in metrics}
+        k = np.empty(n_rec)
+        for i, rec in enumerate(records):
+            if record_baselines is not None:
+                base = record_baselines[i]
+            else:
+                base = baselines[rec["person"]][rec["state"]]
+            for c in metrics:
+                mu[c][i], sd[c][i] = self._center_spread(base[c])
+            k[i] = k_rest if rec["state"].lower() == "rest" else k_active
+
+        idx = np.asarray(table["record"], dtype=np.int64)
+        rr_mean = np.asarray(table["rr_mean"], dtype=float)
+
+        # physiological limits (hard), then all three baseline ranges
+        ok = (rr_min <= rr_mean) & (rr_mean <= rr_max)
+        for c in metrics:
+            x = rr_mean if c == "rr_mean" else np.asarray(table[c], dtype=float)
+            ok &= self._in_range_array(x, mu[c][idx], sd[c][idx], k[idx])
+        return ok
+
+    def _fit_baselines(self, table, records: list[dict], cfg: dict,
+                       cache: Optional[StageCache] = None,
+                       feature_keys: Optional[list[str]] = None) -> dict:
+        """
+        baselines[person][state] for every configured person and state.
+
+        cfg: settings from _dataset_settings(); with a stage cache and the
+        records' feature keys, each group's baseline is memoized.
+        """
+        baselines = {}
+        for pid in cfg["persons"]:
+            baselines[pid] = {}
+            for st in cfg["states"]:
+                sel = self._group_mask(table, records, pid, st)
+                if cache is None:
+                    baselines[pid][st] = self._fit_baseline(table[sel], method=cfg["agg_method"],
+                                                            z_max=cfg["z_max"])
+                else:
+                    keys = [k for k, rec in zip(feature_keys, records)
+                            if rec["person"] == pid and rec["state"] == st]
+                    baselines[pid][st] = self._staged_baseline(cache, table[sel], keys,
+                                                               cfg["agg_method"], cfg["z_max"])
+        return baselines
+
+    def _lofo_baselines(self, table, records: list[dict], cfg: dict) -> list[dict]:
+        """
+        Leave-one-file-out baseline of every record: the _fit_baseline() of
+        the other files of its (person, state).
+
+        For mean_std, per-file counts, sums and sums of squares are gathered
+        in one pass. Each held-out baseline is then the group totals minus the
+        file's own, in O(1) per file. Values are shifted by their group mean
+        first, which keeps the subtraction accurate. Medians and MADs cannot
+        be subtracted, so the robust methods refit on the other files.
+        """
+        metrics = ("rr_mean", "sdnn", "rmssd")
+        rec_idx = np.asarray(table["record"], dtype=np.int64)
+        n_rec = len(records)
+        groups = sorted({(rec["person"], rec["state"]) for rec in records})
+        gid = np.array([groups.index((rec["person"], rec["state"])) for rec in records], dtype=np.int64)
+
+        if cfg["agg_method"] != "mean_std":
+            win_gid = gid[rec_idx]
+            return [
+                self._fit_baseline(table[(win_gid == gid[i]) & (rec_idx != i)],
+                                   method=cfg["agg_method"], z_max=cfg["z_max"])
+                for i in range(n_rec)
+            ]
+
+        out = [{} for _ in range(n_rec)]
+        n_groups = len(groups)
+        for c in metrics:
+            x = np.asarray(table[c], dtype=float)
+            ok = np.isfinite(x)
+            r = rec_idx[ok]
+            x = x[ok]
+
+            # shift by the group mean to limit cancellation in the sum of squares
+            n_g = np.bincount(gid[r], minlength=n_groups).astype(float)
+            shift = np.divide(np.bincount(gid[r], weights=x, minlength=n_groups), n_g,
+                              out=np.zeros(n_groups), where=n_g > 0)
+            d = x - shift[gid[r]]
+
+            n_f = np.bincount(r, minlength=n_rec).astype(float)
+            s_f = np.bincount(r, weights=d, minlength=n_rec)
+            q_f = np.bincount(r, weights=d * d, minlength=n_rec)
+
+            # held-out = group total - own file
+            n = n_g[gid] - n_f
+            s = np.bincount(gid, weights=s_f, minlength=n_groups)[gid] - s_f
+            q = np.bincount(gid, weights=q_f, minlength=n_groups)[gid] - q_f
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(n > 0, shift[gid] + s / n, np.nan)
+                var = np.where(n > 1, np.maximum(q - s * s / n, 0.0) / (n - 1), np.nan)
+
+            for i in range(n_rec):
+                out[i][c] = {"mean": float(mean[i]), "std": float(np.sqrt(var[i]))}
+        return out
+
+    def _evaluate_records(self, table, records: list[dict], baselines: dict,
+                          cfg: dict) -> tuple[np.ndarray, Optional[list[dict]]]:
+        """
+        Pass flags of every window under the configured baseline evaluation.
+
+        Returns:
+            tuple: (pass flags, per-record leave-one-file-out baselines or None
+                for in-sample evaluation against baselines)
+        """
+        record_baselines = None
+        if cfg["baseline_eval"] == "leave_one_file_out":
+            record_baselines = self._lofo_baselines(table, records, cfg)
+        passed = self._evaluate_windows(table, records, baselines, cfg["k_rest"], cfg["k_active"],
+                                        cfg["rr_min"], cfg["rr_max"], record_baselines)
+        return passed, record_baselines
+
+    @staticmethod
+    def _pass_counts(table, records: list[dict], passed: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(n_windows, n_pass) per record from the pass flags of a window table."""
+        rec_idx = np.asarray(table["record"], dtype=np.int64)
+        n_win = np.bincount(rec_idx, minlength=len(records)).astype(np.int64)
+        n_pass = np.bincount(rec_idx, weights=passed, minlength=len(records)).astype(np.int64)
+        return n_win, n_pass
+
+    def _pass_rates_frame(self, records: list[dict], n_win: np.ndarray, n_pass: np.ndarray,
+                          bootstrap: Optional[dict] = None) -> pd.DataFrame:
+        """
+        pass_rates.csv rows (one per record), sorted by person, state, pass_rate.
+
+        With bootstrap settings (n_boot, level, seed), percentile confidence
+        intervals of the file and (person, state) pass rates are added.
+        """
+        n_win = np.asarray(n_win, dtype=np.int64)
+        n_pass = np.asarray(n_pass, dtype=np.int64)
+        pass_rate = np.divide(n_pass, n_win, out=np.zeros(len(n_win)), where=n_win > 0)
+        df = pd.DataFrame({
+            "person": [rec["person"] for rec in records],
+            "state": [rec["state"] for rec in records],
+            "file": [str(rec["path"]) for rec in records],
+            "pass_rate": pass_rate,
+            "n_windows": n_win,
+            "n_pass": n_pass,
+        })
+        if bootstrap is not None:
+            ci = bootstrap_pass_rates(n_win, n_pass, [(rec["person"], rec["state"]) for rec in records],
+                                      **bootstrap)
+            df["pass_rate_ci_low"] = ci["ci_low"]
+            df["pass_rate_ci_high"] = ci["ci_high"]
+            df["group_pass_rate"] = ci["group_pass_rate"]
+            df["group_ci_low"] = ci["group_ci_low"]
+            df["group_ci_high"] = ci["group_ci_high"]
+        return df.sort_values(["person", "state", "pass_rate"])
+
+    @staticmethod
+    def _detail_filename(rec: dict) -> str:
+        """File name of the per-file detail JSON of a record."""
+        return f"{rec['person']}__{rec['state']}__{Path(rec['path']).stem}.json"
+
+    def _file_detail(self, rec: dict, windows, passed: np.ndarray, cfg: dict,
+                     baseline: Optional[dict] = None) -> dict:
+        """
+        Per-file detail JSON content, serialized column-wise from the window table.
+
+        windows: rows of the window table (WindowStore) belonging to rec;
+                 passed: their pass flags
+        cfg: settings from _dataset_settings()
+        baseline: the record's own (leave-one-file-out) baseline, if any
+        """
+        fs = cfg["fs"]
+        st = rec["state"]
+        k = cfg["k_rest"] if st.lower() == "rest".lower() else cfg["k_active"]
+        passed = np.asarray(passed, dtype=bool)
+        n_win = len(windows)
+        n_pass = int(passed.sum())
+
+        win_details = [
+            {
+                "start_sec": s / fs,
+                "end_sec": e / fs,
+                "pass": bool(ok),
+                "rr_mean": rr,
+                "sdnn": sdnn,
+                "rmssd": rmssd,
+            }
+            for s, e, ok, rr, sdnn, rmssd in zip(
+                windows["start"].tolist(), windows["end"].tolist(), passed.tolist(),
+                [float(np.mean(windows.rr(i))) for i in range(n_win)],
+                windows["sdnn"].tolist(), windows["rmssd"].tolist(),
+            )
+        ]
+
+        return {
+            "person": rec["person"],
+            "state": st,
+            "file": str(rec["path"]),
+            "k_used": k,
+            "window_size_sec": cfg["win_sec"],
+            "overlap": cfg["overlap"],
+            "n_windows": n_win,
+            "n_pass": n_pass,
+            "pass_rate": (n_pass / n_win) if n_win > 0 else 0.0,
+            **({"baseline_eval": cfg["baseline_eval"], "baseline": baseline} if baseline is not None else {}),
+            "windows": win_details,
+        }
+
+    def _dataset_settings(self, config: dict) -> dict:
+        """
+        Parse the dataset-run settings of config.yaml (paths resolved against
+        the repo root, output directory created).
+        """
         dataset_cfg = config.get("dataset")
 
         if dataset_cfg is None:
@@ -183,6 +790,8 @@ class HRVAnalysisOrchestrator:
         fs = int(config["signal"]["sampling_rate"])
         filter_low = float(config["signal"].get("bandpass_low", 0.5))
         filter_high = float(config["signal"].get("bandpass_high", 20.0))
+        # float32 halves the signal memory through loading, filtering and peak detection
+        dtype = signal_dtype(config["signal"].get("dtype", "float64")).name
 
         win_sec = float(config["features"].get("window_size_sec", 60))
         overlap = float(config["features"].get("overlap", 0.5))
@@ -191,16 +800,102 @@ class HRVAnalysisOrchestrator:
 
         rr_min = float(config["r_peak"].get("min_rr_sec", 0.3))
         rr_max = float(config["r_peak"].get("max_rr_sec", 2.0))
+        detection_fs = config["r_peak"].get("detection_fs")
+        detection_fs = float(detection_fs) if detection_fs else None
 
         k_rest = float(config.get("baseline", {}).get("k_rest", 2.5))
         k_active = float(config.get("baseline", {}).get("k_active", 2.0))
 
+        # baseline aggregation: mean_std (default) | robust (median/MAD) | median_iqr
+        agg_cfg = config.get("baseline", {}).get("aggregation", {}) or {}
+        agg_method = agg_cfg.get("method", "mean_std")
+        outlier_cfg = agg_cfg.get("outlier_policy", {}) or {}
+        z_max = None
+        if agg_method == "robust" and outlier_cfg.get("enabled", False):
+            z_max = float(outlier_cfg.get("z_max", 3.5))
+
+        # in_sample: every file against its group's baseline (its own windows
+        # included); leave_one_file_out: against a baseline of the other files
+        baseline_eval = config.get("baseline", {}).get("evaluation", "in_sample") or "in_sample"
+        if baseline_eval == "lofo":
+            baseline_eval = "leave_one_file_out"
+        if baseline_eval not in ("in_sample", "leave_one_file_out"):
+            raise ValueError(f"Unknown baseline.evaluation '{baseline_eval}'")
+
+        # bootstrap confidence intervals of the pass rates (off when absent)
+        bootstrap = None
+        boot_cfg = config.get("baseline", {}).get("bootstrap", {}) or {}
+        if boot_cfg.get("enabled", False):
+            bootstrap = {
+                "n_boot": int(boot_cfg.get("n_boot", 1000)),
+                "level": float(boot_cfg.get("level", 0.95)),
+                "seed": int(boot_cfg.get("seed", 0)),
+            }
+            if bootstrap["n_boot"] < 1 or not 0.0 < bootstrap["level"] < 1.0:
+                raise ValueError("baseline.bootstrap needs n_boot >= 1 and 0 < level < 1")
+
         outdir = Path(config.get("output", {}).get("dir", "reports"))
+        feature_store = bool(config.get("output", {}).get("feature_store", True))
         if not outdir.is_absolute():
             repo_root = Path(__file__).resolve().parent.parent
             outdir = (repo_root / outdir).resolve()
         outdir.mkdir(parents=True, exist_ok=True)
 
+        # out-of-core mode: memory-mapped recordings processed in window blocks
+        ooc = None
+        ooc_cfg = config.get("processing", {}).get("out_of_core", {})
+        if ooc_cfg.get("enabled", False):
+            cache_dir = Path(ooc_cfg.get("cache_dir") or (outdir / "cache"))
+            if not cache_dir.is_absolute():
+                repo_root = Path(__file__).resolve().parent.parent
+                cache_dir = (repo_root / cache_dir).resolve()
+            ooc = {
+                "cache_dir": cache_dir,
+                "block_windows": int(ooc_cfg.get("block_windows", 64)),
+            }
+
+        # intra-file parallelism: window chunks on a process pool (1 = serial)
+        proc_cfg = config.get("processing", {}) or {}
+        workers = int(proc_cfg.get("workers", 1) or 1)
+        chunk_windows = int(proc_cfg.get("chunk_windows", 16))
+
+        # memoized stages: outputs cached under hashes of their inputs and config
+        stage_cache = None
+        stage_cfg = proc_cfg.get("stage_cache", {}) or {}
+        if stage_cfg.get("enabled", False):
+            stage_dir = Path(stage_cfg.get("dir") or (outdir / "stages"))
+            if not stage_dir.is_absolute():
+                repo_root = Path(__file__).resolve().parent.parent
+                stage_dir = (repo_root / stage_dir).resolve()
+            stage_cache = {"dir": stage_dir}
+
+        # progress/throughput reporting (log + <outdir>/progress.json)
+        progress_cfg = proc_cfg.get("progress", {}) or {}
+        progress = {
+            "enabled": bool(progress_cfg.get("enabled", True)),
+            "interval_sec": float(progress_cfg.get("interval_sec", 2.0)),
+        }
+
+        return {
+            "data_dir": data_dir, "persons_cfg": persons_cfg, "persons": persons, "states": states,
+            "fs": fs, "filter_low": filter_low, "filter_high": filter_high, "dtype": dtype,
+            "win_sec": win_sec, "overlap": overlap, "win": win, "stride": stride,
+            "rr_min": rr_min, "rr_max": rr_max, "detection_fs": detection_fs,
+            "k_rest": k_rest, "k_active": k_active, "agg_method": agg_method, "z_max": z_max,
+            "baseline_eval": baseline_eval, "bootstrap": bootstrap,
+            "outdir": outdir, "ooc": ooc, "workers": workers, "chunk_windows": chunk_windows,
+            "stage_cache": stage_cache, "progress": progress, "feature_store": feature_store,
+        }
+
+    def run_dataset(self, config: dict) -> dict:
+        # ---- config ----
+        cfg = self._dataset_settings(config)
+        data_dir, persons_cfg = cfg["data_dir"], cfg["persons_cfg"]
+        fs, win, stride = cfg["fs"], cfg["win"], cfg["stride"]
+        filter_low, filter_high, detection_fs = cfg["filter_low"], cfg["filter_high"], cfg["detection_fs"]
+        outdir, ooc = cfg["outdir"], cfg["ooc"]
+        workers, chunk_windows = cfg["workers"], cfg["chunk_windows"]
+
         # ---- scan files ----
         records = self._scan_dataset_from_config(data_dir, persons_cfg)
 
@@ -208,23 +903,20 @@ class HRVAnalysisOrchestrator:
             raise RuntimeError(f"No CSV files found under {data_dir} using dataset config")
 
 
-        # ---- 1) Build baselines per person/state ----
-        baselines = {}  # baselines[person][state] = baseline dict
-        for pid in persons:
-            baselines[pid] = {}
-            for st in states:
-                # collect windows from all files of that person/state
-                win_rows = []
-                for rec in records:
-                    if rec["person"] != pid or rec["state"] != st:
-                        continue
-                    sig = read_ecg_csv_column(rec["path"]) # Updated call
-                    for s, e in self._window_slices(len(sig), win, stride):
-                        m = self._window_metrics(sig[s:e], fs, filter_low, filter_high)
-                        if m is not None:
-                            win_rows.append(m)
-
-                baselines[pid][st] = self._fit_baseline(win_rows)
+        # ---- 1) Window metrics of every file, computed once ----
+        progress = ProgressReporter(records, outdir, cfg["progress"]["interval_sec"],
+                                    enabled=cfg["progress"]["enabled"])
+        cache = StageCache(cfg["stage_cache"]["dir"]) if cfg["stage_cache"] else None
+        feature_keys = None
+        if cache is None:
+            table = self._window_table(records, fs, win, stride, filter_low, filter_high, detection_fs, ooc,
+                                       workers, chunk_windows, progress, cfg["dtype"])
+        else:
+            table, feature_keys = self._staged_window_table(records, cfg, cache, progress)
+        progress.close()
+
+        # ---- 2) Build baselines per person/state ----
+        baselines = self._fit_baselines(table, records, cfg, cache, feature_keys)
 
         # ---- save baselines ----
         (outdir / "baselines.json").write_text(
@@ -232,71 +924,37 @@ class HRVAnalysisOrchestrator:
             encoding="utf-8"
         )
 
-        # ---- 2) Evaluate each file against its own (person,state) baseline ----
-        rows = []
-        per_file_dir = outdir / "per_file"
-        per_file_dir.mkdir(exist_ok=True)
+        # ---- 3) Evaluate all windows against their own (person,state) baseline ----
+        passed, record_baselines = self._evaluate_records(table, records, baselines, cfg)
+        n_win, n_pass = self._pass_counts(table, records, passed)
 
-        for rec in records:
-            pid, st, fpath = rec["person"], rec["state"], rec["path"]
-            base = baselines[pid][st]
-            k = k_rest if st.lower() == "rest".lower() else k_active
+        # ---- save pass_rates.csv ----
+        df = self._pass_rates_frame(records, n_win, n_pass, cfg["bootstrap"])
+        df.to_csv(outdir / "pass_rates.csv", index=False, encoding="utf-8-sig")
 
-            sig = read_ecg_csv_column(fpath) # Updated call
+        # ---- per-window feature time series (read by the plotting scripts) ----
+        if cfg["feature_store"]:
+            write_feature_store(outdir / FEATURE_STORE_NAME, table, records, passed, fs, win, stride)
 
-            n_win = 0
-            n_pass = 0
-            win_details = []
+        # ---- dataset-wide aggregates (read by the overall report) ----
+        write_dataset_summary(outdir / DATASET_SUMMARY_NAME, aggregate_dataset(table, records, passed),
+                              window_sec=cfg["win_sec"], overlap=cfg["overlap"])
 
-            for s, e in self._window_slices(len(sig), win, stride):
-                m = self._window_metrics(sig[s:e], fs, filter_low, filter_high)
-                if m is None:
-                    continue
-                n_win += 1
-                ok = self._window_pass(m, base, k=k, rr_min=rr_min, rr_max=rr_max)
-                n_pass += int(ok)
-
-                win_details.append({
-                    "start_sec": s / fs,
-                    "end_sec": e / fs,
-                    "pass": bool(ok),
-                    "rr_mean": float(np.mean(m["rr"])),
-                    "sdnn": m["sdnn"],
-                    "rmssd": m["rmssd"],
-                })
-
-            pass_rate = (n_pass / n_win) if n_win > 0 else 0.0
-
-            rows.append({
-                "person": pid,
-                "state": st,
-                "file": str(fpath),
-                "pass_rate": pass_rate,
-                "n_windows": n_win,
-                "n_pass": n_pass
-            })
-
-            # per-file detail json (optional but useful)
-            detail = {
-                "person": pid,
-                "state": st,
-                "file": str(fpath),
-                "k_used": k,
-                "window_size_sec": win_sec,
-                "overlap": overlap,
-                "n_windows": n_win,
-                "n_pass": n_pass,
-                "pass_rate": pass_rate,
-                "windows": win_details,
-            }
-            (per_file_dir / f"{pid}__{st}__{Path(fpath).stem}.json").write_text(
+        # ---- per-file detail json (optional but useful) ----
+        per_file_dir = outdir / "per_file"
+        per_file_dir.mkdir(exist_ok=True)
+
+        offsets = np.concatenate(([0], np.cumsum(n_win)))
+        for i, rec in enumerate(records):
+            rows = slice(offsets[i], offsets[i + 1])
+            detail = self._file_detail(rec, table[rows], passed[rows], cfg,
+                                       record_baselines[i] if record_baselines else None)
+            (per_file_dir / self._detail_filename(rec)).write_text(
                 json.dumps(detail, ensure_ascii=False, indent=2),
                 encoding="utf-8"
             )
 
-        # ---- save pass_rates.csv ----
-        import pandas as pd
-        df = pd.DataFrame(rows).sort_values(["person", "state", "pass_rate"])
-        df.to_csv(outdir / "pass_rates.csv", index=False, encoding="utf-8-sig")
-
-        return {"status": "success", "outdir": str(outdir), "n_files": len(rows)}
\ No newline at end of file
+        result = {"status": "success", "outdir": str(outdir), "n_files": len(records)}
+        if cache is not None:
+            result["stages"] = cache.stats
+        return result
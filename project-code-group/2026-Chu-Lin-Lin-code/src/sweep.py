@@ -0,0 +1,232 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Parameter sweeps over the dataset evaluation.
+
+A sweep takes a grid over dotted config keys (e.g. features.window_size_sec,
+signal.bandpass_high, r_peak.min_rr_sec) and evaluates every combination.
+Configurations are scheduled so that shared upstream work is reused:
+
+- Every recording is parsed once (the load stage) for the whole sweep.
+- Combinations that differ only in evaluation keys (DOWNSTREAM_KEYS) share
+  one filtered/peak-detected window table. Only the cheap baseline and
+  pass/fail evaluation run per combination.
+- All intermediate results go through the memoized stage cache
+  (src/tools/stage_cache.py), so a repeated or extended sweep recomputes only
+  the new upstream settings.
+
+Windows are filtered one by one, so different window sizes or overlaps need
+their own filtered windows. They share only the loaded signal.
+"""
+
+import copy
+import itertools
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .orchestrator import HRVAnalysisOrchestrator
+from .tools.stage_cache import StageCache
+
+
+logger = logging.getLogger("hrv_agent.sweep")
+
+# keys that only change baseline fitting and evaluation, not the signal chain
+DOWNSTREAM_KEYS = (
+    "r_peak.min_rr_sec",
+    "r_peak.max_rr_sec",
+    "baseline.k_rest",
+    "baseline.k_active",
+    "baseline.aggregation.method",
+    "baseline.evaluation",
+)
+
+PER_RECORD_STAGES = ("load", "filter", "peaks", "rr", "features")
+
+
+def expand_grid(grid: dict[str, list]) -> list[dict]:
+    """
+    All combinations of a parameter grid, in grid order.
+
+    Args:
+        grid: Mapping of dotted config key -> list of values.
+
+    Returns:
+        list: One {key: value} dict per combination.
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def apply_params(config: dict, params: dict[str, Any]) -> dict:
+    """
+    Copy of config with dotted keys set (missing sections are created).
+
+    Args:
+        config: Loaded config.yaml.
+        params: Mapping of dotted key (e.g. 'signal.bandpass_high') -> value.
+
+    Returns:
+        dict: Updated deep copy of config.
+    """
+    out = copy.deepcopy(config)
+    for key, value in params.items():
+        node = out
+        *parents, leaf = key.split(".")
+        for part in parents:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        node[leaf] = value
+    return out
+
+
+def _sweep_config(config: dict, params: dict, cache_dir: Path, outdir: Path) -> dict:
+    """Config for one sweep run: staged, serial, no progress file."""
+    cfg = apply_params(config, params)
+    processing = cfg.setdefault("processing", {})
+    processing["stage_cache"] = {"enabled": True, "dir": str(cache_dir)}
+    processing["workers"] = 1
+    processing["progress"] = {"enabled": False}
+    cfg["output"] = {**cfg.get("output", {}), "dir": str(outdir)}
+    return cfg
+
+
+def _load_task(config: dict, rec: dict) -> None:
+    """Worker task: fill the load stage of one record."""
+    orchestrator = HRVAnalysisOrchestrator()
+    cfg = orchestrator._dataset_settings(config)
+    orchestrator._load_stage(rec, cfg, StageCache(cfg["stage_cache"]["dir"]))
+
+
+def _run_group(config: dict, upstream: dict, variants: list[tuple[int, dict]]) -> list[dict]:
+    """
+    Worker task: one window table for an upstream setting, evaluated for
+    every (config id, downstream params) variant.
+    """
+    orchestrator = HRVAnalysisOrchestrator()
+    cfg = orchestrator._dataset_settings(config)
+    records = orchestrator._scan_dataset_from_config(cfg["data_dir"], cfg["persons_cfg"])
+    cache = StageCache(cfg["stage_cache"]["dir"])
+
+    t0 = time.perf_counter()
+    table, feature_keys = orchestrator._staged_window_table(records, cfg, cache)
+    upstream_sec = time.perf_counter() - t0
+    built = sum(cache.stats.get(s, {}).get("miss", 0) for s in PER_RECORD_STAGES)
+    reused = sum(cache.stats.get(s, {}).get("hit", 0) for s in PER_RECORD_STAGES)
+
+    rows = []
+    for config_id, params in variants:
+        t1 = time.perf_counter()
+        vcfg = orchestrator._dataset_settings(apply_params(config, params))
+        baselines = orchestrator._fit_baselines(table, records, vcfg, cache, feature_keys)
+        passed, _ = orchestrator._evaluate_records(table, records, baselines, vcfg)
+        n_win, n_pass = orchestrator._pass_counts(table, records, passed)
+        summary = _summarize(orchestrator._pass_rates_frame(records, n_win, n_pass), vcfg["states"])
+        eval_sec = time.perf_counter() - t1
+
+        rows.append({
+            "config_id": config_id,
+            **upstream,
+            **params,
+            **summary,
+            "upstream_sec": upstream_sec,
+            "shared_by": len(variants),
+            "eval_sec": eval_sec,
+            "total_sec": upstream_sec / len(variants) + eval_sec,
+            "stages_built": built,
+            "stages_reused": reused,
+        })
+    return rows
+
+
+def _summarize(pass_rates: pd.DataFrame, states: list[str]) -> dict:
+    """Mean file pass rate per state plus pooled window counts."""
+    n_win = int(pass_rates["n_windows"].sum())
+    n_pass = int(pass_rates["n_pass"].sum())
+    out = {"n_files": int(len(pass_rates)), "n_windows": n_win, "n_pass": n_pass,
+           "pass_rate": n_pass / n_win if n_win else 0.0}
+    for st in states:
+        rates = pass_rates.loc[pass_rates["state"] == st, "pass_rate"]
+        out[f"pass_rate_{st.lower()}"] = float(rates.mean()) if len(rates) else np.nan
+    return out
+
+
+def run_sweep(config: dict, grid: dict[str, list], workers: int = 1,
+              outdir: Optional[Path] = None, cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Evaluate every combination of a parameter grid.
+
+    Args:
+        config: Loaded config.yaml (dataset, signal, features, ...).
+        grid: Mapping of dotted config key -> list of values.
+        workers: Process-pool size; upstream settings run in parallel.
+        outdir: Where sweep_results.csv is written (default: <output.dir>/sweep).
+        cache_dir: Stage cache shared by all runs (default: <outdir>/stages).
+
+    Returns:
+        pd.DataFrame: One row per combination, in grid order. Holds the
+            grid values, pass rates (pooled and mean per state), window
+            counts and timings:
+            - upstream_sec: time to build or load the shared window table
+            - shared_by: number of combinations sharing that table
+            - eval_sec: baseline fitting and evaluation time
+            - total_sec: eval_sec plus this combination's share of upstream_sec
+            - stages_built / stages_reused: per-record stage misses / hits
+
+    Raises:
+        ValueError: If the grid is empty or a key has no values.
+    """
+    if not grid or any(len(v) == 0 for v in grid.values()):
+        raise ValueError("Sweep grid must map each key to a non-empty list of values")
+
+    orchestrator = HRVAnalysisOrchestrator()
+    base_out = orchestrator._dataset_settings(config)["outdir"]
+    outdir = Path(outdir) if outdir is not None else base_out / "sweep"
+    outdir.mkdir(parents=True, exist_ok=True)
+    cache_dir = Path(cache_dir) if cache_dir is not None else outdir / "stages"
+
+    # group combinations by their upstream parameters
+    groups: dict[str, tuple[dict, list]] = {}
+    for config_id, params in enumerate(expand_grid(grid)):
+        upstream = {k: v for k, v in params.items() if k not in DOWNSTREAM_KEYS}
+        downstream = {k: v for k, v in params.items() if k in DOWNSTREAM_KEYS}
+        tag = json.dumps(upstream, sort_keys=True, default=str)
+        groups.setdefault(tag, (upstream, []))[1].append((config_id, downstream))
+
+    jobs = []
+    for upstream, variants in groups.values():
+        group_cfg = _sweep_config(config, upstream, cache_dir, outdir)
+        jobs.append((group_cfg, upstream, variants))
+    n_configs = sum(len(v) for _, _, v in jobs)
+    logger.info(f"Sweep: {n_configs} configurations in {len(jobs)} upstream groups, workers={workers}")
+
+    # parse every recording once, before the groups that share it start
+    first_cfg = jobs[0][0]
+    settings = orchestrator._dataset_settings(first_cfg)
+    records = orchestrator._scan_dataset_from_config(settings["data_dir"], settings["persons_cfg"])
+    if not records:
+        raise RuntimeError(f"No CSV files found under {settings['data_dir']} using dataset config")
+
+    rows = []
+    if workers <= 1:
+        for rec in records:
+            _load_task(first_cfg, rec)
+        for job in jobs:
+            rows.extend(_run_group(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_load_task, [first_cfg] * len(records), records))
+            futures = [pool.submit(_run_group, *job) for job in jobs]
+            for fut in futures:
+                rows.extend(fut.result())
+
+    results = pd.DataFrame(rows).sort_values("config_id").reset_index(drop=True)
+    results.to_csv(outdir / "sweep_results.csv", index=False)
+    logger.info(f"Sweep results: {outdir / 'sweep_results.csv'}")
+    return results
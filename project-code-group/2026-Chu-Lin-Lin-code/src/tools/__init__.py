@@ -3,24 +3,46 @@
 
 from .ecg_loader import (
     load_ecg,
+    load_wesad_channels,
     read_ecg_csv_column,
     pick_ecg_column,
     pick_time_column,
 )
-from .signal_processor import process_signal, bandpass_filter, detect_r_peaks
+from .signal_processor import (
+    process_signal,
+    bandpass_filter,
+    classify_rr_artifacts,
+    correct_rr_artifacts,
+    ARTIFACT_LABELS,
+    detect_r_peaks,
+    detect_r_peaks_multirate,
+    fuse_r_peaks,
+    process_signal_batch,
+    qrs_energy,
+    signal_dtype,
+)
 
 from .extended_features import (
     extract_extended_features,
     FEATURE_NAMES,
     FEATURE_DESCRIPTIONS,
     FEATURE_CATEGORIES,
+    OPTIONAL_CATEGORIES,
+    OPTIONAL_FEATURE_NAMES,
 )
 
-from .report_generator import generate_report, generate_interpretation
+from .feature_store import read_feature_index, read_feature_series
+
+from .aggregates import DatasetAggregates, aggregate_dataset
+
+from .annotations import AnnotationStore, detector_params
+
+from .report_generator import generate_report, generate_interpretation, generate_dataset_report
 
 __all__ = [
     # Data loading
     "load_ecg",
+    "load_wesad_channels",
     "read_ecg_csv_column",
     "pick_ecg_column",
     "pick_time_column",
@@ -28,14 +50,37 @@ __all__ = [
     "process_signal",
     "bandpass_filter",
     "detect_r_peaks",
+    "detect_r_peaks_multirate",
+    "fuse_r_peaks",
+    "process_signal_batch",
+    "qrs_energy",
+    "signal_dtype",
+    "classify_rr_artifacts",
+    "correct_rr_artifacts",
+    "ARTIFACT_LABELS",
 
     # Feature extraction (extended - 20 features)
     "extract_extended_features",
     "FEATURE_NAMES",
     "FEATURE_DESCRIPTIONS",
     "FEATURE_CATEGORIES",
+    "OPTIONAL_CATEGORIES",
+    "OPTIONAL_FEATURE_NAMES",
+
+    # Per-window feature store
+    "read_feature_index",
+    "read_feature_series",
+
+    # Dataset-wide aggregates
+    "DatasetAggregates",
+    "aggregate_dataset",
+
+    # Stored R-peak annotations
+    "AnnotationStore",
+    "detector_params",
 
     # Report generation
     "generate_report",
     "generate_interpretation",
+    "generate_dataset_report",
 ]
@@ -0,0 +1,250 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Single-pass, mergeable dataset aggregates for the overall report.
+
+DatasetAggregates sees every analysed window exactly once (one update() per
+recording, after pass/fail evaluation) and keeps, per (person, state):
+
+- window and file counts, passing windows, and a histogram of file pass rates
+- per-feature running moments (count, mean, M2; merged with Chan's
+  parallel update) and a t-digest for quantiles
+- pooled HRV sums over the RR intervals of all windows: sum and sum of
+  squares of RR, squared successive differences within windows, NN50 count
+
+Memory depends on the number of groups and features, not on the dataset
+size. Aggregates of separate runs or workers can be merged, and the overall
+row is the merge of all groups.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from .sketches import TDigest
+from .window_store import FEATURE_COLUMNS, WindowStore, _slice_indices
+
+
+# file pass-rate histogram: 10 bins over [0, 1]
+PASS_RATE_EDGES = np.linspace(0.0, 1.0, 11)
+
+# quantiles reported for every feature
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def _empty_group(compression: float) -> dict:
+    return {
+        "n_files": 0,
+        "n_windows": 0,
+        "n_pass": 0,
+        "file_rate_counts": np.zeros(len(PASS_RATE_EDGES) - 1, dtype=np.int64),
+        # per feature: [count, mean, M2]
+        "moments": np.zeros((len(FEATURE_COLUMNS), 3)),
+        "digests": [TDigest(compression) for _ in FEATURE_COLUMNS],
+        # RR (ms): count, sum, sum of squares; successive diffs: count, sum of squares, > 50 ms
+        "rr": np.zeros(3),
+        "diff": np.zeros(3),
+    }
+
+
+def _merge_moments(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Chan et al. parallel merge of [count, mean, M2] rows."""
+    n = a[:, 0] + b[:, 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = b[:, 1] - a[:, 1]
+        mean = np.where(n > 0, a[:, 1] + delta * b[:, 0] / n, 0.0)
+        m2 = np.where(n > 0, a[:, 2] + b[:, 2] + delta ** 2 * a[:, 0] * b[:, 0] / n, 0.0)
+    return np.column_stack([n, mean, m2])
+
+
+def _merge_group(into: dict, other: dict) -> None:
+    for key in ("n_files", "n_windows", "n_pass"):
+        into[key] += other[key]
+    into["file_rate_counts"] = into["file_rate_counts"] + other["file_rate_counts"]
+    into["moments"] = _merge_moments(into["moments"], other["moments"])
+    for d, o in zip(into["digests"], other["digests"]):
+        d.merge(o)
+    into["rr"] = into["rr"] + other["rr"]
+    into["diff"] = into["diff"] + other["diff"]
+
+
+def _finite(x: float) -> Optional[float]:
+    return float(x) if np.isfinite(x) else None
+
+
+class DatasetAggregates:
+    """
+    Streaming per-(person, state) aggregates of window features and pass rates.
+
+    Args:
+        compression: t-digest compression of the feature quantiles.
+    """
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = float(compression)
+        self.groups: dict[tuple[str, str], dict] = {}
+
+    def _group(self, person: str, state: str) -> dict:
+        key = (person, state)
+        if key not in self.groups:
+            self.groups[key] = _empty_group(self.compression)
+        return self.groups[key]
+
+    def update(self, person: str, state: str, windows: WindowStore, passed: np.ndarray) -> "DatasetAggregates":
+        """
+        Add the windows of one recording.
+
+        Args:
+            person: Person id.
+            state: State (e.g. Rest, Active).
+            windows: Window table rows of the recording (with features).
+            passed: Pass/fail flag of each row.
+
+        Returns:
+            DatasetAggregates: self, for chaining.
+        """
+        g = self._group(person, state)
+        passed = np.asarray(passed, dtype=bool)
+        n = len(windows)
+        g["n_files"] += 1
+        g["n_windows"] += n
+        g["n_pass"] += int(passed.sum())
+        if n:
+            b = min(np.searchsorted(PASS_RATE_EDGES, passed.mean(), side="right") - 1, len(PASS_RATE_EDGES) - 2)
+            g["file_rate_counts"][b] += 1
+
+        feats = windows.features
+        ok = np.isfinite(feats)
+        cnt = ok.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(cnt > 0, np.where(ok, feats, 0.0).sum(axis=0) / cnt, 0.0)
+            m2 = np.where(ok, (feats - mean) ** 2, 0.0).sum(axis=0)
+        g["moments"] = _merge_moments(g["moments"], np.column_stack([cnt, mean, m2]))
+        for j, d in enumerate(g["digests"]):
+            d.update(feats[ok[:, j], j])
+
+        counts = np.asarray(windows["rr_count"], dtype=np.int64)
+        rr = windows.rr_buffer[_slice_indices(windows["rr_offset"], counts)]
+        if rr.size:
+            if np.nanmean(rr) <= 10:   # sec -> ms
+                rr = rr * 1000.0
+            g["rr"] += [rr.size, rr.sum(), np.square(rr).sum()]
+            # successive differences within a window only, not across window boundaries
+            window_of = np.repeat(np.arange(len(counts)), counts)
+            d = np.diff(rr)[window_of[1:] == window_of[:-1]]
+            g["diff"] += [d.size, np.square(d).sum(), np.count_nonzero(np.abs(d) > 50.0)]
+        return self
+
+    def merge(self, other: "DatasetAggregates") -> "DatasetAggregates":
+        """Fold another aggregate (e.g. from another worker) into this one."""
+        for key, g in other.groups.items():
+            _merge_group(self._group(*key), g)
+        return self
+
+    # ------------------------------------------------------------------
+    # summary
+    # ------------------------------------------------------------------
+    def _summarize_group(self, g: dict) -> dict:
+        n, mean, m2 = g["moments"].T
+        features = {}
+        for j, name in enumerate(FEATURE_COLUMNS):
+            stats = {
+                "n": int(n[j]),
+                "mean": _finite(mean[j]) if n[j] else None,
+                "std": _finite(np.sqrt(m2[j] / (n[j] - 1))) if n[j] > 1 else None,
+            }
+            for q in SUMMARY_QUANTILES:
+                stats[f"q{int(round(q * 100)):02d}"] = _finite(g["digests"][j].quantile(q)) if n[j] else None
+            features[name] = stats
+
+        rr_n, rr_sum, rr_sq = g["rr"]
+        d_n, d_sq, nn50 = g["diff"]
+        mean_rr = rr_sum / rr_n if rr_n else np.nan
+        pooled = {
+            "n_rr": int(rr_n),
+            "mean_rr_ms": _finite(mean_rr),
+            "sdnn_ms": _finite(np.sqrt(max(rr_sq - rr_n * mean_rr ** 2, 0.0) / (rr_n - 1))) if rr_n > 1 else None,
+            "rmssd_ms": _finite(np.sqrt(d_sq / d_n)) if d_n else None,
+            "pnn50": _finite(100.0 * nn50 / d_n) if d_n else None,
+            "mean_hr_bpm": _finite(60000.0 / mean_rr) if rr_n else None,
+        }
+        return {
+            "n_files": g["n_files"],
+            "n_windows": g["n_windows"],
+            "n_pass": g["n_pass"],
+            "pass_rate": g["n_pass"] / g["n_windows"] if g["n_windows"] else None,
+            "file_pass_rate_hist": {"edges": PASS_RATE_EDGES.tolist(), "counts": g["file_rate_counts"].tolist()},
+            "features": features,
+            "pooled_hrv": pooled,
+        }
+
+    def summary(self) -> dict:
+        """
+        JSON-compatible summary.
+
+        Returns:
+            dict: 'groups' (one entry per (person, state) with person, state,
+                counts, pooled pass_rate, file_pass_rate_hist, features
+                {name: n/mean/std/q05..q95} and pooled_hrv), 'states' (the
+                same per state, over all persons) and 'overall' (all groups).
+        """
+        groups = []
+        by_state: dict[str, dict] = {}
+        overall = _empty_group(self.compression)
+        for (person, state), g in self.groups.items():
+            groups.append({"person": person, "state": state, **self._summarize_group(g)})
+            _merge_group(by_state.setdefault(state, _empty_group(self.compression)), g)
+            _merge_group(overall, g)
+        return {
+            "groups": groups,
+            "states": [{"state": st, **self._summarize_group(g)} for st, g in by_state.items()],
+            "overall": self._summarize_group(overall),
+        }
+
+
+DATASET_SUMMARY_NAME = "dataset_summary.json"
+
+
+def aggregate_dataset(table: WindowStore, records: Sequence[dict], passed: np.ndarray,
+                      compression: float = 100.0) -> DatasetAggregates:
+    """
+    Aggregates of a dataset run, in one pass over its window table.
+
+    Args:
+        table: Window table of all records (WindowStore with features).
+        records: Records the table's 'record' column indexes (person, state).
+        passed: Pass/fail flag of every table row.
+        compression: t-digest compression of the feature quantiles.
+
+    Returns:
+        DatasetAggregates: One update() per record, in records order.
+    """
+    rec_idx = np.asarray(table["record"], dtype=np.int64)
+    order = np.argsort(rec_idx, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(rec_idx, minlength=len(records)))))
+    passed = np.asarray(passed, dtype=bool)
+
+    agg = DatasetAggregates(compression)
+    for i, rec in enumerate(records):
+        rows = order[bounds[i]:bounds[i + 1]]
+        agg.update(rec["person"], rec["state"], table[rows], passed[rows])
+    return agg
+
+
+def write_dataset_summary(path: Union[str, Path], aggregates: DatasetAggregates, **meta) -> dict:
+    """
+    Write aggregates.summary() (plus run metadata such as window_sec) as JSON.
+
+    The file is written to a temporary name and moved into place.
+
+    Returns:
+        dict: The summary that was written.
+    """
+    path = Path(path)
+    summary = {**meta, **aggregates.summary()}
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return summary
@@ -0,0 +1,254 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Persisted per-recording R-peak annotations.
+
+R-peak detection over a whole recording (band-pass filter, QRS detection,
+RR intervals, ectopic-beat cleaning) is done once per recording and detector
+setting and stored as a small binary file. The R-peaks are int32 sample
+indices (int64 for very long recordings), the clean RR intervals are
+float64 ms, and the file is a compressed .npz. Each file is keyed by the
+SHA-256 of the recording's content (and the ECG column read from it) plus
+the detector parameters. A copied or touched file with the same bytes
+reuses its annotations; an edited file, or a change to any detector
+setting, gets new ones.
+
+Files live under <root>/annotations/<key>.npz and are written through
+StageCache, so an interrupted run never leaves a partial file.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from .ecg_loader import read_ecg_csv_column
+from .signal_processor import (
+    bandpass_filter,
+    compute_rr_intervals,
+    correct_rr_artifacts,
+    detect_r_peaks,
+    detect_r_peaks_multirate,
+    remove_ectopic_beats,
+    signal_dtype,
+)
+from .stage_cache import StageCache, stage_key
+
+
+ANNOTATION_STAGE = "annotations"
+
+# detector parameters that make up an annotation key (with their defaults)
+DETECTOR_DEFAULTS = {
+    "sampling_rate": None,
+    "bandpass_low": 0.5,
+    "bandpass_high": 20.0,
+    "filter_order": 4,
+    "min_rr_sec": 0.3,
+    "max_rr_sec": 2.0,
+    "detection_fs": None,
+    "remove_ectopic": True,
+    "correct_artifacts": False,
+    "dtype": "float64",
+}
+
+
+def file_digest(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """SHA-256 hex digest of a file's content, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def detector_params(config: dict, **overrides) -> dict:
+    """
+    Detector parameters from config.yaml (signal and r_peak sections).
+
+    Args:
+        config: Parsed config.yaml.
+        **overrides: Values replacing those of the config (e.g. detection_fs=50).
+
+    Returns:
+        dict: Every key of DETECTOR_DEFAULTS.
+
+    Raises:
+        ValueError: If no sampling rate is given.
+    """
+    sig = config.get("signal", {}) or {}
+    r_peak = config.get("r_peak", {}) or {}
+    params = dict(DETECTOR_DEFAULTS)
+    params.update({k: sig[k] for k in ("sampling_rate", "bandpass_low", "bandpass_high",
+                                        "filter_order", "dtype") if sig.get(k) is not None})
+    params.update({k: r_peak[k] for k in ("min_rr_sec", "max_rr_sec", "detection_fs",
+                                           "remove_ectopic", "correct_artifacts") if k in r_peak})
+    params.update(overrides)
+
+    if not params["sampling_rate"]:
+        raise ValueError("detector_params needs signal.sampling_rate")
+    params["sampling_rate"] = float(params["sampling_rate"])
+    for k in ("bandpass_low", "bandpass_high", "min_rr_sec", "max_rr_sec"):
+        params[k] = float(params[k])
+    params["filter_order"] = int(params["filter_order"])
+    params["detection_fs"] = float(params["detection_fs"]) if params["detection_fs"] else None
+    params["remove_ectopic"] = bool(params["remove_ectopic"])
+    params["correct_artifacts"] = bool(params["correct_artifacts"])
+    params["dtype"] = signal_dtype(params["dtype"]).name
+    return params
+
+
+def annotation_dir(config: dict) -> Path:
+    """Root of the annotation files: r_peak.annotations_dir, default <output.dir>."""
+    configured = (config.get("r_peak", {}) or {}).get("annotations_dir")
+    root = Path(configured or config.get("output", {}).get("dir", "reports"))
+    if not root.is_absolute():
+        root = (Path(__file__).resolve().parent.parent.parent / root).resolve()
+    return root
+
+
+def detect_annotations(signal: np.ndarray, params: dict) -> dict:
+    """
+    R-peaks and clean RR intervals of a whole recording.
+
+    Args:
+        signal: Raw ECG signal.
+        params: Detector parameters (see detector_params()).
+
+    Returns:
+        dict: 'r_peaks' (sample indices), 'rr_intervals' (clean, ms) and
+            'n_samples' (recording length).
+    """
+    fs = params["sampling_rate"]
+    x = np.asarray(signal, dtype=params["dtype"])
+    filtered = bandpass_filter(x, fs, params["bandpass_low"], params["bandpass_high"], params["filter_order"])
+
+    if params["detection_fs"]:
+        r_peaks = detect_r_peaks_multirate(filtered, fs, detection_fs=params["detection_fs"],
+                                           min_rr_sec=params["min_rr_sec"], max_rr_sec=params["max_rr_sec"])
+    else:
+        r_peaks = detect_r_peaks(filtered, fs, min_rr_sec=params["min_rr_sec"], max_rr_sec=params["max_rr_sec"])
+
+    rr = compute_rr_intervals(r_peaks, fs)
+    if params["correct_artifacts"] and len(rr) > 0:
+        rr = correct_rr_artifacts(rr)
+    elif params["remove_ectopic"] and len(rr) > 0:
+        rr = remove_ectopic_beats(rr)
+    return {
+        "r_peaks": np.asarray(r_peaks, dtype=np.int64),
+        "rr_intervals": np.asarray(rr, dtype=np.float64),
+        "n_samples": len(x),
+    }
+
+
+def save_annotations(path: Union[str, Path], annotations: dict, params: dict, digest: str) -> None:
+    """Write annotations (r_peaks, rr_intervals, n_samples) with their parameters and source digest."""
+    peaks = np.asarray(annotations["r_peaks"], dtype=np.int64)
+    small = peaks.size == 0 or peaks.max() < np.iinfo(np.int32).max
+    with open(path, "wb") as fh:
+        np.savez_compressed(
+            fh,
+            r_peaks=peaks.astype(np.int32 if small else np.int64),
+            rr_intervals=np.asarray(annotations["rr_intervals"], dtype=np.float64),
+            n_samples=np.int64(annotations["n_samples"]),
+            params=np.array(json.dumps(params, sort_keys=True)),
+            digest=np.array(digest),
+        )
+
+
+def load_annotations(path: Union[str, Path]) -> dict:
+    """
+    Read annotations written by save_annotations().
+
+    Returns:
+        dict: 'r_peaks' (int64), 'rr_intervals' (ms), 'n_samples', 'params', 'digest'.
+    """
+    with np.load(path) as z:
+        return {
+            "r_peaks": z["r_peaks"].astype(np.int64),
+            "rr_intervals": z["rr_intervals"],
+            "n_samples": int(z["n_samples"]),
+            "params": json.loads(str(z["params"])),
+            "digest": str(z["digest"]),
+        }
+
+
+class AnnotationStore:
+    """
+    Directory of R-peak annotations keyed by recording content and detector parameters.
+
+    Args:
+        root: Annotation directory (created if missing).
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.cache = StageCache(root)
+        self._digests: dict[tuple, str] = {}
+
+    @property
+    def stats(self) -> dict:
+        """Hit/miss counts of this store."""
+        return self.cache.stats.get(ANNOTATION_STAGE, {"hit": 0, "miss": 0})
+
+    def digest(self, csv_path: Union[str, Path]) -> str:
+        """Content digest of a recording (remembered per path, size and mtime)."""
+        path = Path(csv_path)
+        st = path.stat()
+        sig = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+        if sig not in self._digests:
+            self._digests[sig] = file_digest(path)
+        return self._digests[sig]
+
+    def _inputs(self, csv_path: Union[str, Path], ecg_col_index: int, header: bool) -> dict:
+        return {"digest": self.digest(csv_path), "column": int(ecg_col_index), "header": bool(header)}
+
+    def key(self, csv_path: Union[str, Path], params: dict,
+            ecg_col_index: int = 3, header: bool = True) -> str:
+        """Annotation key of a recording under the given detector parameters."""
+        return stage_key(ANNOTATION_STAGE, self._inputs(csv_path, ecg_col_index, header), params)
+
+    def path(self, csv_path: Union[str, Path], params: dict,
+             ecg_col_index: int = 3, header: bool = True) -> Path:
+        """Location of the annotations of a recording."""
+        return self.cache.path(ANNOTATION_STAGE, self.key(csv_path, params, ecg_col_index, header), ".npz")
+
+    def get(self, csv_path: Union[str, Path], params: dict,
+            ecg_col_index: int = 3, header: bool = True) -> dict:
+        """
+        Annotations of a recording, detecting them first if none are stored.
+
+        Args:
+            csv_path: Recording (CSV file, read with read_ecg_csv_column()).
+            params: Detector parameters (see detector_params()).
+            ecg_col_index: ECG column, passed to read_ecg_csv_column().
+            header: Whether the CSV has a header row.
+
+        Returns:
+            dict: See load_annotations().
+        """
+        inputs = self._inputs(csv_path, ecg_col_index, header)
+
+        def build(p):
+            x = read_ecg_csv_column(csv_path, ecg_col_index=ecg_col_index, header=header, dtype=params["dtype"])
+            save_annotations(p, detect_annotations(x, params), params, inputs["digest"])
+
+        return self.cache.run(ANNOTATION_STAGE, stage_key(ANNOTATION_STAGE, inputs, params), ".npz",
+                              build, load_annotations)
+
+
+def window_peaks(r_peaks: np.ndarray, starts: np.ndarray, win: int) -> list[np.ndarray]:
+    """
+    R-peaks of each window [start, start + win), relative to the window start.
+
+    Args:
+        r_peaks: Sorted R-peak indices of the recording.
+        starts: Window start indices.
+        win: Window length in samples.
+
+    Returns:
+        list: One array of peak indices per window.
+    """
+    r_peaks = np.asarray(r_peaks, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    lo = np.searchsorted(r_peaks, starts, side="left")
+    hi = np.searchsorted(r_peaks, starts + win, side="left")
+    return [r_peaks[a:b] - s for a, b, s in zip(lo, hi, starts)]
@@ -0,0 +1,111 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Bootstrap confidence intervals for window pass rates.
+
+A file's pass rate is the mean of its window pass/fail vector. Its
+bootstrap distribution is found by resampling that vector with
+replacement. A (person, state) pass rate pools the windows of its files,
+and each file is resampled on its own (stratified by file), so every
+file keeps its number of windows in every replicate.
+
+All files of a group are resampled with one random matrix of shape
+(replicates, windows in the group). Column j holds the draws for window j
+of the group, taken from the windows of that window's file. The only
+loops are over groups and, for very large groups, over blocks of
+replicates. The order of a pass/fail vector does not affect its bootstrap
+distribution, so each vector is rebuilt from its (n_windows, n_pass)
+counts as passes followed by fails. A resampled position then counts as
+a pass exactly when it is below n_pass.
+"""
+
+import zlib
+from typing import Hashable, Sequence
+
+import numpy as np
+
+
+# replicates x windows drawn at once (bounds memory for large groups)
+MAX_BLOCK_CELLS = 1 << 22
+
+
+def _group_rng(seed: int, group: Hashable) -> np.random.Generator:
+    """Generator seeded by (seed, group), independent of the group order."""
+    return np.random.default_rng([int(seed), zlib.crc32(repr(group).encode("utf-8"))])
+
+
+def bootstrap_pass_rates(n_windows: Sequence[int], n_pass: Sequence[int], groups: Sequence[Hashable],
+                         n_boot: int = 1000, level: float = 0.95, seed: int = 0) -> dict:
+    """
+    Percentile bootstrap confidence intervals of per-file and per-group pass rates.
+
+    Args:
+        n_windows: Number of windows per file.
+        n_pass: Number of passing windows per file.
+        groups: Group label of every file (e.g. (person, state)).
+        n_boot: Number of bootstrap replicates.
+        level: Confidence level of the intervals.
+        seed: Random seed. Each group's generator is derived from the seed and
+            its label, so results do not depend on which other groups are present.
+
+    Returns:
+        dict: Arrays aligned with the input files:
+            - ci_low / ci_high: file pass-rate interval
+            - group_pass_rate: pooled pass rate of the file's group
+            - group_ci_low / group_ci_high: group pass-rate interval
+            Files (and groups) without windows get NaN intervals.
+
+    Raises:
+        ValueError: If n_boot < 1 or level is not in (0, 1).
+    """
+    if int(n_boot) < 1:
+        raise ValueError(f"n_boot must be >= 1, got {n_boot}")
+    if not 0.0 < float(level) < 1.0:
+        raise ValueError(f"level must be in (0, 1), got {level}")
+
+    n_windows = np.asarray(n_windows, dtype=np.int64)
+    n_pass = np.asarray(n_pass, dtype=np.int64)
+    n_files = len(n_windows)
+    alpha = 1.0 - float(level)
+    q = [alpha / 2.0, 1.0 - alpha / 2.0]
+
+    out = {key: np.full(n_files, np.nan)
+           for key in ("ci_low", "ci_high", "group_pass_rate", "group_ci_low", "group_ci_high")}
+
+    members: dict = {}
+    for i, g in enumerate(groups):
+        members.setdefault(g, []).append(i)
+
+    for g, files in members.items():
+        files = np.asarray(files, dtype=np.int64)
+        total = int(n_windows[files].sum())
+        if total == 0:
+            out["group_pass_rate"][files] = 0.0
+            continue
+        out["group_pass_rate"][files] = n_pass[files].sum() / total
+
+        files = files[n_windows[files] > 0]
+        sizes = n_windows[files]
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        col_size = np.repeat(sizes, sizes).astype(float)
+        col_pass = np.repeat(n_pass[files], sizes)
+
+        rng = _group_rng(seed, g)
+        block = max(1, MAX_BLOCK_CELLS // total)
+        file_counts = np.empty((int(n_boot), len(files)), dtype=np.int64)
+        for b0 in range(0, int(n_boot), block):
+            b1 = min(int(n_boot), b0 + block)
+            # resampled window position of every (replicate, window) cell
+            idx = (rng.random((b1 - b0, total)) * col_size).astype(np.int64)
+            hits = idx < col_pass
+            file_counts[b0:b1] = np.add.reduceat(hits, starts, axis=1)
+
+        file_rates = file_counts / sizes
+        lo, hi = np.quantile(file_rates, q, axis=0)
+        out["ci_low"][files] = lo
+        out["ci_high"][files] = hi
+
+        group_rates = file_counts.sum(axis=1) / total
+        lo, hi = np.quantile(group_rates, q)
+        out["group_ci_low"][members[g]] = lo
+        out["group_ci_high"][members[g]] = hi
+
+    return out
@@ -1,36 +1,127 @@
 # SPDX-License-Identifier: Apache-2.0
 """ECG data loading and validation tool for WESAD dataset."""
 
+import json
+import pickle
 import numpy as np
 from pathlib import Path
-from typing import Union, Optional
+from typing import Union, Optional, Sequence
 import pandas as pd
 
 
+# Native sampling rates of the WESAD channels (Hz)
+WESAD_SAMPLING_RATES = {
+    "chest/ACC": 700,
+    "chest/ECG": 700,
+    "chest/EMG": 700,
+    "chest/EDA": 700,
+    "chest/Temp": 700,
+    "chest/Resp": 700,
+    "wrist/ACC": 32,
+    "wrist/BVP": 64,
+    "wrist/EDA": 4,
+    "wrist/TEMP": 4,
+    "label": 700,
+}
+
+
+def load_wesad_channels(
+    pkl_path: Union[str, Path],
+    channels: Sequence[str] = ("chest/ECG",),
+    include_labels: bool = True,
+    cache_dir: Optional[Union[str, Path]] = None
+) -> dict:
+    """
+    Load selected channels of a WESAD subject pickle as memory-mapped arrays.
 
+    The pickle is unpickled only once: the requested channels (and labels)
+    are written to one .npy file each, and later calls return read-only
+    np.load(mmap_mode="r") views of those files without touching the pickle.
 
+    Args:
+        pkl_path: Path to a WESAD subject pickle (e.g. S2.pkl)
+        channels: Channel keys as "<device>/<signal>", e.g. "chest/ECG"
+        include_labels: Whether to also return the 700 Hz label array
+        cache_dir: Directory for the per-channel arrays
+            (default: <pickle dir>/.wesad_cache/<pickle stem>)
 
+    Returns:
+        dict: Maps each channel key (and 'label') to its array
 
-
-
-
+    Raises:
+        FileNotFoundError: If the pickle does not exist
+        ValueError: If the pickle is not a WESAD subject file or a channel is missing
+    """
+    path = Path(pkl_path)
+    if not path.exists():
+        raise FileNotFoundError(f"WESAD pickle not found: {pkl_path}")
+
+    cache = Path(cache_dir) if cache_dir else path.parent / ".wesad_cache" / path.stem
+    manifest_path = cache / "manifest.json"
+    st = path.stat()
+    source = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    keys = list(channels) + (["label"] if include_labels else [])
+
+    manifest = {"source": source, "channels": {}}
+    if manifest_path.exists():
+        cached = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if cached.get("source") == source:
+            manifest = cached
+
+    missing = [k for k in keys if k not in manifest["channels"]]
+    if missing:
+        # One-time conversion: unpickle and keep only what was asked for
+        with open(path, "rb") as f:
+            subject = pickle.load(f, encoding="latin1")
+        if not isinstance(subject, dict) or "signal" not in subject:
+            raise ValueError(f"Not a WESAD subject pickle: {pkl_path}")
+
+        cache.mkdir(parents=True, exist_ok=True)
+        for key in missing:
+            if key == "label":
+                arr = subject.get("label")
+            else:
+                device, _, name = key.partition("/")
+                arr = subject["signal"].get(device, {}).get(name)
+            if arr is None:
+                raise ValueError(f"Channel '{key}' not found in {pkl_path}")
+            fname = key.replace("/", "_") + ".npy"
+            np.save(cache / fname, np.ascontiguousarray(arr))
+            manifest["channels"][key] = fname
+        del subject
+
+        manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    return {k: np.load(cache / manifest["channels"][k], mmap_mode="r") for k in keys}
 
 
 def load_ecg(
     file_path: Union[str, Path],
     sampling_rate: int = 700,
-    expected_duration: float = None
+    expected_duration: float = None,
+    channel: Union[str, Sequence[str]] = "chest/ECG",
+    cache_dir: Optional[Union[str, Path]] = None,
+    columns: Optional[Sequence[int]] = None
 ) -> dict:
     """
-    Load ECG data from a text file or WESAD pickle.
+    Load ECG data from a text/CSV file or WESAD pickle.
+
+    Multi-column data is returned as an (n_samples, n_channels) array, with
+    one column per lead; single-column data as a 1-D array.
 
     Args:
-        file_path: Path to ECG data file (.txt) or WESAD pickle (.pkl)
+        file_path: Path to ECG data file (.txt, .csv) or WESAD pickle (.pkl)
         sampling_rate: Sampling rate in Hz (default: 700 for WESAD)
         expected_duration: Expected duration in seconds (optional)
+        channel: WESAD channel to load from a pickle (default: "chest/ECG"),
+            or a list of channels with the same sampling rate to stack as columns
+        cache_dir: Per-channel array cache for pickles (see load_wesad_channels)
+        columns: 0-based columns to keep from a text/CSV file (default: all)
 
     Returns:
-        dict: Contains 'signal', 'sampling_rate', 'duration_sec', 'n_samples'
+        dict: Contains 'signal', 'sampling_rate', 'duration_sec', 'n_samples',
+            'n_channels' (plus 'labels' for WESAD pickles)
 
     Raises:
         FileNotFoundError: If the file does not exist
@@ -44,26 +135,40 @@ def load_ecg(
     if not path.is_file():
         raise ValueError(f"Path is not a file: {file_path}")
 
-
-
-
-    # Handle text files (original format)
-    try:
-        data = np.loadtxt(path)
-    except Exception as e:
-        raise ValueError(f"Failed to load ECG data: {e}")
+    labels = None
+    if path.suffix.lower() == ".pkl":
+        # Handle WESAD pickles (memory-mapped per-channel cache)
+        channels = [channel] if isinstance(channel, str) else list(channel)
+        try:
+            arrays = load_wesad_channels(path, channels=channels, cache_dir=cache_dir)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            raise ValueError(f"Failed to load WESAD pickle: {e}")
+        if len(channels) == 1:
+            data = arrays[channels[0]]
+        else:
+            lengths = {len(arrays[c]) for c in channels}
+            if len(lengths) > 1:
+                raise ValueError(f"Channels {channels} have different lengths {sorted(lengths)}")
+            data = np.column_stack([np.asarray(arrays[c]).reshape(len(arrays[c]), -1) for c in channels])
+        labels = arrays["label"]
+    else:
+        # Handle text files (whitespace-separated, or comma-separated .csv)
+        delimiter = "," if path.suffix.lower() == ".csv" else None
+        try:
+            data = np.loadtxt(path, delimiter=delimiter,
+                              usecols=list(columns) if columns is not None else None)
+        except Exception as e:
+            raise ValueError(f"Failed to load ECG data: {e}")
 
     # Validate shape
     if data.ndim == 0 or data.size == 0:
         raise ValueError("ECG file is empty")
 
-    if data.ndim > 1:
-        if data.shape[1] == 1:
-            data = data.flatten()
-        else:
-            raise ValueError(
-                f"Expected single-column ECG data, got shape {data.shape}"
-            )
+    if data.ndim > 2:
+        raise ValueError(f"Expected (n_samples, n_channels) ECG data, got shape {data.shape}")
+
+    if data.ndim == 2 and data.shape[1] == 1:
+        data = data[:, 0]
 
     # Validate values
     if np.any(np.isnan(data)):
@@ -85,18 +190,23 @@ def load_ecg(
                 f"got {duration_sec:.1f}s"
             )
 
-    return {
+    result = {
         "signal": data,
         "sampling_rate": sampling_rate,
         "duration_sec": duration_sec,
         "n_samples": n_samples,
+        "n_channels": data.shape[1] if data.ndim == 2 else 1,
         "file_path": str(path.absolute()),
     }
+    if labels is not None:
+        result["labels"] = labels
+    return result
 
 
 
 
-def read_ecg_csv_column(csv_path: Path, ecg_col_index: int = 3, header: bool = True) -> np.ndarray:
+def read_ecg_csv_column(csv_path: Path, ecg_col_index: int = 3, header: bool = True,
+                        dtype: Union[str, np.dtype] = np.float64) -> np.ndarray:
     """
     Reads an ECG signal from a CSV file, selecting a specific column.
 
@@ -107,6 +217,7 @@ def read_ecg_csv_column(csv_path: Path, ecg_col_index: int = 3, header: bool = T
         csv_path: Path to the CSV file.
         ecg_col_index: 0-based index of the ECG column. Default is 3 (D column).
         header: Whether the CSV has a header row.
+        dtype: Dtype of the returned signal (float64, or float32 to halve its memory).
 
     Returns:
         np.ndarray: The ECG signal as a NumPy array.
@@ -127,7 +238,7 @@ def read_ecg_csv_column(csv_path: Path, ecg_col_index: int = 3, header: bool = T
         raise ValueError(f"{csv_path}: expected ECG column index {ecg_col_index} or 'ECG' column, "
                          f"but got only {df.shape[1]} columns and no 'ECG' column.")
     
-    x = x.astype(float).to_numpy()
+    x = x.astype(dtype).to_numpy()
     x = np.nan_to_num(x, nan=np.nanmedian(x)) # Replace NaNs with median
     return x
 
@@ -1,17 +1,35 @@
 # SPDX-License-Identifier: Apache-2.0
-"""Extended HRV feature extraction: 20 ECG-derived features for comprehensive analysis."""
+"""Extended HRV feature extraction: 20 ECG-derived features for comprehensive analysis.
+
+Optional feature groups (see OPTIONAL_CATEGORIES) add detrended fluctuation
+analysis and multiscale entropy on request.
+"""
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.signal import welch
 from scipy.interpolate import interp1d
-from typing import Optional
+from typing import Optional, Sequence
+
+
+# DFA box sizes in beats: short-term alpha1 and long-term alpha2
+DFA_SHORT_SCALES = (4, 16)
+DFA_LONG_SCALES = (16, 64)
+DFA_MIN_BOXES = 4           # a box size is used only if the series holds this many boxes
+
+# multiscale entropy: coarse-graining scales 1..MSE_MAX_SCALE
+MSE_MAX_SCALE = 5
+
+# candidate template pairs checked at once by the neighbour-count kernel
+_PAIR_BLOCK = 1 << 20
 
 
 def extract_extended_features(
     rr_intervals: np.ndarray,
     r_peaks: Optional[np.ndarray] = None,
     filtered_signal: Optional[np.ndarray] = None,
-    fs: int = 700
+    fs: int = 700,
+    include: Sequence[str] = (),
 ) -> dict:
     """
     Extract 20 HRV features from RR intervals and optionally from ECG signal.
@@ -43,20 +61,39 @@ def extract_extended_features(
         19. sd_ratio - SD1/SD2 ratio
         20. sample_entropy - Sample entropy of RR intervals
 
+    Optional groups (added when named in include):
+    Fractal:
+        dfa_alpha1 - DFA short-term scaling exponent (4-16 beats)
+        dfa_alpha2 - DFA long-term scaling exponent (16-64 beats)
+    Multiscale entropy:
+        mse_1 .. mse_5 - Sample entropy of the series coarse-grained by 1..5
+        mse_area - Sum of mse_1 .. mse_5 (complexity index)
+
     Args:
         rr_intervals: RR intervals in milliseconds
         r_peaks: Optional R-peak indices (for signal-based features)
         filtered_signal: Optional filtered ECG signal
         fs: Sampling frequency in Hz
+        include: Optional feature groups to add (keys of OPTIONAL_CATEGORIES)
 
     Returns:
-        dict: Dictionary with 20 named features
+        dict: Dictionary with 20 named features, plus those of the included groups
+
+    Raises:
+        ValueError: If include names an unknown group.
     """
     features = {}
 
+    unknown = [g for g in include if g not in OPTIONAL_CATEGORIES]
+    if unknown:
+        raise ValueError(f"Unknown optional feature groups {unknown}; choose from {list(OPTIONAL_CATEGORIES)}")
+
     # Handle empty or insufficient data
     if len(rr_intervals) < 10:
-        return _get_nan_features()
+        features = _get_nan_features()
+        for group in include:
+            features.update({name: np.nan for name in FEATURE_CATEGORIES[group]})
+        return features
 
     rr = np.array(rr_intervals, dtype=np.float64)
 
@@ -111,6 +148,17 @@ def extract_extended_features(
     nonlinear_features = _extract_nonlinear_features(rr)
     features.update(nonlinear_features)
 
+    # =========================================================================
+    # OPTIONAL GROUPS
+    # =========================================================================
+
+    if 'Fractal' in include:
+        features['dfa_alpha1'] = _compute_dfa_alpha(rr, *DFA_SHORT_SCALES)
+        features['dfa_alpha2'] = _compute_dfa_alpha(rr, *DFA_LONG_SCALES)
+
+    if 'Multiscale entropy' in include:
+        features.update(_compute_multiscale_entropy(rr))
+
     return features
 
 
@@ -266,23 +314,135 @@ def _compute_sample_entropy(rr: np.ndarray, m: int = 2, r_factor: float = 0.2) -
     if r == 0:
         return np.nan
 
-    def _count_matches(template_len):
-        count = 0
-        for i in range(N - template_len):
-            for j in range(i + 1, N - template_len):
-                if np.max(np.abs(rr[i:i + template_len] - rr[j:j + template_len])) < r:
-                    count += 1
-        return count
+    return _sample_entropy_r(np.asarray(rr, dtype=np.float64), m, r)
 
-    A = _count_matches(m + 1)
-    B = _count_matches(m)
 
+def _sample_entropy_r(x: np.ndarray, m: int, r: float) -> float:
+    """Sample entropy -log(A/B) of x with an absolute tolerance r."""
+    if len(x) < m + 2:
+        return np.nan
+    A, B = _count_template_matches(x, m, r)
     if B == 0:
         return np.nan
-
     return -np.log(A / B) if A > 0 else np.nan
 
 
+def _count_template_matches(x: np.ndarray, m: int, r: float) -> tuple[int, int]:
+    """
+    Neighbour counts of sample entropy: pairs of templates closer than r.
+
+    B counts pairs i < j of the first len(x) - m templates of length m with
+    max |x[i+k] - x[j+k]| < r; A counts the same for the first len(x) - m - 1
+    templates of length m + 1.
+
+    Templates are sorted by their first sample, so only pairs whose first
+    samples differ by less than r are candidates (found with searchsorted).
+    Candidates are checked in vectorized blocks, and the A matches are the B
+    matches that also agree on one more sample. Cost is O(N log N) plus the
+    number of candidate pairs, instead of the O(N^2) loop over all pairs.
+    """
+    n = len(x) - m
+    if n < 2:
+        return 0, 0
+    emb = sliding_window_view(x, m)[:n]
+    order = np.argsort(emb[:, 0], kind='stable')
+    e = emb[order]
+    first = e[:, 0]
+
+    # candidates of sorted template a: b in (a, hi[a]); exact test below
+    hi = np.searchsorted(first, first + r, side='right')
+    cnt = np.maximum(hi - np.arange(n) - 1, 0)
+    cum = np.cumsum(cnt)
+
+    A = B = 0
+    a0 = 0
+    while a0 < n:
+        # as many templates as fit into one block of candidate pairs
+        done = cum[a0 - 1] if a0 > 0 else 0
+        a1 = max(a0 + 1, int(np.searchsorted(cum, done + _PAIR_BLOCK, side='right')))
+        a1 = min(a1, n)
+        c = cnt[a0:a1]
+        total = int(c.sum())
+        if total:
+            a = np.repeat(np.arange(a0, a1), c)
+            b = a + 1 + np.arange(total) - np.repeat(np.cumsum(c) - c, c)
+            ok = np.all(np.abs(e[a] - e[b]) < r, axis=1)
+            B += int(ok.sum())
+            # extend the matching pairs by one sample (m + 1 templates)
+            ia = order[a[ok]]
+            ib = order[b[ok]]
+            keep = (ia < n - 1) & (ib < n - 1)
+            A += int(np.sum(np.abs(x[ia[keep] + m] - x[ib[keep] + m]) < r))
+        a0 = a1
+    return A, B
+
+
+def _compute_dfa_alpha(rr: np.ndarray, min_scale: int, max_scale: int) -> float:
+    """
+    DFA scaling exponent of RR intervals over box sizes min_scale..max_scale.
+
+    The profile (cumulative sum of the mean-removed series) is cut into
+    non-overlapping boxes of n beats. Each scale reshapes the profile into a
+    (boxes, n) matrix and removes every box's least-squares line at once,
+    using closed-form slopes against a centred time axis. alpha is the slope
+    of log F(n) against log n.
+
+    Args:
+        rr: RR intervals
+        min_scale: Smallest box size (beats)
+        max_scale: Largest box size (beats)
+
+    Returns:
+        float: Scaling exponent (NaN if fewer than 3 box sizes fit the series)
+    """
+    x = np.asarray(rr, dtype=np.float64)
+    N = len(x)
+    scales = np.arange(min_scale, min(max_scale, N // DFA_MIN_BOXES) + 1)
+    if len(scales) < 3:
+        return np.nan
+
+    profile = np.cumsum(x - x.mean())
+    fluct = np.empty(len(scales))
+    for k, n in enumerate(scales):
+        boxes = profile[:(N // n) * n].reshape(-1, n)
+        t = np.arange(n) - (n - 1) / 2.0
+        centred = boxes - boxes.mean(axis=1, keepdims=True)
+        slope = centred @ t / (t @ t)
+        resid = centred - slope[:, None] * t
+        fluct[k] = np.sqrt(np.mean(resid * resid))
+
+    if not np.all(fluct > 0):
+        return np.nan
+    return float(np.polyfit(np.log(scales), np.log(fluct), 1)[0])
+
+
+def _compute_multiscale_entropy(rr: np.ndarray, max_scale: int = MSE_MAX_SCALE,
+                                m: int = 2, r_factor: float = 0.2) -> dict:
+    """
+    Multiscale entropy: sample entropy of the coarse-grained series at scales 1..max_scale.
+
+    All scales are coarse-grained from one cumulative sum (the scale-s series
+    is the mean of consecutive non-overlapping runs of s beats). The
+    tolerance is fixed from the original series, r = r_factor * std(rr), as
+    in Costa et al., and every scale uses the same neighbour-count kernel as
+    sample_entropy.
+
+    Returns:
+        dict: mse_1 .. mse_<max_scale> and mse_area (their sum; NaN if any is NaN)
+    """
+    x = np.asarray(rr, dtype=np.float64)
+    r = r_factor * np.std(x)
+    csum = np.concatenate(([0.0], np.cumsum(x)))
+
+    out = {}
+    for s in range(1, max_scale + 1):
+        edges = csum[::s]
+        coarse = np.diff(edges) / s
+        out[f'mse_{s}'] = _sample_entropy_r(coarse, m, r) if r > 0 else np.nan
+    out['mse_area'] = float(np.sum([out[f'mse_{s}'] for s in range(1, max_scale + 1)]))
+    return out
+
+
 def _get_nan_features() -> dict:
     """Return dictionary with all features set to NaN."""
     return {
@@ -317,6 +477,11 @@ FEATURE_NAMES = [
     'hf_nu', 'sd1', 'sd2', 'sd_ratio', 'sample_entropy'
 ]
 
+OPTIONAL_FEATURE_NAMES = [
+    'dfa_alpha1', 'dfa_alpha2',
+    'mse_1', 'mse_2', 'mse_3', 'mse_4', 'mse_5', 'mse_area',
+]
+
 FEATURE_DESCRIPTIONS = {
     'mean_rr': 'Mean RR interval (ms)',
     'sdnn': 'Std dev of RR intervals (ms)',
@@ -338,6 +503,14 @@ FEATURE_DESCRIPTIONS = {
     'sd2': 'Poincare SD2 (ms)',
     'sd_ratio': 'SD1/SD2 ratio',
     'sample_entropy': 'Sample entropy',
+    'dfa_alpha1': 'DFA short-term exponent alpha1',
+    'dfa_alpha2': 'DFA long-term exponent alpha2',
+    'mse_1': 'Multiscale entropy, scale 1',
+    'mse_2': 'Multiscale entropy, scale 2',
+    'mse_3': 'Multiscale entropy, scale 3',
+    'mse_4': 'Multiscale entropy, scale 4',
+    'mse_5': 'Multiscale entropy, scale 5',
+    'mse_area': 'Multiscale entropy complexity index',
 }
 
 FEATURE_CATEGORIES = {
@@ -345,4 +518,9 @@ FEATURE_CATEGORIES = {
                     'std_hr', 'cv_rr', 'range_rr', 'median_rr', 'iqr_rr'],
     'Frequency-domain': ['vlf_power', 'lf_power', 'hf_power', 'lf_hf_ratio', 'lf_nu', 'hf_nu'],
     'Non-linear': ['sd1', 'sd2', 'sd_ratio', 'sample_entropy'],
+    # optional groups, computed only when requested (include=...)
+    'Fractal': ['dfa_alpha1', 'dfa_alpha2'],
+    'Multiscale entropy': ['mse_1', 'mse_2', 'mse_3', 'mse_4', 'mse_5', 'mse_area'],
 }
+
+OPTIONAL_CATEGORIES = ('Fractal', 'Multiscale entropy')
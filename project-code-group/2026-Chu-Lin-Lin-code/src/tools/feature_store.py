@@ -0,0 +1,160 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Indexed on-disk store of per-window HRV feature time series.
+
+run_dataset() writes one .npz file holding, for every analysed window of
+every recording, its position, pass/fail result, the 20 extended features
+(one array per feature) and its RR intervals. An index maps each recording
+(file, person, state) to its block of windows.
+
+The arrays are stored uncompressed, and np.load() reads an array only when
+it is accessed. Reading a few features for a few files therefore touches
+only those arrays, and no signal processing is repeated. Optional feature
+groups (DFA, multiscale entropy) are not stored; they are computed from the
+stored RR intervals of the selected windows.
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .extended_features import FEATURE_CATEGORIES, OPTIONAL_CATEGORIES, extract_extended_features
+from .window_store import FEATURE_COLUMNS, WindowStore, _slice_indices
+
+
+FEATURE_STORE_NAME = "window_features.npz"
+
+# array name of a stored feature
+_PREFIX = "feature."
+
+
+def write_feature_store(path: Union[str, Path], table: WindowStore, records: Sequence[dict],
+                        passed: np.ndarray, fs: float, win: int, stride: int) -> None:
+    """
+    Write the window table of a dataset run as an indexed feature store.
+
+    The file is written to a temporary name and moved into place, so readers
+    never see a partial store.
+
+    Args:
+        path: Output .npz path.
+        table: Window table of all records (WindowStore with features).
+        records: Records the table's 'record' column indexes (person, state, path).
+        passed: Pass/fail flag of every table row.
+        fs: Sampling rate in Hz.
+        win: Window length in samples.
+        stride: Window stride in samples.
+    """
+    path = Path(path)
+    rec_idx = np.asarray(table["record"], dtype=np.int64)
+    order = np.argsort(rec_idx, kind="stable")
+    counts = np.bincount(rec_idx, minlength=len(records)) if len(rec_idx) else np.zeros(len(records), np.int64)
+    store = WindowStore.concatenate([table[order]])
+
+    arrays = {
+        "fs": np.float64(fs),
+        "win": np.int64(win),
+        "stride": np.int64(stride),
+        # index: one entry per record
+        "path": np.array([str(r["path"]) for r in records], dtype=str),
+        "person": np.array([r["person"] for r in records], dtype=str),
+        "state": np.array([r["state"] for r in records], dtype=str),
+        "offset": np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64),
+        "count": counts.astype(np.int64),
+        # windows, grouped by record
+        "start": store["start"],
+        "end": store["end"],
+        "passed": np.asarray(passed, dtype=bool)[order],
+        "rr_mean": store["rr_mean"],
+        "rr_offset": store["rr_offset"],
+        "rr_count": store["rr_count"],
+        "rr": store.rr_buffer,
+        **{_PREFIX + name: store.features[:, j] for j, name in enumerate(FEATURE_COLUMNS)},
+    }
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp, path)
+
+
+def read_feature_index(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Recordings in a feature store.
+
+    Args:
+        path: Store written by write_feature_store().
+
+    Returns:
+        pd.DataFrame: One row per recording with file, person, state, n_windows.
+    """
+    with np.load(path) as z:
+        return pd.DataFrame({"file": z["path"], "person": z["person"], "state": z["state"],
+                             "n_windows": z["count"]})
+
+
+def read_feature_series(path: Union[str, Path], features: Sequence[str],
+                        person: Optional[str] = None, state: Optional[str] = None,
+                        file: Optional[str] = None) -> pd.DataFrame:
+    """
+    Per-window time series of selected features.
+
+    Args:
+        path: Store written by write_feature_store().
+        features: Names from FEATURE_NAMES or OPTIONAL_FEATURE_NAMES.
+        person: Keep only this person (default: all).
+        state: Keep only this state (default: all).
+        file: Keep only this recording (full path or file name).
+
+    Returns:
+        pd.DataFrame: One row per window with file, person, state, start_sec,
+            end_sec, time_sec (window center), passed and one column per feature.
+
+    Raises:
+        KeyError: If a feature is neither stored nor an optional feature.
+    """
+    optional = {name: group for group in OPTIONAL_CATEGORIES for name in FEATURE_CATEGORIES[group]}
+    unknown = [f for f in features if f not in FEATURE_COLUMNS and f not in optional]
+    if unknown:
+        raise KeyError(f"Unknown features {unknown}. Available: {list(FEATURE_COLUMNS) + list(optional)}")
+
+    with np.load(path) as z:
+        fs = float(z["fs"])
+        files, persons, states = z["path"], z["person"], z["state"]
+        keep = np.ones(len(files), dtype=bool)
+        if person is not None:
+            keep &= persons == person
+        if state is not None:
+            keep &= states == state
+        if file is not None:
+            keep &= (files == str(file)) | (np.array([Path(f).name for f in files]) == Path(file).name)
+
+        counts = z["count"][keep]
+        starts = z["offset"][keep]
+        rows = _slice_indices(starts, counts)   # window rows of the selected recordings
+
+        start, end = z["start"][rows], z["end"][rows]
+        out = pd.DataFrame({
+            "file": np.repeat(files[keep], counts),
+            "person": np.repeat(persons[keep], counts),
+            "state": np.repeat(states[keep], counts),
+            "start_sec": start / fs,
+            "end_sec": end / fs,
+            "time_sec": (start + end) / 2.0 / fs,
+            "passed": z["passed"][rows],
+        })
+        for name in features:
+            if name in FEATURE_COLUMNS:
+                out[name] = z[_PREFIX + name][rows]
+
+        wanted = [f for f in features if f in optional]
+        if wanted:
+            groups = sorted({optional[f] for f in wanted})
+            rr, rr_offset, rr_count = z["rr"], z["rr_offset"][rows], z["rr_count"][rows]
+            values = [extract_extended_features(rr[o:o + c], fs=fs, include=groups)
+                      for o, c in zip(rr_offset, rr_count)]
+            for name in wanted:
+                out[name] = [v.get(name, np.nan) for v in values]
+    return out
@@ -309,3 +309,172 @@ def generate_report(
         f.write(markdown_content)
 
     return str(output_path)
+
+
+# features tabulated per (person, state) in the dataset report
+DATASET_REPORT_FEATURES = (
+    ("mean_hr", "Mean HR (bpm)"),
+    ("sdnn", "SDNN (ms)"),
+    ("rmssd", "RMSSD (ms)"),
+    ("pnn50", "pNN50 (%)"),
+    ("lf_hf_ratio", "LF/HF"),
+    ("sample_entropy", "SampEn"),
+)
+
+
+def _fmt(value: Optional[float], spec: str = ".2f") -> str:
+    return "N/A" if value is None else format(value, spec)
+
+
+def create_dataset_visualizations(summary: dict) -> bytes:
+    """
+    Create the plots of the dataset-level report.
+
+    Args:
+        summary: Dataset summary (dataset_summary.json written by run_dataset).
+
+    Returns:
+        bytes: PNG image data
+    """
+    groups = summary.get("groups", [])
+    states = summary.get("states", [])
+    labels = [f"{g['person']}\n{g['state']}" for g in groups]
+    x_pos = np.arange(len(groups))
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 8))
+    fig.suptitle('Dataset HRV Summary', fontsize=14, fontweight='bold')
+
+    # Plot 1: file pass-rate histograms per state
+    ax1 = axes[0, 0]
+    edges = np.asarray(summary["overall"]["file_pass_rate_hist"]["edges"])
+    width = (edges[1] - edges[0]) / max(len(states), 1)
+    for i, st in enumerate(states):
+        ax1.bar(edges[:-1] + i * width, st["file_pass_rate_hist"]["counts"], width=width,
+                align='edge', label=st["state"], alpha=0.8)
+    ax1.set_xlabel('File pass rate')
+    ax1.set_ylabel('Files')
+    ax1.set_title('Distribution of File Pass Rates')
+    ax1.legend(loc='upper left')
+    ax1.grid(True, alpha=0.3, axis='y')
+
+    # Plot 2: pooled pass rate per (person, state)
+    ax2 = axes[0, 1]
+    ax2.bar(x_pos, [g["pass_rate"] or 0.0 for g in groups], color='#2ecc71')
+    ax2.set_xticks(x_pos)
+    ax2.set_xticklabels(labels, fontsize=8)
+    ax2.set_ylabel('Pass rate')
+    ax2.set_title('Window Pass Rate per Person/State')
+    ax2.grid(True, alpha=0.3, axis='y')
+
+    # Plots 3-4: median and IQR of SDNN and RMSSD per (person, state)
+    for ax, (name, title) in zip((axes[1, 0], axes[1, 1]), (("sdnn", "SDNN (ms)"), ("rmssd", "RMSSD (ms)"))):
+        stats = [g["features"][name] for g in groups]
+        med = np.array([s["q50"] if s["q50"] is not None else np.nan for s in stats])
+        low = np.array([s["q25"] if s["q25"] is not None else np.nan for s in stats])
+        high = np.array([s["q75"] if s["q75"] is not None else np.nan for s in stats])
+        ax.bar(x_pos, np.nan_to_num(med), color='#3498db',
+               yerr=np.nan_to_num([med - low, high - med]), capsize=3)
+        ax.set_xticks(x_pos)
+        ax.set_xticklabels(labels, fontsize=8)
+        ax.set_ylabel(title)
+        ax.set_title(f'{title}: median and IQR of windows')
+        ax.grid(True, alpha=0.3, axis='y')
+
+    plt.tight_layout()
+
+    img_buffer = io.BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
+    plt.close(fig)
+    img_buffer.seek(0)
+
+    return img_buffer.getvalue()
+
+
+def generate_dataset_report(
+    summary: dict,
+    output_path: Union[str, Path],
+    evaluation_summary: str = "N/A"
+) -> str:
+    """
+    Generate the overall Markdown report of a dataset run from its aggregates.
+
+    Every number comes from the dataset summary that run_dataset() gathers in
+    its single pass over all windows; no recording is reprocessed.
+
+    Args:
+        summary: Dataset summary (dataset_summary.json written by run_dataset).
+        output_path: Path for the output Markdown file (e.g., .md)
+        evaluation_summary: A text summary of the rule-based evaluation.
+
+    Returns:
+        str: Path to the generated report
+    """
+    output_path = Path(output_path).with_suffix('.md')
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    img_path = output_path.with_suffix('.png')
+    with open(img_path, 'wb') as f:
+        f.write(create_dataset_visualizations(summary))
+
+    overall = summary["overall"]
+    sections = [("All", overall)] + [(st["state"], st) for st in summary.get("states", [])]
+
+    pooled_rows = "\n".join(
+        f"| {name} | {s['n_files']} | {s['n_windows']} | {_fmt(s['pass_rate'], '.1%')} "
+        f"| {_fmt(s['pooled_hrv']['mean_hr_bpm'], '.1f')} | {_fmt(s['pooled_hrv']['sdnn_ms'])} "
+        f"| {_fmt(s['pooled_hrv']['rmssd_ms'])} | {_fmt(s['pooled_hrv']['pnn50'])} |"
+        for name, s in sections
+    )
+
+    def median_iqr(stat: dict) -> str:
+        if stat["q50"] is None:
+            return "N/A"
+        return f"{stat['q50']:.2f} [{stat['q25']:.2f}, {stat['q75']:.2f}]"
+
+    header = " | ".join(title for _, title in DATASET_REPORT_FEATURES)
+    feature_rows = "\n".join(
+        f"| {g['person']} | {g['state']} | {g['n_windows']} | {_fmt(g['pass_rate'], '.1%')} | "
+        + " | ".join(median_iqr(g["features"][name]) for name, _ in DATASET_REPORT_FEATURES) + " |"
+        for g in summary.get("groups", [])
+    )
+
+    window = ""
+    if "window_sec" in summary:
+        window = f" ({summary['window_sec']:g} s windows, {summary.get('overlap', 0):.0%} overlap)"
+
+    markdown_content = f"""# HRV Dataset Analysis Report
+
+**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+## 1. Overview
+
+**Recordings:** {overall['n_files']}
+**Windows analysed:** {overall['n_windows']}{window}
+**Overall Pass Rate:** {_fmt(overall['pass_rate'], '.1%')} ({overall['n_pass']} of {overall['n_windows']} windows)
+**Summary:** {evaluation_summary}
+
+## 2. Pooled HRV
+
+RR intervals of all analysed windows, pooled; RMSSD and pNN50 use successive
+differences within windows.
+
+| Group | Files | Windows | Pass Rate | Mean HR (bpm) | SDNN (ms) | RMSSD (ms) | pNN50 (%) |
+|-------|-------|---------|-----------|---------------|-----------|------------|-----------|
+{pooled_rows}
+
+## 3. Feature Distributions per Person/State
+
+Median [25th, 75th percentile] over the windows of each group.
+
+| Person | State | Windows | Pass Rate | {header} |
+|--------|-------|---------|-----------|{"|".join("---" for _ in DATASET_REPORT_FEATURES)}|
+{feature_rows}
+
+## 4. Visualizations
+
+![HRV Dataset Visualizations]({img_path.name})
+"""
+    with open(output_path, 'w', encoding="utf-8") as f:
+        f.write(markdown_content)
+
+    return str(output_path)
@@ -0,0 +1,279 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Out-of-core segment scheduling for long ECG recordings.
+
+Long recordings are converted once into a raw memory-mapped array on disk and
+then processed in overlapping blocks of whole analysis windows, so peak memory
+is bounded by the block size instead of the recording length.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterator, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+MANIFEST_SUFFIX = ".json"
+
+
+def csv_to_memmap(
+    csv_path: Union[str, Path],
+    out_path: Union[str, Path],
+    ecg_col_index: int = 3,
+    header: bool = True,
+    chunksize: int = 1_000_000,
+    block_size: int = 1_000_000,
+    dtype: Union[str, np.dtype] = np.float64
+) -> np.memmap:
+    """
+    Stream the ECG column of a CSV file into a raw memory-mapped array.
+
+    The column choice and NaN handling mirror read_ecg_csv_column(), so the
+    resulting array holds exactly the same values as the in-memory loader.
+    The conversion is skipped when an up-to-date copy already exists.
+
+    Args:
+        csv_path: Path to the CSV file.
+        out_path: Path of the raw array to write (a JSON manifest is
+            written next to it).
+        ecg_col_index: 0-based index of the ECG column. Default is 3 (D column).
+        header: Whether the CSV has a header row.
+        chunksize: Number of CSV rows parsed at a time.
+        block_size: Number of samples held in memory while post-processing.
+        dtype: Sample dtype of the array (float64, or float32 for half the size).
+
+    Returns:
+        np.memmap: Read-only view of the ECG signal.
+
+    Raises:
+        ValueError: If the specified ECG column index is out of bounds.
+    """
+    csv_path = Path(csv_path)
+    out_path = Path(out_path)
+    manifest_path = out_path.with_name(out_path.name + MANIFEST_SUFFIX)
+    source = _source_signature(csv_path)
+    dtype = np.dtype(dtype)
+
+    if out_path.exists() and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("source") == source and manifest.get("dtype") == dtype.name:
+            return open_memmap_signal(out_path)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    n_samples = 0
+    n_nan = 0
+    with open(out_path, "wb") as fh:
+        reader = pd.read_csv(csv_path, header=0 if header else None, chunksize=chunksize)
+        for chunk in reader:
+            if 'ECG' in chunk.columns:
+                x = chunk['ECG']
+            elif 'ecg' in chunk.columns:
+                x = chunk['ecg']
+            elif ecg_col_index < chunk.shape[1]:
+                x = chunk.iloc[:, ecg_col_index]
+            else:
+                raise ValueError(f"{csv_path}: expected ECG column index {ecg_col_index} or 'ECG' column, "
+                                 f"but got only {chunk.shape[1]} columns and no 'ECG' column.")
+            x = np.ascontiguousarray(x.astype(dtype).to_numpy(), dtype=dtype)
+            n_nan += int(np.count_nonzero(np.isnan(x)))
+            n_samples += len(x)
+            x.tofile(fh)
+
+    # Replace NaNs with the median, as the in-memory loader does
+    if n_nan > 0 and n_samples > 0:
+        mm = np.memmap(out_path, dtype=dtype, mode="r+", shape=(n_samples,))
+        fill = nanmedian_blocked(mm, block_size=block_size)
+        for b0 in range(0, n_samples, block_size):
+            block = mm[b0:b0 + block_size]
+            block[np.isnan(block)] = fill
+        mm.flush()
+        del mm
+
+    manifest = {
+        "source": source,
+        "dtype": dtype.name,
+        "n_samples": n_samples,
+        "n_nan_filled": n_nan,
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return open_memmap_signal(out_path)
+
+
+def open_memmap_signal(path: Union[str, Path]) -> np.memmap:
+    """
+    Open a raw signal array written by csv_to_memmap() as a read-only memmap.
+
+    Args:
+        path: Path to the raw array.
+
+    Returns:
+        np.memmap: Read-only 1-D view of the signal.
+    """
+    path = Path(path)
+    manifest_path = path.with_name(path.name + MANIFEST_SUFFIX)
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    n = int(manifest["n_samples"])
+    if n == 0:
+        return np.zeros(0, dtype=manifest["dtype"])
+    return np.memmap(path, dtype=manifest["dtype"], mode="r", shape=(n,))
+
+
+def sliding_window_matrix(signal: np.ndarray, win: int, stride: int) -> np.ndarray:
+    """
+    All analysis windows of a signal as a read-only 2-D view (no copy).
+
+    Row i is signal[i * stride : i * stride + win], i.e. the windows of
+    HRVAnalysisOrchestrator._window_slices(), so the matrix can be filtered or
+    enhanced along axis=1 in one call.
+
+    Args:
+        signal: 1-D signal (ndarray or np.memmap).
+        win: Window length in samples.
+        stride: Window stride in samples.
+
+    Returns:
+        np.ndarray: Read-only view of shape (n_windows, win).
+    """
+    signal = np.asarray(signal)
+    if win <= 0 or len(signal) < win:
+        return np.empty((0, max(int(win), 0)), dtype=signal.dtype)
+    return sliding_window_view(signal, int(win))[::max(1, int(stride))]
+
+
+def iter_window_blocks(
+    n: int,
+    win: int,
+    stride: int,
+    block_windows: int = 64
+) -> Iterator[tuple[int, int, np.ndarray]]:
+    """
+    Group sliding windows into overlapping blocks of contiguous samples.
+
+    Windows are laid out exactly as HRVAnalysisOrchestrator._window_slices()
+    lays them out. Consecutive blocks overlap by (win - stride) samples, so
+    every window lies entirely inside one block (overlap-save).
+
+    Args:
+        n: Signal length in samples.
+        win: Window length in samples.
+        stride: Window stride in samples.
+        block_windows: Maximum number of windows per block.
+
+    Yields:
+        tuple: (block_start, block_end, window_starts) in absolute samples.
+    """
+    if win <= 0 or n < win:
+        return
+    stride = max(1, int(stride))
+    block_windows = max(1, int(block_windows))
+    n_windows = (n - win) // stride + 1
+
+    for w0 in range(0, n_windows, block_windows):
+        w1 = min(w0 + block_windows, n_windows)
+        starts = np.arange(w0, w1, dtype=np.int64) * stride
+        yield int(starts[0]), int(starts[-1] + win), starts
+
+
+def iter_window_segments(
+    signal: np.ndarray,
+    win: int,
+    stride: int,
+    block_windows: int = 64
+) -> Iterator[tuple[int, int, np.ndarray]]:
+    """
+    Yield every analysis window of a (memory-mapped) signal block by block.
+
+    Only one block is copied into memory at a time; the yielded segments are
+    views into that block.
+
+    Args:
+        signal: 1-D signal, typically an np.memmap.
+        win: Window length in samples.
+        stride: Window stride in samples.
+        block_windows: Maximum number of windows per block.
+
+    Yields:
+        tuple: (start, end, segment) for each window.
+    """
+    for b0, b1, starts in iter_window_blocks(len(signal), win, stride, block_windows):
+        windows = sliding_window_matrix(np.array(signal[b0:b1]), win, stride)
+        for s, seg in zip(starts.tolist(), windows):
+            yield s, s + win, seg
+
+
+def nanmedian_blocked(signal: np.ndarray, block_size: int = 1_000_000) -> float:
+    """
+    Exact NaN-ignoring median computed with bounded memory.
+
+    Gives the same result as np.nanmedian() but only ever holds one block of
+    samples (plus a shrinking candidate set) in memory.
+
+    Args:
+        signal: 1-D signal, typically an np.memmap.
+        block_size: Number of samples read per pass step.
+
+    Returns:
+        float: Median of the non-NaN samples (NaN if there are none).
+    """
+    n_valid = 0
+    for b0 in range(0, len(signal), block_size):
+        block = np.asarray(signal[b0:b0 + block_size])
+        n_valid += int(np.count_nonzero(~np.isnan(block)))
+    if n_valid == 0:
+        return np.nan
+
+    lo = _kth_smallest_blocked(signal, (n_valid - 1) // 2, block_size)
+    if n_valid % 2:
+        return float(lo)
+    hi = _kth_smallest_blocked(signal, n_valid // 2, block_size)
+    return float(np.mean(np.array([lo, hi])))
+
+
+def _kth_smallest_blocked(signal: np.ndarray, k: int, block_size: int, n_bins: int = 1024) -> float:
+    """Return the k-th smallest non-NaN value by iterative histogram narrowing."""
+    lo, hi = -np.inf, np.inf   # candidates are values in (lo, hi]
+    below = 0                  # number of values <= lo
+
+    while True:
+        n_cand = 0
+        c_min, c_max = np.inf, -np.inf
+        for b0 in range(0, len(signal), block_size):
+            block = np.asarray(signal[b0:b0 + block_size])
+            cand = block[(block > lo) & (block <= hi)]
+            if cand.size:
+                n_cand += cand.size
+                c_min = min(c_min, float(cand.min()))
+                c_max = max(c_max, float(cand.max()))
+
+        if c_min == c_max:
+            return c_min
+
+        if n_cand <= block_size:
+            parts = []
+            for b0 in range(0, len(signal), block_size):
+                block = np.asarray(signal[b0:b0 + block_size])
+                parts.append(block[(block > lo) & (block <= hi)])
+            cand = np.concatenate(parts)
+            return float(np.partition(cand, k - below)[k - below])
+
+        edges = np.linspace(c_min, c_max, n_bins + 1)
+        edges[0] = np.nextafter(c_min, -np.inf)
+        counts = np.zeros(n_bins, dtype=np.int64)
+        for b0 in range(0, len(signal), block_size):
+            block = np.asarray(signal[b0:b0 + block_size])
+            cand = block[(block > lo) & (block <= hi)]
+            idx = np.searchsorted(edges, cand, side="left") - 1
+            counts += np.bincount(np.clip(idx, 0, n_bins - 1), minlength=n_bins)
+
+        cum = below + np.cumsum(counts)
+        b = int(np.searchsorted(cum, k + 1, side="left"))
+        below = int(cum[b - 1]) if b > 0 else below
+        lo, hi = float(edges[b]), float(edges[b + 1])
+
+
+def _source_signature(path: Path) -> dict:
+    """Size and modification time used to detect stale conversions."""
+    st = path.stat()
+    return {"path": str(path.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
@@ -1,9 +1,35 @@
 # SPDX-License-Identifier: Apache-2.0
 """ECG signal processing: filtering and R-peak detection."""
 
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks
-from typing import Optional
+from scipy.ndimage import median_filter, uniform_filter1d
+from scipy.signal import butter, filtfilt, find_peaks, firwin
+from typing import Optional, Sequence, Union
+
+
+# signal dtypes of the pipeline (signal.dtype in config.yaml)
+SIGNAL_DTYPES = ("float64", "float32")
+
+
+def signal_dtype(name: Union[str, np.dtype, type, None] = "float64") -> np.dtype:
+    """
+    Resolve a signal dtype setting.
+
+    Args:
+        name: "float64" (default) or "float32", or the NumPy dtype itself
+
+    Returns:
+        np.dtype: The dtype
+
+    Raises:
+        ValueError: If the dtype is not one of SIGNAL_DTYPES
+    """
+    dtype = np.dtype(name or "float64")
+    if dtype.name not in SIGNAL_DTYPES:
+        raise ValueError(f"Unsupported signal dtype '{dtype.name}' (expected one of {SIGNAL_DTYPES})")
+    return dtype
 
 
 def bandpass_filter(
@@ -11,20 +37,23 @@ def bandpass_filter(
     fs: int,
     lowcut: float = 0.5,
     highcut: float = 40.0,
-    order: int = 4
+    order: int = 4,
+    axis: int = -1
 ) -> np.ndarray:
     """
     Apply Butterworth bandpass filter to ECG signal.
 
     Args:
-        signal: Input ECG signal
+        signal: Input ECG signal, or a 2-D (n_windows, n_samples) matrix of windows
         fs: Sampling frequency in Hz
         lowcut: Low cutoff frequency in Hz (default: 0.5)
         highcut: High cutoff frequency in Hz (default: 40.0)
         order: Filter order (default: 4)
+        axis: Time axis (default: -1, i.e. along each row of a window matrix)
 
     Returns:
-        np.ndarray: Filtered signal
+        np.ndarray: Filtered signal (same shape as the input; float32 for
+            float32 input, float64 otherwise)
     """
     nyquist = fs / 2
     low = lowcut / nyquist
@@ -37,8 +66,12 @@ def bandpass_filter(
         high = 0.999
 
     b, a = butter(order, [low, high], btype='band')
-    filtered = filtfilt(b, a, signal)
+    filtered = filtfilt(b, a, signal, axis=axis)
 
+    if np.asarray(signal).dtype == np.float32:
+        # The IIR recursion accumulates in float64 (a float32 recursion moves
+        # R-peaks by tens of ms at high rates); only the result is float32
+        return filtered.astype(np.float32)
     return filtered
 
 
@@ -68,43 +101,76 @@ def remove_baseline_wander(
     return filtfilt(b, a, signal)
 
 
-def detect_r_peaks(
+def qrs_energy(
     signal: np.ndarray,
     fs: int,
-    min_rr_sec: float = 0.3,
-    max_rr_sec: float = 2.0
+    axis: int = -1
 ) -> np.ndarray:
     """
-    Detect R-peaks using derivative-based method (simplified Pan-Tompkins).
+    QRS enhancement of detect_r_peaks(): derivative, squaring and 150 ms
+    moving-window integration.
 
     Args:
-        signal: Filtered ECG signal
+        signal: Filtered ECG signal, or a 2-D (n_windows, n_samples) matrix of windows
         fs: Sampling frequency in Hz
-        min_rr_sec: Minimum RR interval in seconds (default: 0.3)
-        max_rr_sec: Maximum RR interval in seconds (default: 2.0)
+        axis: Time axis (default: -1)
 
     Returns:
-        np.ndarray: Indices of detected R-peaks
+        np.ndarray: Integrated QRS energy, one sample shorter than the input along axis
     """
     # Differentiate
-    diff_signal = np.diff(signal)
+    diff_signal = np.diff(signal, axis=axis)
 
     # Square to emphasize QRS complex
     squared = diff_signal ** 2
 
-    # Moving window integration
+    # Moving window integration (centred like np.convolve(..., mode='same'))
     window_size = int(0.15 * fs)  # 150ms window
     if window_size < 1:
         window_size = 1
-    integrated = np.convolve(
-        squared,
-        np.ones(window_size) / window_size,
-        mode='same'
-    )
+    return uniform_filter1d(squared, size=window_size, axis=axis, mode="constant", cval=0.0)
+
+
+def detect_r_peaks(
+    signal: np.ndarray,
+    fs: int,
+    min_rr_sec: float = 0.3,
+    max_rr_sec: float = 2.0
+):
+    """
+    Detect R-peaks using derivative-based method (simplified Pan-Tompkins).
+
+    A 2-D (n_windows, n_samples) matrix is enhanced in one call along axis 1;
+    peaks are then picked per window.
+
+    Args:
+        signal: Filtered ECG signal, or a 2-D matrix of windows
+        fs: Sampling frequency in Hz
+        min_rr_sec: Minimum RR interval in seconds (default: 0.3)
+        max_rr_sec: Maximum RR interval in seconds (default: 2.0)
+
+    Returns:
+        np.ndarray: Indices of detected R-peaks (a list of arrays, one per
+            window, for 2-D input)
+    """
+    signal = np.asarray(signal)
+    integrated = qrs_energy(signal, fs, axis=-1)
+    if integrated.ndim == 2:
+        return [_pick_r_peaks(row, fs, min_rr_sec, max_rr_sec) for row in integrated]
+    return _pick_r_peaks(integrated, fs, min_rr_sec, max_rr_sec)
 
+
+def _pick_r_peaks(
+    integrated: np.ndarray,
+    fs: int,
+    min_rr_sec: float,
+    max_rr_sec: float
+) -> np.ndarray:
+    """Peak picking on the integrated QRS energy of one signal."""
     # Find peaks with minimum distance
     min_distance = int(min_rr_sec * fs)
-    height_threshold = np.mean(integrated) + 0.5 * np.std(integrated)
+    # accumulate in float64 (also for float32 signals)
+    height_threshold = np.mean(integrated, dtype=np.float64) + 0.5 * np.std(integrated, dtype=np.float64)
 
     peaks, properties = find_peaks(
         integrated,
@@ -128,6 +194,144 @@ def detect_r_peaks(
     return peaks
 
 
+# anti-alias FIR of detect_r_peaks_multirate(): taps per decimation factor (odd)
+# (7 * q taps: flat to ~0.3 * detection_fs, >= 54 dB down above 0.75 * detection_fs)
+DECIMATION_TAPS_PER_FACTOR = 7
+
+# measured break-even of detect_r_peaks_multirate() against detect_r_peaks():
+# below this rate or length the full-rate detector is as fast or faster
+MULTIRATE_MIN_FS = 700.0
+MULTIRATE_MIN_SEC = 180.0
+
+
+@lru_cache(maxsize=None)
+def _decimation_taps(q: int, dtype: str) -> np.ndarray:
+    """Anti-alias FIR of _decimate_fir() as an (m, q) matrix of polyphase slices (read-only)."""
+    h = firwin(DECIMATION_TAPS_PER_FACTOR * q, 1.0 / q).astype(dtype).reshape(-1, q)
+    h.flags.writeable = False
+    return h
+
+
+def _decimate_fir(signal: np.ndarray, q: int) -> np.ndarray:
+    """
+    Low-pass (windowed-sinc FIR, cut-off at the new Nyquist rate) and keep every q-th sample.
+
+    Only the retained outputs are computed: the signal is viewed as rows of q
+    samples, all q-tap slices of the filter are applied to every row in one
+    matrix product, and the partial sums are added with a shift of one row
+    per slice. Output k is centred on input sample k * q + (q - 1) / 2, like
+    a q-sample block average.
+    """
+    dtype = signal.dtype if np.issubdtype(signal.dtype, np.floating) else np.dtype(np.float64)
+    h = _decimation_taps(q, dtype.name)
+    m = len(h)
+    n = len(signal) - len(signal) % q
+    blocks = np.asarray(signal[:n], dtype=dtype).reshape(-1, q)
+    # partial[r, i] = blocks[r] @ h[i]
+    partial = blocks @ h.T
+
+    # low[k] = sum_i partial[k + i - pad, i] (symmetric taps, zero outside the signal)
+    n_out, pad = len(blocks), m // 2
+    low = np.zeros(n_out + 2 * pad, dtype=np.float64)
+    for i in range(m):
+        low[2 * pad - i:2 * pad - i + n_out] += partial[:, i]
+    return low[pad:pad + n_out]
+
+
+def detect_r_peaks_multirate(
+    signal: np.ndarray,
+    fs: int,
+    detection_fs: float = 50.0,
+    min_rr_sec: float = 0.3,
+    max_rr_sec: float = 2.0,
+    min_fs: float = MULTIRATE_MIN_FS,
+    min_duration_sec: float = MULTIRATE_MIN_SEC
+) -> np.ndarray:
+    """
+    Detect R-peaks with a decimate-detect-refine scheme for high sampling rates.
+
+    The signal is low-pass filtered (7 * q-tap windowed-sinc FIR) and
+    decimated to about detection_fs, candidate beats are found there with
+    detect_r_peaks(), and each candidate is refined on the full-rate signal by
+    locating the maximum of the same QRS energy envelope within a small
+    neighbourhood.
+
+    The input should be band-limited below detection_fs / 2 (e.g. the 20 Hz
+    band-pass with detection_fs=50). Then beats agree with the full-rate
+    detector, mostly to within one sample. Noise above detection_fs / 2 is
+    removed before detection, so on noisy input with a wider band the
+    full-rate detector's extra noise peaks are not reproduced.
+
+    Below min_fs or min_duration_sec (where it is not faster) the signal goes
+    to detect_r_peaks() unchanged.
+
+    Args:
+        signal: Filtered ECG signal
+        fs: Sampling frequency in Hz
+        detection_fs: Target detection rate in Hz (default: 50.0)
+        min_rr_sec: Minimum RR interval in seconds (default: 0.3)
+        max_rr_sec: Maximum RR interval in seconds (default: 2.0)
+        min_fs: Lowest sampling rate to decimate (default: MULTIRATE_MIN_FS)
+        min_duration_sec: Shortest signal to decimate (default: MULTIRATE_MIN_SEC)
+
+    Returns:
+        np.ndarray: Indices of detected R-peaks (at the full sampling rate)
+    """
+    signal = np.asarray(signal)
+    q = int(fs // detection_fs) if detection_fs else 1
+    if q < 2 or len(signal) < 64 * q or fs < min_fs or len(signal) < min_duration_sec * fs:
+        return detect_r_peaks(signal, fs, min_rr_sec=min_rr_sec, max_rr_sec=max_rr_sec)
+
+    # Anti-alias decimation
+    n = len(signal)
+    low = _decimate_fir(signal, q)
+
+    # Detect candidates at the low rate
+    candidates = detect_r_peaks(low, fs / q, min_rr_sec=min_rr_sec, max_rr_sec=max_rr_sec)
+    if len(candidates) == 0:
+        return candidates
+
+    # Refine on the full-rate QRS energy envelope (same window as detect_r_peaks)
+    window_size = max(1, int(0.15 * fs))
+    r = q + window_size // 2            # search radius in full-rate samples
+    centers = candidates.astype(np.intp) * q
+    peaks = np.empty_like(centers)
+
+    b = window_size - 1 - (window_size - 1) // 2
+    seg_len = 2 * r + window_size + 1
+    start = centers - r - b
+    inner = (start >= 0) & (start + seg_len <= n)
+
+    if np.any(inner):
+        # Gather every neighbourhood as a row (zero-copy windows, one gather)
+        seg = np.lib.stride_tricks.sliding_window_view(signal, seg_len)[start[inner]]
+        energy = np.diff(seg, axis=1)
+        csum = np.cumsum(np.square(energy, out=energy), axis=1, dtype=np.float64)
+        integrated = csum[:, window_size - 1:].copy()
+        integrated[:, 1:] -= csum[:, :-window_size]
+        peaks[inner] = centers[inner] - r + np.argmax(integrated, axis=1)
+
+    for k in np.flatnonzero(~inner):
+        peaks[k] = _refine_peak(signal, int(centers[k]), r, window_size)
+
+    return np.unique(peaks)
+
+
+def _refine_peak(signal: np.ndarray, center: int, radius: int, window_size: int) -> int:
+    """Locate the QRS energy maximum near one candidate (edge-safe version)."""
+    n = len(signal)
+    a = (window_size - 1) // 2
+    b = window_size - 1 - a
+    lo, hi = max(0, center - radius), min(n - 2, center + radius)
+    m0, m1 = max(0, lo - b), min(n - 2, hi + a)
+
+    csum = np.concatenate(([0.0], np.cumsum(np.diff(signal[m0:m1 + 2]) ** 2, dtype=np.float64)))
+    i = np.arange(lo, hi + 1)
+    s0 = np.clip(i - b, m0, m1 + 1) - m0
+    s1 = np.clip(i + a + 1, m0, m1 + 1) - m0
+    return int(lo + np.argmax(csum[s1] - csum[s0]))
+
+
 def compute_rr_intervals(
     r_peaks: np.ndarray,
     fs: int
@@ -171,51 +375,343 @@ def remove_ectopic_beats(
     # Compute percentage differences
     rr_diff = np.abs(np.diff(rr_intervals)) / rr_intervals[:-1]
 
-    # Create mask for valid intervals
+    # A jump marks both adjacent intervals as potentially invalid
+    jump = rr_diff > threshold
     valid_mask = np.ones(len(rr_intervals), dtype=bool)
-
-    for i in range(len(rr_diff)):
-        if rr_diff[i] > threshold:
-            # Mark both adjacent intervals as potentially invalid
-            valid_mask[i] = False
-            if i + 1 < len(valid_mask):
-                valid_mask[i + 1] = False
+    valid_mask[:-1] &= ~jump
+    valid_mask[1:] &= ~jump
 
     return rr_intervals[valid_mask]
 
 
+# artifact classes of classify_rr_artifacts(); the label of class c is ARTIFACT_LABELS[c]
+ARTIFACT_NORMAL, ARTIFACT_ECTOPIC, ARTIFACT_MISSED, ARTIFACT_EXTRA, ARTIFACT_LONG, ARTIFACT_SHORT = range(6)
+ARTIFACT_LABELS = ("normal", "ectopic", "missed", "extra", "long", "short")
+
+
+def _rr_reference(rr: np.ndarray, window: int) -> np.ndarray:
+    """Rolling median of the RR series (the local 'expected' interval)."""
+    return median_filter(rr, size=window, mode="nearest")
+
+
+def classify_rr_artifacts(
+    rr_intervals: np.ndarray,
+    threshold: float = 0.2,
+    window: int = 11
+) -> np.ndarray:
+    """
+    Classify every RR interval against the rolling median of its neighbours.
+
+    With ref the rolling median over `window` intervals:
+
+    - ectopic: a short interval followed by a long one (premature beat and
+      compensatory pause); both intervals are flagged
+    - missed: about k * ref for k >= 2 (undetected beats)
+    - extra: short, and adding a neighbour gives about ref (a false beat
+      split one interval in two)
+    - long / short: any other deviation of more than threshold * ref
+
+    All tests are array operations over the whole series, and the rolling
+    median has a fixed window, so the cost grows linearly with the length
+    (day-long series included).
+
+    Args:
+        rr_intervals: RR intervals in ms
+        threshold: Relative deviation from the rolling median that counts
+            as an artifact (default: 0.2 = 20%)
+        window: Rolling-median window in intervals
+
+    Returns:
+        np.ndarray: int8 class per interval (ARTIFACT_NORMAL ... ARTIFACT_SHORT,
+            named in ARTIFACT_LABELS)
+    """
+    rr = np.asarray(rr_intervals, dtype=np.float64)
+    labels = np.zeros(len(rr), dtype=np.int8)
+    if len(rr) < 3:
+        return labels
+
+    ref = _rr_reference(rr, window)
+    ratio = rr / ref
+    short = ratio < 1.0 - threshold
+    long = ratio > 1.0 + threshold
+
+    labels[short] = ARTIFACT_SHORT
+    labels[long] = ARTIFACT_LONG
+
+    pair = rr[:-1] + rr[1:]
+    merges_next = np.r_[np.abs(pair - ref[:-1]) < threshold * ref[:-1], False]
+    merges_prev = np.r_[False, np.abs(pair - ref[1:]) < threshold * ref[1:]]
+    labels[short & (merges_next | merges_prev)] = ARTIFACT_EXTRA
+
+    k = np.rint(ratio)
+    labels[long & (k >= 2) & (np.abs(ratio - k) < threshold)] = ARTIFACT_MISSED
+
+    ectopic = short[:-1] & long[1:]
+    labels[np.r_[ectopic, False] | np.r_[False, ectopic]] = ARTIFACT_ECTOPIC
+    return labels
+
+
+def correct_rr_artifacts(
+    rr_intervals: np.ndarray,
+    labels: Optional[np.ndarray] = None,
+    threshold: float = 0.2,
+    window: int = 11
+) -> np.ndarray:
+    """
+    Correct RR artifacts instead of deleting them.
+
+    - extra: the false beat is removed, i.e. the interval is merged with the
+      neighbour whose sum is closer to the rolling median
+    - missed: the interval is split into k = round(rr / ref) equal intervals
+    - ectopic / long / short: replaced by linear interpolation between the
+      nearest normal intervals
+
+    Merging and splitting keep the total duration, so later beats keep
+    their time positions. Runs in linear time like classify_rr_artifacts().
+
+    Args:
+        rr_intervals: RR intervals in ms
+        labels: Classes from classify_rr_artifacts() (computed if None)
+        threshold: See classify_rr_artifacts()
+        window: See classify_rr_artifacts()
+
+    Returns:
+        np.ndarray: Corrected RR intervals (its length changes by the number
+            of merged and inserted beats)
+    """
+    rr = np.asarray(rr_intervals, dtype=np.float64)
+    if len(rr) < 3:
+        return rr.copy()
+    if labels is None:
+        labels = classify_rr_artifacts(rr, threshold, window)
+    labels = np.asarray(labels)
+    ref = _rr_reference(rr, window)
+
+    # merge: drop the beat between an extra interval and its partner
+    extra = np.flatnonzero(labels == ARTIFACT_EXTRA)
+    with np.errstate(invalid="ignore"):
+        err_next = np.abs(rr[np.minimum(extra + 1, len(rr) - 1)] + rr[extra] - ref[extra])
+        err_prev = np.abs(rr[np.maximum(extra - 1, 0)] + rr[extra] - ref[extra])
+    err_next[extra == len(rr) - 1] = np.inf
+    err_prev[extra == 0] = np.inf
+    dropped = np.zeros(len(rr) - 1, dtype=bool)
+    dropped[np.where(err_next <= err_prev, extra, extra - 1)] = True
+
+    starts = np.flatnonzero(np.r_[True, ~dropped])
+    merged = np.add.reduceat(rr, starts)
+    merged_labels = labels[starts].copy()
+    merged_labels[np.diff(np.r_[starts, len(rr)]) > 1] = ARTIFACT_NORMAL
+    merged_ref = ref[starts]
+
+    # split: missed intervals into k equal parts
+    missed = merged_labels == ARTIFACT_MISSED
+    k = np.where(missed, np.maximum(2, np.rint(merged / merged_ref)), 1).astype(np.int64)
+    out = np.repeat(merged / k, k)
+    out_labels = np.repeat(np.where(missed, ARTIFACT_NORMAL, merged_labels), k)
+
+    # interpolate the remaining artifacts from the normal intervals
+    good = out_labels == ARTIFACT_NORMAL
+    if good.any() and not good.all():
+        bad = np.flatnonzero(~good)
+        out[bad] = np.interp(bad, np.flatnonzero(good), out[good])
+    return out
+
+
 def process_signal(
     ecg_data: dict,
     filter_low: float = 0.5,
     filter_high: float = 40.0,
-    remove_ectopic: bool = True
+    remove_ectopic: bool = True,
+    detection_fs: Optional[float] = None,
+    fuse_leads: bool = False,
+    min_leads: Optional[int] = None,
+    correct_artifacts: bool = False
 ) -> dict:
     """
     Complete signal processing pipeline.
 
+    A multi-lead (n_samples, n_channels) signal is filtered once along the
+    time axis for all channels; R-peaks are then detected per channel.
+
+    A float32 signal stays float32 through filtering and R-peak detection;
+    RR intervals and features are always float64. The
+    top-level result uses the peaks of lead 0, or the peaks fused across
+    leads (see fuse_r_peaks) if fuse_leads is set.
+
     Args:
         ecg_data: Dictionary from load_ecg() with 'signal' and 'sampling_rate'
         filter_low: Low cutoff frequency in Hz
         filter_high: High cutoff frequency in Hz
         remove_ectopic: Whether to remove ectopic beats
+        detection_fs: If set, detect R-peaks at this lower rate and refine them
+            at full rate (see detect_r_peaks_multirate)
+        fuse_leads: Multi-lead only: use peaks confirmed by several leads
+        min_leads: Leads that must agree on a fused peak (default: majority)
+        correct_artifacts: Correct RR artifacts (merge extra beats, split missed
+            ones, interpolate ectopic beats; see correct_rr_artifacts) instead
+            of removing ectopic beats
 
     Returns:
         dict: Contains 'filtered_signal', 'r_peaks', 'rr_intervals', 'n_beats'
+            (plus 'n_channels' and 'leads', one such dict per channel, for
+            multi-lead input)
     """
-    signal = ecg_data["signal"]
+    signal = np.asarray(ecg_data["signal"])
     fs = ecg_data["sampling_rate"]
 
+    if signal.ndim == 2:
+        return _process_multi_lead(signal, fs, filter_low, filter_high, remove_ectopic,
+                                   detection_fs, fuse_leads, min_leads, correct_artifacts)
+
     # Apply bandpass filter
     filtered = bandpass_filter(signal, fs, filter_low, filter_high)
 
     # Detect R-peaks
-    r_peaks = detect_r_peaks(filtered, fs)
+    if detection_fs:
+        r_peaks = detect_r_peaks_multirate(filtered, fs, detection_fs=detection_fs)
+    else:
+        r_peaks = detect_r_peaks(filtered, fs)
+
+    return _processed_result(filtered, r_peaks, fs, remove_ectopic, correct_artifacts)
+
+
+def _process_multi_lead(
+    signal: np.ndarray,
+    fs: int,
+    filter_low: float,
+    filter_high: float,
+    remove_ectopic: bool,
+    detection_fs: Optional[float],
+    fuse_leads: bool,
+    min_leads: Optional[int],
+    correct_artifacts: bool
+) -> dict:
+    """process_signal() for an (n_samples, n_channels) signal."""
+    filtered = bandpass_filter(signal, fs, filter_low, filter_high, axis=0)
 
+    if detection_fs:
+        peaks = [detect_r_peaks_multirate(filtered[:, c], fs, detection_fs=detection_fs)
+                 for c in range(filtered.shape[1])]
+    else:
+        # channels as rows: QRS enhancement in one call along the time axis
+        peaks = detect_r_peaks(filtered.T, fs)
+
+    leads = [_processed_result(filtered[:, c], p, fs, remove_ectopic, correct_artifacts)
+             for c, p in enumerate(peaks)]
+    r_peaks = fuse_r_peaks(peaks, fs, min_leads=min_leads) if fuse_leads else peaks[0]
+
+    result = _processed_result(filtered, r_peaks, fs, remove_ectopic, correct_artifacts)
+    result["n_channels"] = filtered.shape[1]
+    result["leads"] = leads
+    return result
+
+
+def fuse_r_peaks(
+    peaks: Sequence[np.ndarray],
+    fs: int,
+    tolerance_sec: float = 0.05,
+    min_leads: Optional[int] = None
+) -> np.ndarray:
+    """
+    Fuse R-peaks detected on several leads of the same recording.
+
+    Peaks of all leads are merged in time order and grouped into beats:
+    a new beat starts wherever the gap to the previous peak exceeds
+    tolerance_sec. A beat is kept if at least min_leads different leads
+    contributed a peak, and is placed at the median of its peaks. A lead
+    that misses a beat, or fires on noise, is outvoted by the others.
+
+    Args:
+        peaks: R-peak indices of each lead
+        fs: Sampling frequency in Hz
+        tolerance_sec: Maximum spread of one beat's peaks across leads
+        min_leads: Leads that must agree on a beat (default: majority)
+
+    Returns:
+        np.ndarray: Fused R-peak indices
+    """
+    n_leads = len(peaks)
+    if min_leads is None:
+        min_leads = n_leads // 2 + 1
+    lengths = [len(p) for p in peaks]
+    if sum(lengths) == 0:
+        return np.array([], dtype=np.int64)
+
+    all_peaks = np.concatenate([np.asarray(p, dtype=np.int64) for p in peaks])
+    lead = np.repeat(np.arange(n_leads), lengths)
+    order = np.argsort(all_peaks, kind="stable")
+    all_peaks = all_peaks[order]
+    lead = lead[order]
+
+    new_beat = np.r_[True, np.diff(all_peaks) > tolerance_sec * fs]
+    beat = np.cumsum(new_beat) - 1
+    starts = np.flatnonzero(new_beat)
+    counts = np.diff(np.r_[starts, len(all_peaks)])
+
+    # number of distinct leads per beat
+    votes = np.bincount(np.unique(beat * n_leads + lead) // n_leads, minlength=len(starts))
+    median = (all_peaks[starts + (counts - 1) // 2] + all_peaks[starts + counts // 2]) // 2
+    return median[votes >= min_leads]
+
+
+def process_signal_batch(
+    windows: np.ndarray,
+    fs: int,
+    filter_low: float = 0.5,
+    filter_high: float = 40.0,
+    remove_ectopic: bool = True,
+    detection_fs: Optional[float] = None,
+    correct_artifacts: bool = False
+) -> list[dict]:
+    """
+    process_signal() for every row of a (n_windows, n_samples) window matrix.
+
+    Filtering and QRS enhancement run once over the whole matrix along
+    axis 1; the results equal calling process_signal() on each window.
+
+    Args:
+        windows: 2-D matrix of windows (e.g. from sliding_window_matrix())
+        fs: Sampling frequency in Hz
+        filter_low: Low cutoff frequency in Hz
+        filter_high: High cutoff frequency in Hz
+        remove_ectopic: Whether to remove ectopic beats
+        detection_fs: See process_signal()
+        correct_artifacts: See process_signal()
+
+    Returns:
+        list: One process_signal()-style dict per window
+    """
+    windows = np.asarray(windows)
+    if windows.ndim != 2:
+        raise ValueError(f"Expected a 2-D window matrix, got shape {windows.shape}")
+    if len(windows) == 0:
+        return []
+
+    filtered = bandpass_filter(windows, fs, filter_low, filter_high, axis=1)
+
+    if detection_fs:
+        peaks = [detect_r_peaks_multirate(row, fs, detection_fs=detection_fs) for row in filtered]
+    else:
+        peaks = detect_r_peaks(filtered, fs)
+
+    return [_processed_result(f, p, fs, remove_ectopic, correct_artifacts) for f, p in zip(filtered, peaks)]
+
+
+def _processed_result(
+    filtered: np.ndarray,
+    r_peaks: np.ndarray,
+    fs: int,
+    remove_ectopic: bool,
+    correct_artifacts: bool = False
+) -> dict:
+    """RR intervals and summary of one processed signal."""
     # Compute RR intervals
     rr_intervals = compute_rr_intervals(r_peaks, fs)
 
-    # Remove ectopic beats if requested
-    if remove_ectopic and len(rr_intervals) > 0:
+    # Correct artifacts, or remove ectopic beats, if requested
+    if correct_artifacts and len(rr_intervals) > 0:
+        rr_intervals_clean = correct_rr_artifacts(rr_intervals)
+    elif remove_ectopic and len(rr_intervals) > 0:
         rr_intervals_clean = remove_ectopic_beats(rr_intervals)
     else:
         rr_intervals_clean = rr_intervals
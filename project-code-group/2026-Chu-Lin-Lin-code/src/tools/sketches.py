@@ -0,0 +1,253 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Mergeable streaming quantile sketches for robust baseline statistics.
+
+A t-digest summarizes a stream of values by a bounded number of weighted
+centroids, finer near the tails than in the middle. Digests built on
+separate chunks (or in separate worker processes) can be merged, and the
+median, MAD and other quantiles are read from the merged digest. Small
+inputs are kept verbatim, so their statistics are exact.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+# MAD -> standard deviation for normally distributed data
+MAD_TO_STD = 1.4826
+
+
+class TDigest:
+    """
+    Merging t-digest (k1 scale function) over float values.
+
+    Args:
+        compression: Accuracy parameter; the digest holds at most about
+            compression centroids. Inputs of up to this many values are
+            kept verbatim.
+    """
+
+    def __init__(self, compression: float = 200.0):
+        self.compression = float(compression)
+        self._means = np.empty(0)
+        self._weights = np.empty(0)
+        self._buffer: list[np.ndarray] = []
+        self._buffered = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: Iterable[float]) -> "TDigest":
+        """
+        Add values to the digest (non-finite values are ignored).
+
+        Args:
+            values: Scalar or array-like of values.
+
+        Returns:
+            TDigest: self, for chaining.
+        """
+        x = np.asarray(values, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if x.size == 0:
+            return self
+        self._buffer.append(x)
+        self._buffered += x.size
+        self.count += x.size
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        if self._buffered >= 10 * self.compression:
+            self._compress()
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """
+        Fold another digest into this one.
+
+        Args:
+            other: Digest to merge (left unchanged).
+
+        Returns:
+            TDigest: self, for chaining.
+        """
+        other._compress()
+        if other.count == 0:
+            return self
+        self._compress()
+        means = np.concatenate([self._means, other._means])
+        weights = np.concatenate([self._weights, other._weights])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._means, self._weights = self._cluster(means, weights)
+        return self
+
+    def centroids(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the (means, weights) of all centroids, sorted by mean.
+        """
+        self._compress()
+        return self._means.copy(), self._weights.copy()
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the q-quantile (0 <= q <= 1).
+
+        For inputs small enough to be kept verbatim this equals
+        np.quantile(..., method="hazen"), e.g. the exact median for q = 0.5.
+        """
+        self._compress()
+        if self.count == 0:
+            return np.nan
+        return _weighted_quantile(self._means, self._weights, q, self.min, self.max)
+
+    def median(self) -> float:
+        """Estimate the median."""
+        return self.quantile(0.5)
+
+    def mad(self, center: Optional[float] = None) -> float:
+        """
+        Estimate the median absolute deviation around center (default: median).
+
+        The deviations of the centroid means are weighted by the centroid
+        sizes, so the result is exact for uncompressed inputs.
+        """
+        self._compress()
+        if self.count == 0:
+            return np.nan
+        c = self.median() if center is None else float(center)
+        dev = np.abs(self._means - c)
+        order = np.argsort(dev, kind="stable")
+        dev, w = dev[order], self._weights[order]
+        return _weighted_quantile(dev, w, 0.5, dev[0], dev[-1])
+
+    def trimmed(self, lo: float, hi: float) -> "TDigest":
+        """
+        Return a new digest holding only the centroids with lo <= mean <= hi.
+        """
+        self._compress()
+        keep = (self._means >= lo) & (self._means <= hi)
+        out = TDigest(self.compression)
+        if np.any(keep):
+            out._means = self._means[keep]
+            out._weights = self._weights[keep]
+            out.count = int(round(out._weights.sum()))
+            out.min = self.min if keep[0] else float(out._means[0])
+            out.max = self.max if keep[-1] else float(out._means[-1])
+        return out
+
+    def to_dict(self) -> dict:
+        """Serialize to a JSON-compatible dict."""
+        means, weights = self.centroids()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "means": means.tolist(),
+            "weights": weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TDigest":
+        """Rebuild a digest written by to_dict()."""
+        out = cls(d.get("compression", 200.0))
+        out._means = np.asarray(d.get("means", []), dtype=float)
+        out._weights = np.asarray(d.get("weights", []), dtype=float)
+        out.count = int(d.get("count", 0))
+        if out.count:
+            out.min = float(d["min"])
+            out.max = float(d["max"])
+        return out
+
+    def _compress(self) -> None:
+        """Fold buffered values into the centroids."""
+        if not self._buffer:
+            return
+        x = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        means = np.concatenate([self._means, x])
+        weights = np.concatenate([self._weights, np.ones(x.size)])
+        self._means, self._weights = self._cluster(means, weights)
+
+    def _cluster(self, means: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Sort centroids and merge neighbours that fall in the same k1 bin."""
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        if means.size <= self.compression:
+            return means, weights
+
+        total = weights.sum()
+        q_mid = (np.cumsum(weights) - 0.5 * weights) / total
+        k = self.compression / (2.0 * np.pi) * np.arcsin(2.0 * q_mid - 1.0)
+        bins = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+
+        w = np.add.reduceat(weights, starts)
+        m = np.add.reduceat(means * weights, starts) / w
+        return m, w
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float,
+                       lo: float, hi: float) -> float:
+    """Quantile of sorted weighted points, interpolating between centroid midpoints."""
+    total = weights.sum()
+    centers = np.cumsum(weights) - 0.5 * weights
+    t = float(np.clip(q, 0.0, 1.0)) * total
+    x = np.concatenate(([0.0], centers, [total]))
+    y = np.concatenate(([lo], values, [hi]))
+    return float(np.interp(t, x, y))
+
+
+def robust_stats(digest: TDigest, method: str = "robust", z_max: Optional[float] = None) -> dict:
+    """
+    Centre and spread of one metric from its digest.
+
+    Args:
+        digest: Digest of the metric values of all baseline windows.
+        method: 'robust' (median / MAD) or 'median_iqr' (median / IQR).
+        z_max: If set, centroids with |MAD z-score| > z_max are dropped and
+            the statistics are recomputed (robust method only).
+
+    Returns:
+        dict: 'center', 'spread' (standard-deviation equivalent), the raw
+            statistics ('median' plus 'mad' or 'iqr'), 'n' and 'n_outliers'.
+
+    Raises:
+        ValueError: If method is unknown.
+    """
+    if method not in ("robust", "median_iqr"):
+        raise ValueError(f"Unknown robust aggregation method '{method}'")
+
+    n_total = digest.count
+    med = digest.median()
+    if method == "median_iqr":
+        iqr = digest.quantile(0.75) - digest.quantile(0.25)
+        return {
+            "center": med,
+            "spread": iqr / 1.349 if np.isfinite(iqr) else np.nan,
+            "median": med,
+            "iqr": iqr,
+            "n": n_total,
+            "n_outliers": 0,
+        }
+
+    mad = digest.mad(med)
+    if z_max is not None and np.isfinite(mad) and mad > 0:
+        # MAD z-score: 0.6745 * (x - median) / MAD
+        half_width = float(z_max) * mad / 0.6745
+        inliers = digest.trimmed(med - half_width, med + half_width)
+        if inliers.count:
+            digest = inliers
+            med = digest.median()
+            mad = digest.mad(med)
+
+    return {
+        "center": med,
+        "spread": MAD_TO_STD * mad if np.isfinite(mad) else np.nan,
+        "median": med,
+        "mad": mad,
+        "n": digest.count,
+        "n_outliers": n_total - digest.count,
+    }
@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: Apache-2.0
+"""On-disk memoization of pipeline stage outputs.
+
+Each stage output is stored under <root>/<stage>/<key><suffix>. The key is a
+hash of the stage's inputs (usually the keys of the upstream stages it reads)
+and of the config values it uses, so a change to one config section only
+invalidates the stages that depend on it and everything downstream of them.
+Outputs are written to a temporary file and moved into place with
+os.replace, so an interrupted run never leaves a partial entry.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Union
+
+
+logger = logging.getLogger("hrv_agent.stages")
+
+# bump to invalidate every cached stage output after a change to stage code
+STAGE_VERSION = 2
+
+
+def stage_key(stage: str, inputs: Any = None, params: Any = None) -> str:
+    """
+    Content key of one stage output.
+
+    Args:
+        stage: Stage name.
+        inputs: JSON-serializable description of the inputs (e.g. upstream keys).
+        params: JSON-serializable config values the stage depends on.
+
+    Returns:
+        str: 20-character hex digest.
+    """
+    payload = json.dumps(
+        {"stage": stage, "version": STAGE_VERSION, "inputs": inputs, "params": params},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class StageCache:
+    """
+    Directory of memoized stage outputs.
+
+    Args:
+        root: Cache directory (created if missing).
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats: dict[str, dict[str, int]] = {}
+
+    def path(self, stage: str, key: str, suffix: str) -> Path:
+        """Location of a stage output."""
+        return self.root / stage / f"{key}{suffix}"
+
+    def run(self, stage: str, key: str, suffix: str,
+            build: Callable[[Path], None], load: Callable[[Path], Any]) -> Any:
+        """
+        Return a stage output, building it first if it is not cached.
+
+        Args:
+            stage: Stage name (subdirectory).
+            key: Key from stage_key().
+            suffix: File suffix, e.g. '.npy' (temporary files keep it, since
+                np.save/np.savez append it otherwise).
+            build: Writes the output to the given path.
+            load: Reads the output from the given path.
+
+        Returns:
+            Whatever load() returns.
+        """
+        path = self.path(stage, key, suffix)
+        counts = self.stats.setdefault(stage, {"hit": 0, "miss": 0})
+        if path.exists():
+            counts["hit"] += 1
+            logger.debug(f"{stage}: cached {path.name}")
+            return load(path)
+
+        counts["miss"] += 1
+        logger.debug(f"{stage}: building {path.name}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{key}.tmp{os.getpid()}{suffix}")
+        try:
+            build(tmp)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return load(path)
+
+    def merge_stats(self, stats: dict) -> None:
+        """Add hit/miss counts reported by another (e.g. worker) cache."""
+        for stage, counts in stats.items():
+            mine = self.stats.setdefault(stage, {"hit": 0, "miss": 0})
+            for k, v in counts.items():
+                mine[k] = mine.get(k, 0) + v
@@ -0,0 +1,242 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Compact struct-of-arrays storage for per-window metrics.
+
+Each analysed window is one row of a preallocated structured NumPy array
+with fixed-width metric columns. The RR intervals of all windows are packed
+back to back into one shared float buffer; each row holds the offset and
+length of its RR slice. The extended HRV features of every window
+(FEATURE_COLUMNS) sit in a parallel float matrix, one row per window. A
+window therefore costs 72 bytes for its metrics, 160 for its features
+and 8 per RR interval, instead of a dict, a small RR array and dozens of
+boxed floats.
+"""
+
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .extended_features import FEATURE_NAMES
+
+
+WINDOW_DTYPE = np.dtype([
+    ("record", np.int32),       # index into the list of records
+    ("start", np.int64),        # window start (samples)
+    ("end", np.int64),          # window end (samples)
+    ("rr_mean", np.float64),    # mean RR in seconds
+    ("sdnn", np.float64),
+    ("rmssd", np.float64),
+    ("mean_hr_bpm", np.float64),
+    ("lf_hf_ratio", np.float64),
+    ("rr_offset", np.int64),    # first RR interval in the shared buffer
+    ("rr_count", np.int32),     # number of RR intervals
+])
+
+# columns filled from the metrics dict of a window (NaN when missing)
+METRIC_FIELDS = ("mean_hr_bpm", "sdnn", "rmssd", "lf_hf_ratio")
+
+# columns of the per-window feature matrix (extract_extended_features() output)
+FEATURE_COLUMNS = tuple(FEATURE_NAMES)
+
+
+class WindowStore:
+    """
+    Growable table of window metrics backed by a structured array.
+
+    Columns are read with store["sdnn"] (an ndarray view), and
+    store[mask_or_slice] returns a store over a subset of the rows that
+    shares the RR buffer. store.feature("pnn50") reads a column of the
+    feature matrix. A store can be passed wherever a window table DataFrame
+    with the same columns is accepted.
+
+    Args:
+        capacity: Initial number of rows to allocate.
+        rr_capacity: Initial size of the RR buffer (default: 64 per row).
+    """
+
+    __slots__ = ("_rows", "_n", "_rr", "_n_rr", "_feat")
+
+    def __init__(self, capacity: int = 256, rr_capacity: Optional[int] = None):
+        capacity = max(1, int(capacity))
+        self._rows = np.zeros(capacity, dtype=WINDOW_DTYPE)
+        self._feat = np.full((capacity, len(FEATURE_COLUMNS)), np.nan)
+        self._n = 0
+        self._rr = np.empty(max(1, int(rr_capacity or 64 * capacity)), dtype=np.float64)
+        self._n_rr = 0
+
+    # ------------------------------------------------------------------
+    # building
+    # ------------------------------------------------------------------
+    def append(self, record: int, start: int, end: int, rr: np.ndarray,
+               features: Optional[Sequence[float]] = None, **values) -> None:
+        """
+        Add one window.
+
+        Args:
+            record: Record index.
+            start: Window start in samples.
+            end: Window end in samples.
+            rr: RR intervals of the window (copied into the shared buffer).
+            features: Values of FEATURE_COLUMNS, in order (NaN if None).
+            **values: Other WINDOW_DTYPE columns (e.g. rr_mean, sdnn).
+        """
+        rr = np.asarray(rr, dtype=np.float64).ravel()
+        if self._n == len(self._rows):
+            self._rows = np.resize(self._rows, 2 * len(self._rows))
+            grown = np.full((len(self._rows), len(FEATURE_COLUMNS)), np.nan)
+            grown[:self._n] = self._feat[:self._n]
+            self._feat = grown
+        need = self._n_rr + rr.size
+        if need > len(self._rr):
+            grown = np.empty(max(need, 2 * len(self._rr)), dtype=np.float64)
+            grown[:self._n_rr] = self._rr[:self._n_rr]
+            self._rr = grown
+
+        row = self._rows[self._n]
+        row["record"] = record
+        row["start"] = start
+        row["end"] = end
+        for name in ("rr_mean",) + METRIC_FIELDS:
+            row[name] = values.get(name, np.nan)
+        row["rr_offset"] = self._n_rr
+        row["rr_count"] = rr.size
+        if features is not None:
+            self._feat[self._n] = features
+        self._rr[self._n_rr:need] = rr
+        self._n_rr = need
+        self._n += 1
+
+    @classmethod
+    def concatenate(cls, stores: Sequence["WindowStore"],
+                    records: Optional[Iterable[int]] = None) -> "WindowStore":
+        """
+        Join stores into one compact store.
+
+        Args:
+            stores: Stores to join, in order.
+            records: If given, the record index assigned to the rows of each
+                store (e.g. its position in a list of files).
+
+        Returns:
+            WindowStore: New store with its own RR buffer.
+        """
+        parts, rr_parts, feat_parts = [], [], []
+        rr_base = 0
+        records = list(records) if records is not None else [None] * len(stores)
+        for store, rec in zip(stores, records):
+            rows = store.rows.copy()
+            rr = store.rr_buffer
+            # gather the RR slices of these rows (a subset view may skip some)
+            idx = _slice_indices(rows["rr_offset"], rows["rr_count"])
+            rows["rr_offset"] = rr_base + np.cumsum(rows["rr_count"]) - rows["rr_count"]
+            if rec is not None:
+                rows["record"] = rec
+            parts.append(rows)
+            rr_parts.append(rr[idx])
+            feat_parts.append(store.features)
+            rr_base += idx.size
+        return cls._from_arrays(
+            np.concatenate(parts) if parts else np.zeros(0, dtype=WINDOW_DTYPE),
+            np.concatenate(rr_parts) if rr_parts else np.zeros(0),
+            np.concatenate(feat_parts) if feat_parts else None,
+        )
+
+    @classmethod
+    def _from_arrays(cls, rows: np.ndarray, rr: np.ndarray,
+                     features: Optional[np.ndarray] = None) -> "WindowStore":
+        """Wrap existing row, RR and feature arrays without copying (features NaN if None)."""
+        out = cls.__new__(cls)
+        out._rows = rows
+        out._n = len(rows)
+        out._rr = rr
+        out._n_rr = len(rr)
+        out._feat = (np.full((len(rows), len(FEATURE_COLUMNS)), np.nan) if features is None
+                     else np.asarray(features, dtype=np.float64).reshape(len(rows), len(FEATURE_COLUMNS)))
+        return out
+
+    # ------------------------------------------------------------------
+    # access
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, key: Union[str, slice, np.ndarray]):
+        """Column view by name, or a row subset (slice, index or mask) sharing the RR buffer."""
+        if isinstance(key, str):
+            return self.rows[key]
+        return WindowStore._from_arrays(np.atleast_1d(self.rows[key]), self._rr[:self._n_rr],
+                                        self.features[key])
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Structured array of the filled rows (a view)."""
+        return self._rows[:self._n]
+
+    @property
+    def rr_buffer(self) -> np.ndarray:
+        """Shared buffer of all RR intervals (a view)."""
+        return self._rr[:self._n_rr]
+
+    @property
+    def features(self) -> np.ndarray:
+        """(windows, FEATURE_COLUMNS) matrix of the filled rows (a view)."""
+        return self._feat[:self._n]
+
+    def feature(self, name: str) -> np.ndarray:
+        """Column of the feature matrix by name (a view)."""
+        return self.features[:, FEATURE_COLUMNS.index(name)]
+
+    def rr(self, i: int) -> np.ndarray:
+        """RR intervals of row i (a view into the shared buffer)."""
+        row = self.rows[i]
+        off = int(row["rr_offset"])
+        return self._rr[off:off + int(row["rr_count"])]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the filled rows, features and RR intervals."""
+        return self.rows.nbytes + self.features.nbytes + self.rr_buffer.nbytes
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame of the fixed-width columns (one row per window)."""
+        return pd.DataFrame({name: self.rows[name] for name in WINDOW_DTYPE.names})
+
+    # ------------------------------------------------------------------
+    # persistence / pickling
+    # ------------------------------------------------------------------
+    def save(self, path: Union[str, Path]) -> None:
+        """Write rows, features and RR intervals to an .npz file (compacted)."""
+        compact = WindowStore.concatenate([self])
+        np.savez(path, rows=compact.rows, rr=compact.rr_buffer, features=compact.features)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "WindowStore":
+        """Read a store written by save()."""
+        with np.load(path) as z:
+            features = z["features"] if "features" in z.files else None
+            return cls._from_arrays(z["rows"].astype(WINDOW_DTYPE), z["rr"].astype(np.float64), features)
+
+    def __getstate__(self):
+        compact = WindowStore.concatenate([self])
+        return compact.rows, compact.rr_buffer, compact.features
+
+    def __setstate__(self, state):
+        rows, rr, features = state
+        self._rows = rows
+        self._n = len(rows)
+        self._rr = rr
+        self._n_rr = len(rr)
+        self._feat = features
+
+
+def _slice_indices(offsets: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenated arange(offset, offset + count) for every row, without a Python loop."""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    # position within each slice, plus the slice's offset in the buffer
+    within = np.arange(total, dtype=np.int64) - np.repeat(starts, counts)
+    return np.repeat(np.asarray(offsets, dtype=np.int64), counts) + within
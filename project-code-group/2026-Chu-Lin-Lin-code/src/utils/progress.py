@@ -0,0 +1,179 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Progress and throughput reporting for long dataset runs."""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+logger = logging.getLogger("hrv_agent.progress")
+
+
+class ProgressReporter:
+    """
+    Tracks files, windows and samples processed by a dataset run.
+
+    Progress is logged (logger 'hrv_agent.progress') and written to
+    progress.json at most once per interval_sec. Between reports, an update
+    only adds to a few counters and reads the monotonic clock. All updates
+    happen in the parent process, in record order, so the numbers are the
+    same with or without a process pool.
+
+    Args:
+        records: Records of the run (dicts with 'path'); file sizes weight the ETA.
+        outdir: Directory for progress.json (None = log only).
+        interval_sec: Minimum time between two reports.
+        enabled: If False, every method is a no-op.
+    """
+
+    def __init__(self, records: list[dict], outdir: Optional[Path] = None,
+                 interval_sec: float = 2.0, enabled: bool = True):
+        self.enabled = enabled
+        self.records = records
+        self.path = Path(outdir) / "progress.json" if outdir is not None else None
+        self.interval_sec = float(interval_sec)
+
+        self._bytes = [self._file_size(rec.get("path")) for rec in records]
+        self._total_bytes = sum(self._bytes)
+        self._lengths: dict[int, int] = {}
+        self._started = time.monotonic()
+        self._started_at = datetime.now().isoformat(timespec="seconds")
+        self._next_report = self._started + self.interval_sec
+
+        self.files_done = 0
+        self.windows_done = 0
+        self.samples_done = 0          # samples of finished files
+        self._current = -1             # record currently being processed
+        self._current_pos = 0          # last window end in the current record
+
+    @staticmethod
+    def _file_size(path) -> int:
+        try:
+            return Path(path).stat().st_size
+        except (OSError, TypeError):
+            return 0
+
+    # ------------------------------------------------------------------
+    # updates
+    # ------------------------------------------------------------------
+    def set_length(self, record: int, n_samples: int) -> None:
+        """Register the length in samples of a record (when it is loaded)."""
+        if self.enabled:
+            self._lengths[record] = int(n_samples)
+
+    def window_done(self, record: int, end: int) -> None:
+        """
+        Count one finished window.
+
+        Args:
+            record: Record index (non-decreasing across calls).
+            end: Window end in samples.
+        """
+        if not self.enabled:
+            return
+        if record != self._current:
+            self._finish_files(record)
+        self.windows_done += 1
+        self._current_pos = end
+        if time.monotonic() >= self._next_report:
+            self.report()
+
+    def file_done(self, record: int, n_windows: int = 0, n_samples: Optional[int] = None) -> None:
+        """
+        Mark a record (and all before it) as finished.
+
+        Args:
+            record: Record index.
+            n_windows: Windows of the record not yet counted via window_done().
+            n_samples: Length of the record, if not registered via set_length().
+        """
+        if not self.enabled:
+            return
+        if n_samples is not None:
+            self._lengths[record] = int(n_samples)
+        self.windows_done += int(n_windows)
+        self._finish_files(record + 1)
+        if time.monotonic() >= self._next_report:
+            self.report()
+
+    def close(self) -> None:
+        """Mark every file as finished and write the final report."""
+        if not self.enabled:
+            return
+        self._finish_files(len(self.records))
+        self.report(status="done")
+
+    def _finish_files(self, upto: int) -> None:
+        """Records before index upto are complete."""
+        upto = min(upto, len(self.records))
+        for i in range(max(self._current, self.files_done), upto):
+            self.samples_done += self._lengths.get(i, self._current_pos if i == self._current else 0)
+        self.files_done = max(self.files_done, upto)
+        self._current = upto
+        self._current_pos = 0
+
+    # ------------------------------------------------------------------
+    # reporting
+    # ------------------------------------------------------------------
+    def snapshot(self, status: str = "running") -> dict:
+        """Current progress as a JSON-compatible dict."""
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        n_files = len(self.records)
+        samples = self.samples_done + (self._current_pos if self._current < n_files else 0)
+
+        # fraction of work done, by file size when known, else by file count
+        if self._total_bytes > 0:
+            done = sum(self._bytes[:self.files_done])
+            if self.files_done < n_files and self._current == self.files_done:
+                length = self._lengths.get(self._current)
+                if length:
+                    done += self._bytes[self._current] * min(1.0, self._current_pos / length)
+            fraction = done / self._total_bytes
+        else:
+            fraction = self.files_done / n_files if n_files else 1.0
+        if status == "done":
+            fraction = 1.0
+        eta = elapsed * (1.0 - fraction) / fraction if fraction > 0 else None
+
+        current = None
+        if self.files_done < n_files:
+            current = str(self.records[self.files_done].get("path"))
+
+        return {
+            "status": status,
+            "started_at": self._started_at,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_sec": round(elapsed, 3),
+            "files_total": n_files,
+            "files_done": self.files_done,
+            "files_pending": n_files - self.files_done,
+            "current_file": current,
+            "windows_done": self.windows_done,
+            "samples_done": samples,
+            "windows_per_sec": round(self.windows_done / elapsed, 3),
+            "samples_per_sec": round(samples / elapsed, 1),
+            "fraction_done": round(fraction, 4),
+            "eta_sec": round(eta, 1) if eta is not None else None,
+        }
+
+    def report(self, status: str = "running") -> dict:
+        """Log the current progress and rewrite progress.json."""
+        snap = self.snapshot(status)
+        eta = snap["eta_sec"]
+        logger.info(
+            f"{snap['files_done']}/{snap['files_total']} files | "
+            f"{snap['windows_done']} windows ({snap['windows_per_sec']:.1f}/s) | "
+            f"{snap['samples_per_sec']:.0f} samples/s | "
+            f"ETA {'-' if eta is None else f'{eta:.0f}s'}"
+        )
+        if self.path is not None:
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(snap, fh, indent=2)
+            os.replace(tmp, self.path)
+        self._next_report = time.monotonic() + self.interval_sec
+        return snap
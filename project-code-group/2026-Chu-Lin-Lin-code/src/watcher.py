@@ -0,0 +1,367 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Watch-folder ingestion for the dataset evaluation.
+
+DatasetWatcher polls the data_dir/{person}/{state}/ tree, queues new or
+changed CSV files and processes them on a bounded pool of worker processes.
+Only the files that changed are run through the signal chain; their window
+metrics are cached, and the baseline, pass rates and per-file details of the
+affected (person, state) groups are refreshed from those caches. The queue
+and the cache index live on disk, so work interrupted by a shutdown or crash
+is resumed on the next start.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .orchestrator import HRVAnalysisOrchestrator
+from .tools.aggregates import DATASET_SUMMARY_NAME, aggregate_dataset, write_dataset_summary
+from .tools.feature_store import FEATURE_STORE_NAME, write_feature_store
+from .tools.window_store import WindowStore
+
+
+logger = logging.getLogger("hrv_agent.watcher")
+
+
+def _file_signature(path: Path) -> list:
+    """[size, mtime_ns] of a file, used to detect new or changed recordings."""
+    st = Path(path).stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _write_json_atomic(path: Path, obj) -> None:
+    """Write JSON via a temporary file and os.replace, so readers never see partial files."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(obj, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _ignore_sigint() -> None:
+    """Pool initializer: let the parent process handle Ctrl-C and shut down cleanly."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _process_record(config: dict, rec: dict) -> WindowStore:
+    """Worker task: window metrics table of one recording."""
+    orchestrator = HRVAnalysisOrchestrator()
+    cfg = orchestrator._dataset_settings(config)
+    return orchestrator._window_table(
+        [rec], cfg["fs"], cfg["win"], cfg["stride"],
+        cfg["filter_low"], cfg["filter_high"], cfg["detection_fs"], cfg["ooc"], dtype=cfg["dtype"],
+    )
+
+
+class DatasetWatcher:
+    """
+    Long-running watcher that keeps the dataset outputs up to date.
+
+    Outputs (baselines.json, pass_rates.csv, per_file/*.json,
+    window_features.npz, dataset_summary.json) are the same files, with the same content, that
+    HRVAnalysisOrchestrator.run_dataset() writes for the current state of the
+    data directory.
+
+    Args:
+        config: Parsed config.yaml.
+        poll_interval: Seconds between scans (default: processing.watch.poll_interval_sec).
+        workers: Maximum number of files processed concurrently
+            (default: processing.watch.workers).
+        state_dir: Directory for the durable queue and window caches
+            (default: processing.watch.state_dir or <output.dir>/watch).
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        poll_interval: Optional[float] = None,
+        workers: Optional[int] = None,
+        state_dir: Optional[str] = None
+    ):
+        self.config = config
+        self.orchestrator = HRVAnalysisOrchestrator()
+        self.cfg = self.orchestrator._dataset_settings(config)
+
+        watch_cfg = config.get("processing", {}).get("watch", {}) or {}
+        self.poll_interval = float(poll_interval if poll_interval is not None
+                                   else watch_cfg.get("poll_interval_sec", 10.0))
+        self.workers = max(1, int(workers if workers is not None else watch_cfg.get("workers", 2)))
+
+        state_dir = Path(state_dir or watch_cfg.get("state_dir") or (self.cfg["outdir"] / "watch"))
+        if not state_dir.is_absolute():
+            repo_root = Path(__file__).resolve().parent.parent
+            state_dir = (repo_root / state_dir).resolve()
+        self.state_dir = state_dir
+        self.table_dir = state_dir / "windows"
+        self.table_dir.mkdir(parents=True, exist_ok=True)
+        self.queue_path = state_dir / "queue.json"
+        self.index_path = state_dir / "index.json"
+
+        # durable state: pending work and processed files
+        self.queue: list[dict] = self._load_json(self.queue_path, [])
+        self.index: dict[str, dict] = self._load_json(self.index_path, {})
+
+        self._stop = threading.Event()
+        self._order: list[str] = []          # file keys in scan order
+        self._last_seen: dict[str, list] = {}
+        self._dirty = {(p, s) for p in self.cfg["persons"] for s in self.cfg["states"]}
+        self.baselines: dict = {p: {} for p in self.cfg["persons"]}
+        self.file_results: dict[str, tuple[int, int]] = {}   # key -> (n_windows, n_pass)
+
+    # ------------------------------------------------------------------
+    # control
+    # ------------------------------------------------------------------
+    def stop(self) -> None:
+        """Request a graceful shutdown (in-flight files are finished first)."""
+        self._stop.set()
+
+    def run(self, until_idle: bool = False) -> dict:
+        """
+        Scan, process and refresh outputs until stop() is called.
+
+        Args:
+            until_idle: Return as soon as no file is queued, settling or in flight.
+
+        Returns:
+            dict: Status with the output directory and number of files processed.
+        """
+        handlers = self._install_signal_handlers()
+        n_done = 0
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_sigint) as pool:
+                in_flight = {}  # future -> queue item
+                while not self._stop.is_set():
+                    settling = self.scan()
+
+                    # bounded pool: at most `workers` files in flight
+                    busy = {item["key"] for item in in_flight.values()}
+                    for item in self.queue:
+                        if len(in_flight) >= self.workers:
+                            break
+                        if item["key"] not in busy:
+                            rec = {"person": item["person"], "state": item["state"], "path": Path(item["path"])}
+                            # snapshot: scan() may update the queued signature meanwhile
+                            in_flight[pool.submit(_process_record, self.config, rec)] = dict(item)
+                            busy.add(item["key"])
+
+                    if in_flight:
+                        done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            n_done += self._finish(in_flight.pop(fut), fut)
+                    if self._dirty:
+                        self.refresh()
+
+                    if until_idle and not in_flight and not self.queue and not settling:
+                        break
+                    if not in_flight:
+                        self._stop.wait(self.poll_interval)
+
+                # graceful shutdown: finish what is running, leave the rest queued
+                for fut in list(in_flight):
+                    n_done += self._finish(in_flight.pop(fut), fut)
+                if self._dirty:
+                    self.refresh()
+        finally:
+            self._restore_signal_handlers(handlers)
+
+        return {"status": "success", "outdir": str(self.cfg["outdir"]), "n_processed": n_done}
+
+    # ------------------------------------------------------------------
+    # queue
+    # ------------------------------------------------------------------
+    def scan(self) -> int:
+        """
+        Compare the data directory with the index and update the durable queue.
+
+        A file is queued once its signature (size, mtime) is unchanged between
+        two consecutive scans, so files that are still being copied are not
+        picked up half-written. Deleted files are dropped from the outputs, and
+        a file that failed is not queued again until its signature changes.
+
+        Returns:
+            int: Number of new or changed files that are still settling.
+        """
+        records = self.orchestrator._scan_dataset_from_config(self.cfg["data_dir"], self.cfg["persons_cfg"])
+        self._order = [str(rec["path"]) for rec in records]
+        present = set(self._order)
+
+        settling = 0
+        changed = False
+        seen = {}
+        for rec in records:
+            key = str(rec["path"])
+            try:
+                sig = _file_signature(rec["path"])
+            except FileNotFoundError:
+                continue
+            seen[key] = sig
+            if self.index.get(key, {}).get("signature") == sig:
+                continue
+            queued = next((item for item in self.queue if item["key"] == key), None)
+            if queued is not None and queued["signature"] == sig:
+                continue
+            if self._last_seen.get(key) != sig:
+                settling += 1
+                continue
+            if queued is not None:
+                queued["signature"] = sig
+            else:
+                self.queue.append({"key": key, "person": rec["person"], "state": rec["state"],
+                                   "path": key, "signature": sig})
+            changed = True
+        self._last_seen = seen
+
+        # drop deleted files
+        for key in [k for k in self.index if k not in present]:
+            entry = self.index.pop(key)
+            if entry.get("table"):
+                (self.table_dir / entry["table"]).unlink(missing_ok=True)
+            self.file_results.pop(key, None)
+            self._dirty.add((entry["person"], entry["state"]))
+            changed = True
+        n_queued = len(self.queue)
+        self.queue = [item for item in self.queue if item["key"] in present]
+        changed |= len(self.queue) != n_queued
+
+        if changed:
+            self._save_state()
+        return settling
+
+    def _finish(self, item: dict, fut) -> int:
+        """Store the result of one finished task; returns 1 if it succeeded."""
+        key = item["key"]
+        try:
+            table = fut.result()
+        except Exception as e:
+            # remember the failed signature: scan() skips the file until it changes again
+            logger.error(f"Failed to process {key}: {e}")
+            old = self.index.get(key, {})
+            if old.get("table"):
+                (self.table_dir / old["table"]).unlink(missing_ok=True)
+                self.file_results.pop(key, None)
+                self._dirty.add((item["person"], item["state"]))
+            self.index[key] = {"person": item["person"], "state": item["state"],
+                               "signature": item["signature"], "failed": True}
+            self._dequeue(item)
+            self._save_state()
+            return 0
+
+        table_name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".npz"
+        tmp = self.table_dir / (table_name + ".tmp.npz")
+        table.save(tmp)
+        os.replace(tmp, self.table_dir / table_name)
+
+        self.index[key] = {"person": item["person"], "state": item["state"],
+                           "signature": item["signature"], "table": table_name}
+        self._dequeue(item)
+        self._dirty.add((item["person"], item["state"]))
+        self._save_state()
+        logger.info(f"Processed {key} ({len(table)} windows)")
+        return 1
+
+    def _dequeue(self, item: dict) -> None:
+        """Drop a finished item; the file may have changed again while it was processed."""
+        self.queue = [q for q in self.queue if not (q["key"] == item["key"] and q["signature"] == item["signature"])]
+
+    # ------------------------------------------------------------------
+    # outputs
+    # ------------------------------------------------------------------
+    def refresh(self) -> None:
+        """Refit baselines and re-evaluate the (person, state) groups that changed."""
+        cfg = self.cfg
+        order = {key: i for i, key in enumerate(self._order)}
+
+        for pid, st in sorted(self._dirty):
+            keys = sorted(
+                (k for k, e in self.index.items()
+                 if e["person"] == pid and e["state"] == st and not e.get("failed")),
+                key=lambda k: order.get(k, len(order)),
+            )
+            records = [{"person": pid, "state": st, "path": Path(k)} for k in keys]
+            table = self._load_tables(keys)
+
+            self.baselines.setdefault(pid, {})[st] = self.orchestrator._fit_baseline(
+                table, method=cfg["agg_method"], z_max=cfg["z_max"]
+            )
+            passed, record_baselines = self.orchestrator._evaluate_records(
+                table, records, self.baselines, cfg
+            )
+
+            per_file_dir = cfg["outdir"] / "per_file"
+            per_file_dir.mkdir(exist_ok=True)
+            rec_idx = np.asarray(table["record"])
+            for i, rec in enumerate(records):
+                sel = rec_idx == i
+                detail = self.orchestrator._file_detail(rec, table[sel], passed[sel], cfg,
+                                                        record_baselines[i] if record_baselines else None)
+                _write_json_atomic(per_file_dir / self.orchestrator._detail_filename(rec), detail)
+                self.file_results[keys[i]] = (detail["n_windows"], detail["n_pass"])
+        self._dirty.clear()
+
+        # baselines.json / pass_rates.csv over all groups, in run_dataset order
+        baselines = {pid: {st: self.baselines[pid][st] for st in cfg["states"]} for pid in cfg["persons"]}
+        _write_json_atomic(cfg["outdir"] / "baselines.json", baselines)
+
+        keys = [k for k in self._order if k in self.file_results]
+        records = [{"person": self.index[k]["person"], "state": self.index[k]["state"], "path": Path(k)}
+                   for k in keys]
+        df = self.orchestrator._pass_rates_frame(
+            records,
+            [self.file_results[k][0] for k in keys],
+            [self.file_results[k][1] for k in keys],
+            cfg["bootstrap"],
+        )
+        tmp = cfg["outdir"] / "pass_rates.csv.tmp"
+        df.to_csv(tmp, index=False, encoding="utf-8-sig")
+        os.replace(tmp, cfg["outdir"] / "pass_rates.csv")
+
+        table = self._load_tables(keys)
+        passed, _ = self.orchestrator._evaluate_records(table, records, self.baselines, cfg)
+        if cfg["feature_store"]:
+            write_feature_store(cfg["outdir"] / FEATURE_STORE_NAME, table, records, passed,
+                                cfg["fs"], cfg["win"], cfg["stride"])
+        write_dataset_summary(cfg["outdir"] / DATASET_SUMMARY_NAME, aggregate_dataset(table, records, passed),
+                              window_sec=cfg["win_sec"], overlap=cfg["overlap"])
+
+    def _load_tables(self, keys: list[str]) -> WindowStore:
+        """Concatenate the cached window tables of the given files (record = position in keys)."""
+        parts = [WindowStore.load(self.table_dir / self.index[key]["table"]) for key in keys]
+        return WindowStore.concatenate(parts, records=range(len(parts)))
+
+    # ------------------------------------------------------------------
+    # helpers
+    # ------------------------------------------------------------------
+    def _save_state(self) -> None:
+        _write_json_atomic(self.queue_path, self.queue)
+        _write_json_atomic(self.index_path, self.index)
+
+    @staticmethod
+    def _load_json(path: Path, default):
+        if not path.exists():
+            return default
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring unreadable state file {path}")
+            return default
+
+    def _install_signal_handlers(self) -> dict:
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        handlers = {}
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            handlers[sig] = signal.signal(sig, lambda *_: self.stop())
+        return handlers
+
+    @staticmethod
+    def _restore_signal_handlers(handlers: dict) -> None:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
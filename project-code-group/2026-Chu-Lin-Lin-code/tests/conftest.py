@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Shared fixtures: a small synthetic dataset and its config."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.tools.detector_benchmark import synthetic_record
+
+
+FS = 250
+PERSONS = ("p1", "p2")
+STATES = ("Rest", "Active")
+
+
+@pytest.fixture
+def write_recording():
+    """Writer of one synthetic ECG recording as a single-column CSV."""
+    def write(path: Path, duration_sec: float = 90, fs: int = FS,
+              heart_rate: float = 70, seed: int = 0) -> Path:
+        rec = synthetic_record(duration_sec=duration_sec, fs=fs, heart_rate=heart_rate, seed=seed)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame({"ECG": rec["signal"]}).to_csv(path, index=False)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def dataset_config(tmp_path, write_recording):
+    """
+    Factory of run_dataset() configs over a 2-person x Rest/Active dataset.
+
+    The recordings (<tmp_path>/data/<person>/<state>/<file_name>, seed
+    10 * i + j for person i and state j) are written by the first call and
+    reused by later ones, so several outputs of one test share the same
+    input tree.
+
+    Args (of the returned factory):
+        outdir: Output directory (default <tmp_path>/out).
+        processing: Entries of config['processing'] (progress is disabled
+            unless given).
+        duration_sec: Recording length, or a function of (i, j).
+        heart_rate: Function of (i, j) giving the heart rate in bpm.
+        fs: Sampling rate.
+        file_name: Name of the single recording per person and state.
+
+    Returns:
+        callable: The factory; each call returns a new config dict.
+    """
+    data_dir = tmp_path / "data"
+
+    def make(outdir: Path = None, processing: dict = None, duration_sec=90,
+             heart_rate=lambda i, j: 65 + 20 * j, fs: int = FS, file_name: str = "rec1.csv") -> dict:
+        persons_cfg = []
+        for i, pid in enumerate(PERSONS):
+            conditions = {}
+            for j, st in enumerate(STATES):
+                path = data_dir / pid / st / file_name
+                if not path.exists():
+                    duration = duration_sec(i, j) if callable(duration_sec) else duration_sec
+                    write_recording(path, duration, fs, heart_rate(i, j), seed=10 * i + j)
+                conditions[st] = {"glob": f"{pid}/{st}/*.csv"}
+            persons_cfg.append({"id": pid, "conditions": conditions})
+
+        return {
+            "dataset": {"data_dir": str(data_dir), "persons": persons_cfg},
+            "signal": {"sampling_rate": fs, "bandpass_low": 0.5, "bandpass_high": 20.0},
+            "features": {"window_size_sec": 30, "overlap": 0.5},
+            "r_peak": {"min_rr_sec": 0.3, "max_rr_sec": 2.0},
+            "baseline": {"k_rest": 2.5, "k_active": 2.0},
+            "processing": {"progress": {"enabled": False}, **(processing or {})},
+            "output": {"dir": str(outdir or tmp_path / "out")},
+        }
+
+    return make
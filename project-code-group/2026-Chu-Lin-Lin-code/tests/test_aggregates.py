@@ -0,0 +1,140 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the single-pass dataset aggregates and the dataset report."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools.aggregates import DATASET_SUMMARY_NAME, DatasetAggregates, aggregate_dataset
+from src.tools.report_generator import generate_dataset_report
+from src.tools.window_store import FEATURE_COLUMNS, WindowStore
+
+
+FS = 250
+
+
+def _table(n_records: int = 4, seed: int = 0) -> tuple[WindowStore, list[dict], np.ndarray]:
+    """Random window table, records and pass flags (RR in ms, some NaN features)."""
+    rng = np.random.default_rng(seed)
+    store = WindowStore(capacity=4)
+    records = [{"person": f"p{i // 2}", "state": ["Rest", "Active"][i % 2], "path": f"r{i}.csv"}
+               for i in range(n_records)]
+    for i in range(n_records):
+        for w in range(int(rng.integers(3, 9))):
+            rr = rng.normal(800 - 150 * (i % 2), 40, size=int(rng.integers(20, 40)))
+            feats = rng.normal(50, 10, size=len(FEATURE_COLUMNS))
+            feats[rng.random(len(FEATURE_COLUMNS)) < 0.1] = np.nan
+            store.append(i, w * 100, w * 100 + 200, rr, features=feats, rr_mean=rr.mean() / 1000.0)
+    passed = rng.random(len(store)) < 0.7
+    return store, records, passed
+
+
+class TestDatasetAggregates:
+    """Tests for DatasetAggregates."""
+
+    def test_summary_matches_exact_statistics(self):
+        """Counts, moments, pooled HRV and quantiles agree with NumPy on the full table."""
+        table, records, passed = _table()
+        summary = aggregate_dataset(table, records, passed).summary()
+
+        rec = np.asarray(table["record"])
+        for g in summary["groups"]:
+            idx = [i for i, r in enumerate(records) if (r["person"], r["state"]) == (g["person"], g["state"])]
+            rows = np.isin(rec, idx)
+            assert g["n_windows"] == rows.sum() and g["n_pass"] == passed[rows].sum()
+
+            for j, name in enumerate(FEATURE_COLUMNS):
+                x = table.features[rows, j]
+                x = x[np.isfinite(x)]
+                stats = g["features"][name]
+                assert stats["n"] == x.size
+                assert stats["mean"] == pytest.approx(x.mean(), rel=1e-12)
+                assert stats["std"] == pytest.approx(x.std(ddof=1), rel=1e-10)
+                assert stats["q50"] == pytest.approx(np.median(x), abs=0.1 * x.std())
+
+            sub = table[rows]
+            rr = np.concatenate([sub.rr(i) for i in range(len(sub))])
+            diffs = np.concatenate([np.diff(sub.rr(i)) for i in range(len(sub))])
+            hrv = g["pooled_hrv"]
+            assert hrv["n_rr"] == rr.size
+            assert hrv["mean_rr_ms"] == pytest.approx(rr.mean())
+            assert hrv["sdnn_ms"] == pytest.approx(rr.std(ddof=1), rel=1e-9)
+            assert hrv["rmssd_ms"] == pytest.approx(np.sqrt(np.mean(diffs ** 2)))
+            assert hrv["pnn50"] == pytest.approx(100.0 * np.mean(np.abs(diffs) > 50))
+
+        overall = summary["overall"]
+        assert overall["n_windows"] == len(table) and overall["n_files"] == len(records)
+        assert sum(overall["file_pass_rate_hist"]["counts"]) == len(records)
+        assert [s["state"] for s in summary["states"]] == ["Rest", "Active"]
+
+    def test_merge_equals_single_pass(self):
+        """Aggregates built in two halves and merged equal one pass over everything."""
+        table, records, passed = _table(n_records=6, seed=3)
+        whole = aggregate_dataset(table, records, passed).summary()
+
+        rec = np.asarray(table["record"])
+        first = rec < 3
+        a = aggregate_dataset(table[first], records[:3], passed[first])
+        # records 3..5 one by one, as a second worker would see them
+        b = DatasetAggregates()
+        for i in range(3, 6):
+            b.update(records[i]["person"], records[i]["state"], table[rec == i], passed[rec == i])
+        merged = a.merge(b).summary()
+
+        for g_whole, g_merged in zip(whole["groups"], merged["groups"]):
+            assert g_whole["n_windows"] == g_merged["n_windows"]
+            assert g_whole["file_pass_rate_hist"] == g_merged["file_pass_rate_hist"]
+            for name in FEATURE_COLUMNS:
+                assert g_merged["features"][name]["mean"] == pytest.approx(g_whole["features"][name]["mean"])
+                assert g_merged["features"][name]["std"] == pytest.approx(g_whole["features"][name]["std"])
+            for key, value in g_whole["pooled_hrv"].items():
+                assert g_merged["pooled_hrv"][key] == pytest.approx(value)
+
+    def test_empty_group_has_no_statistics(self):
+        """A recording without windows counts as a file and reports None instead of NaN."""
+        summary = DatasetAggregates().update("p1", "Rest", WindowStore(), np.zeros(0, bool)).summary()
+        group = summary["groups"][0]
+        assert group["n_files"] == 1 and group["pass_rate"] is None
+        assert group["features"]["sdnn"]["mean"] is None
+        assert group["pooled_hrv"]["sdnn_ms"] is None
+        json.dumps(summary)
+
+
+class TestDatasetSummaryOutput:
+    """Tests for dataset_summary.json and the report built from it."""
+
+    @pytest.fixture
+    def config(self, dataset_config):
+        return dataset_config(duration_sec=70)
+
+    def test_run_dataset_writes_summary(self, tmp_path, config):
+        """run_dataset() writes a summary consistent with pass_rates.csv."""
+        HRVAnalysisOrchestrator().run_dataset(config)
+        summary = json.loads((tmp_path / "out" / DATASET_SUMMARY_NAME).read_text(encoding="utf-8"))
+        rates = pd.read_csv(tmp_path / "out" / "pass_rates.csv", encoding="utf-8-sig")
+
+        assert summary["window_sec"] == 30 and summary["overlap"] == 0.5
+        assert summary["overall"]["n_windows"] == rates["n_windows"].sum()
+        assert summary["overall"]["n_pass"] == rates["n_pass"].sum()
+        by_group = {(g["person"], g["state"]): g for g in summary["groups"]}
+        for _, row in rates.iterrows():
+            assert by_group[(row["person"], row["state"])]["n_windows"] == row["n_windows"]
+        assert by_group[("p1", "Active")]["pooled_hrv"]["mean_hr_bpm"] == pytest.approx(85, abs=5)
+
+    def test_dataset_report(self, tmp_path, config):
+        """The overall report is built from the summary alone."""
+        HRVAnalysisOrchestrator().run_dataset(config)
+        summary = json.loads((tmp_path / "out" / DATASET_SUMMARY_NAME).read_text(encoding="utf-8"))
+
+        path = Path(generate_dataset_report(summary, tmp_path / "report" / "overall.md", "ok"))
+        text = path.read_text(encoding="utf-8")
+        assert path.with_suffix(".png").stat().st_size > 0
+        assert "| p2 | Active |" in text and "## 2. Pooled HRV" in text
+        assert f"**Windows analysed:** {summary['overall']['n_windows']}" in text
@@ -0,0 +1,141 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the persisted per-recording R-peak annotations."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.tools.annotations import (
+    AnnotationStore,
+    annotation_dir,
+    detect_annotations,
+    detector_params,
+    load_annotations,
+    window_peaks,
+)
+from src.tools.detector_benchmark import synthetic_record
+from src.tools.signal_processor import (
+    bandpass_filter,
+    compute_rr_intervals,
+    detect_r_peaks,
+    remove_ectopic_beats,
+)
+from scripts.comprehensive_comparison import evaluate_file
+
+
+FS = 250
+CONFIG = {
+    "signal": {"sampling_rate": FS, "bandpass_low": 0.5, "bandpass_high": 20.0},
+    "r_peak": {"min_rr_sec": 0.3, "max_rr_sec": 2.0, "remove_ectopic": True},
+}
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """A 90 s synthetic recording written as CSV."""
+    rec = synthetic_record(duration_sec=90, fs=FS, heart_rate=70, seed=4)
+    path = tmp_path / "data" / "rec1.csv"
+    path.parent.mkdir()
+    pd.DataFrame({"ECG": rec["signal"]}).to_csv(path, index=False)
+    return path, rec
+
+
+class TestAnnotationStore:
+    """Tests for AnnotationStore."""
+
+    def test_matches_direct_detection(self, tmp_path, recording):
+        """Stored peaks and RR equal the filter -> detect -> RR -> ectopic chain."""
+        path, rec = recording
+        params = detector_params(CONFIG)
+        ann = AnnotationStore(tmp_path / "ann").get(path, params)
+
+        x = pd.read_csv(path)["ECG"].to_numpy(dtype=float)
+        peaks = detect_r_peaks(bandpass_filter(x, FS, 0.5, 20.0), FS, min_rr_sec=0.3, max_rr_sec=2.0)
+        np.testing.assert_array_equal(ann["r_peaks"], peaks)
+        np.testing.assert_allclose(ann["rr_intervals"], remove_ectopic_beats(compute_rr_intervals(peaks, FS)))
+        assert ann["n_samples"] == len(x) and ann["params"] == params
+        assert len(ann["r_peaks"]) == pytest.approx(len(rec["beats"]), abs=2)
+
+    def test_detects_once_per_parameter_set(self, tmp_path, recording):
+        """A second get() loads the file; other detector settings get their own file."""
+        path, _ = recording
+        store = AnnotationStore(tmp_path / "ann")
+        params = detector_params(CONFIG)
+        first = store.get(path, params)
+        again = AnnotationStore(tmp_path / "ann").get(path, params)
+        np.testing.assert_array_equal(first["r_peaks"], again["r_peaks"])
+
+        store.get(path, detector_params(CONFIG, detection_fs=50))
+        store.get(path, params)
+        assert store.stats == {"hit": 1, "miss": 2}
+        assert len(list((tmp_path / "ann" / "annotations").glob("*.npz"))) == 2
+        assert not list((tmp_path / "ann" / "annotations").glob("*.tmp*"))
+
+    def test_keyed_by_content(self, tmp_path, recording):
+        """Touching a file keeps its key; a copy shares it; an edit changes it."""
+        path, _ = recording
+        store = AnnotationStore(tmp_path / "ann")
+        params = detector_params(CONFIG)
+        key = store.key(path, params)
+
+        os.utime(path, (1, 1))
+        assert store.key(path, params) == key
+        copy = tmp_path / "copy.csv"
+        copy.write_bytes(path.read_bytes())
+        assert store.key(copy, params) == key
+
+        df = pd.read_csv(path)
+        df.loc[100, "ECG"] += 1.0
+        df.to_csv(path, index=False)
+        assert store.key(path, params) != key
+
+    def test_file_format(self, tmp_path, recording):
+        """Peaks are stored as int32 and read back as int64."""
+        path, _ = recording
+        store = AnnotationStore(tmp_path / "ann")
+        params = detector_params(CONFIG)
+        store.get(path, params)
+        with np.load(store.path(path, params)) as z:
+            assert z["r_peaks"].dtype == np.int32
+        assert load_annotations(store.path(path, params))["r_peaks"].dtype == np.int64
+
+
+class TestAnnotationHelpers:
+    """Tests for detector_params(), annotation_dir() and window_peaks()."""
+
+    def test_detector_params(self):
+        """Config values are normalized and overrides win."""
+        params = detector_params({**CONFIG, "signal": {"sampling_rate": "700", "dtype": "float32"}}, min_rr_sec=0.25)
+        assert params["sampling_rate"] == 700.0 and params["dtype"] == "float32"
+        assert params["min_rr_sec"] == 0.25 and params["filter_order"] == 4
+        with pytest.raises(ValueError):
+            detector_params({"signal": {}})
+
+    def test_annotation_dir(self, tmp_path):
+        """annotations_dir wins over output.dir."""
+        assert annotation_dir({"output": {"dir": str(tmp_path)}}) == tmp_path
+        cfg = {"output": {"dir": str(tmp_path)}, "r_peak": {"annotations_dir": str(tmp_path / "a")}}
+        assert annotation_dir(cfg) == tmp_path / "a"
+
+    def test_window_peaks(self):
+        """Peaks in [start, start + win), relative to the start."""
+        out = window_peaks(np.array([5, 40, 99, 100, 150]), np.array([0, 50, 100]), 100)
+        assert [p.tolist() for p in out] == [[5, 40, 99], [49, 50], [0, 50]]
+
+    def test_evaluate_file_with_stored_peaks(self, recording):
+        """comprehensive_comparison.evaluate_file() runs on stored peaks without detection."""
+        path, rec = recording
+        ann = detect_annotations(rec["signal"], detector_params(CONFIG))
+        baseline = {m: {"mean": v, "std": 1e3} for m, v in [("mean_hr", 70.0), ("sdnn", 50.0), ("rmssd", 50.0)]}
+        args = (rec["signal"], FS, CONFIG["signal"], CONFIG["r_peak"], 30, 0.5, baseline, "Rest", 1.0, 1.0)
+
+        stored = evaluate_file(*args, r_peaks=ann["r_peaks"])
+        direct = evaluate_file(*args)
+        assert stored["n_windows"] == direct["n_windows"] == 5
+        assert stored["n_pass"] == direct["n_pass"] == 5
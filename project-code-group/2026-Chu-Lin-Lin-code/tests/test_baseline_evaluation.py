@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for leave-one-file-out baseline evaluation."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+
+
+class TestLeaveOneFileOut:
+    """Leave-one-file-out baselines must equal a refit on the other files."""
+
+    @pytest.fixture
+    def grouped_table(self):
+        rng = np.random.default_rng(3)
+        records = [
+            {"person": p, "state": st, "path": Path(f"{p}_{st}_{j}.csv")}
+            for p in ("p1", "p2") for st in ("Rest", "Active") for j in range(3)
+        ]
+        records.append({"person": "p3", "state": "Rest", "path": Path("solo.csv")})
+        rec_idx = np.repeat(np.arange(len(records)), rng.integers(4, 12, len(records)))
+        n = len(rec_idx)
+        sdnn = rng.normal(45.0, 10.0, n)
+        sdnn[::7] = np.nan
+        table = pd.DataFrame({
+            "record": rec_idx,
+            "rr_mean": 1000.0 + rng.normal(0.0, 1e-3, n),   # large offset, tiny spread
+            "sdnn": sdnn,
+            "rmssd": rng.normal(35.0, 8.0, n),
+        })
+        return table, records
+
+    @staticmethod
+    def _refit(orchestrator, table, records, i, method="mean_std"):
+        rec = records[i]
+        same = np.array([(r["person"], r["state"]) == (rec["person"], rec["state"]) for r in records])
+        sel = same[table["record"].to_numpy()] & (table["record"].to_numpy() != i)
+        return orchestrator._fit_baseline(table[sel], method=method)
+
+    def test_mean_std_matches_refit(self, grouped_table):
+        """Sufficient-statistic subtraction equals a naive refit, including a one-file group."""
+        orchestrator = HRVAnalysisOrchestrator()
+        table, records = grouped_table
+        cfg = {"agg_method": "mean_std", "z_max": None}
+        got = orchestrator._lofo_baselines(table, records, cfg)
+
+        for i in range(len(records)):
+            expected = self._refit(orchestrator, table, records, i)
+            for metric in ("rr_mean", "sdnn", "rmssd"):
+                for key in ("mean", "std"):
+                    assert got[i][metric][key] == pytest.approx(expected[metric][key], rel=1e-9, nan_ok=True)
+        # the only file of p3/Rest has no other files to compare against
+        assert np.isnan(got[-1]["rmssd"]["mean"])
+
+    def test_robust_matches_refit(self, grouped_table):
+        """Robust baselines are refit on the other files of the group."""
+        orchestrator = HRVAnalysisOrchestrator()
+        table, records = grouped_table
+        got = orchestrator._lofo_baselines(table, records, {"agg_method": "robust", "z_max": None})
+        for i in (0, 5, 10):
+            assert got[i] == self._refit(orchestrator, table, records, i, method="robust")
+
+    def test_run_dataset_uses_held_out_baselines(self, tmp_path):
+        """Each file is judged against the baseline of the other files of its group."""
+        fs = 250
+        data_dir = tmp_path / "data"
+        rng = np.random.default_rng(1)
+        conditions = {}
+        for st in ("Rest", "Active"):
+            for j in range(3):
+                n = 70 * fs
+                x = 0.02 * rng.standard_normal(n)
+                beats = np.cumsum(rng.normal(0.7 + 0.1 * j, 0.03, 120))
+                x[(beats[beats < 69.9] * fs).astype(int)] += 2.0
+                path = data_dir / "p1" / st / f"rec{j}.csv"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                pd.DataFrame({"ECG": x}).to_csv(path, index=False)
+            conditions[st] = {"glob": f"p1/{st}/*.csv"}
+
+        def config(outdir, evaluation):
+            return {
+                "dataset": {"data_dir": str(data_dir), "persons": [{"id": "p1", "conditions": conditions}]},
+                "signal": {"sampling_rate": fs, "bandpass_low": 0.5, "bandpass_high": 20.0},
+                "features": {"window_size_sec": 30, "overlap": 0.5},
+                "r_peak": {"min_rr_sec": 0.3, "max_rr_sec": 2.0},
+                "baseline": {"k_rest": 2.5, "k_active": 2.0, "evaluation": evaluation},
+                "processing": {"progress": {"enabled": False}},
+                "output": {"dir": str(outdir)},
+            }
+
+        orchestrator = HRVAnalysisOrchestrator()
+        orchestrator.run_dataset(config(tmp_path / "in", "in_sample"))
+        orchestrator.run_dataset(config(tmp_path / "lofo", "lofo"))
+        in_sample = pd.read_csv(tmp_path / "in" / "pass_rates.csv", encoding="utf-8-sig")
+        lofo = pd.read_csv(tmp_path / "lofo" / "pass_rates.csv", encoding="utf-8-sig")
+        assert lofo["n_windows"].tolist() == in_sample["n_windows"].tolist()
+
+        # reference: refit every held-out baseline and evaluate the file alone
+        cfg = orchestrator._dataset_settings(config(tmp_path / "ref", "in_sample"))
+        records = orchestrator._scan_dataset_from_config(cfg["data_dir"], cfg["persons_cfg"])
+        table = orchestrator._window_table(records, cfg["fs"], cfg["win"], cfg["stride"],
+                                           cfg["filter_low"], cfg["filter_high"]).to_frame()
+        rec_idx = table["record"].to_numpy()
+        for i, rec in enumerate(records):
+            baseline = self._refit(orchestrator, table, records, i)
+            passed = orchestrator._evaluate_windows(
+                table[rec_idx == i], records, {"p1": {"Rest": baseline, "Active": baseline}},
+                cfg["k_rest"], cfg["k_active"], cfg["rr_min"], cfg["rr_max"],
+            )
+            row = lofo[lofo["file"] == str(rec["path"])].iloc[0]
+            assert row["n_pass"] == passed.sum()
+
+            detail = json.loads((tmp_path / "lofo" / "per_file" / orchestrator._detail_filename(rec)).read_text())
+            assert detail["baseline_eval"] == "leave_one_file_out"
+            assert detail["baseline"]["rmssd"]["mean"] == pytest.approx(baseline["rmssd"]["mean"])
+
+    def test_unknown_mode_raises(self, tmp_path):
+        """An unknown baseline.evaluation is rejected."""
+        config = {
+            "dataset": {"data_dir": str(tmp_path), "persons": []},
+            "baseline": {"evaluation": "k_fold"},
+            "output": {"dir": str(tmp_path / "out")},
+        }
+        with pytest.raises(ValueError):
+            HRVAnalysisOrchestrator()._dataset_settings(config)
+
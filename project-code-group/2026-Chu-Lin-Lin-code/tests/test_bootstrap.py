@@ -0,0 +1,108 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for bootstrap confidence intervals of pass rates."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools import bootstrap
+from src.tools.bootstrap import bootstrap_pass_rates
+
+
+N_WIN = [12, 30, 7, 0, 25, 40]
+N_PASS = [5, 30, 2, 0, 10, 0]
+GROUPS = [("p1", "Rest")] * 4 + [("p2", "Active")] * 2
+
+
+class TestBootstrapPassRates:
+    """Tests for bootstrap_pass_rates()."""
+
+    def test_matches_loop_reference(self):
+        """The matrix resampling equals a per-replicate, per-file loop over the same draws."""
+        n_boot = 200
+        got = bootstrap_pass_rates(N_WIN, N_PASS, GROUPS, n_boot=n_boot, seed=7)
+
+        for g in dict.fromkeys(GROUPS):
+            files = [i for i, x in enumerate(GROUPS) if x == g and N_WIN[i] > 0]
+            u = bootstrap._group_rng(7, g).random((n_boot, sum(N_WIN[i] for i in files)))
+            file_rates = np.empty((n_boot, len(files)))
+            group_rates = np.empty(n_boot)
+            for b in range(n_boot):
+                col, hits = 0, 0
+                for j, i in enumerate(files):
+                    vector = np.r_[np.ones(N_PASS[i]), np.zeros(N_WIN[i] - N_PASS[i])]
+                    sample = vector[np.floor(u[b, col:col + N_WIN[i]] * N_WIN[i]).astype(int)]
+                    file_rates[b, j] = sample.mean()
+                    hits += sample.sum()
+                    col += N_WIN[i]
+                group_rates[b] = hits / col
+            for j, i in enumerate(files):
+                assert got["ci_low"][i] == pytest.approx(np.quantile(file_rates[:, j], 0.025))
+                assert got["ci_high"][i] == pytest.approx(np.quantile(file_rates[:, j], 0.975))
+            i = GROUPS.index(g)
+            assert got["group_ci_low"][i] == pytest.approx(np.quantile(group_rates, 0.025))
+            assert got["group_ci_high"][i] == pytest.approx(np.quantile(group_rates, 0.975))
+
+    def test_point_estimates_and_degenerate_files(self):
+        """Group rates are pooled; all-pass/all-fail files have zero-width intervals, empty files NaN."""
+        got = bootstrap_pass_rates(N_WIN, N_PASS, GROUPS, n_boot=300)
+        assert got["group_pass_rate"][0] == pytest.approx(37 / 49)
+        assert got["group_pass_rate"][5] == pytest.approx(10 / 65)
+        assert (got["ci_low"][1], got["ci_high"][1]) == (1.0, 1.0)
+        assert (got["ci_low"][5], got["ci_high"][5]) == (0.0, 0.0)
+        assert np.isnan(got["ci_low"][3]) and np.isnan(got["ci_high"][3])
+        for i in (0, 2, 4):
+            assert got["ci_low"][i] <= N_PASS[i] / N_WIN[i] <= got["ci_high"][i]
+        # pooling windows narrows the interval
+        width = got["group_ci_high"] - got["group_ci_low"]
+        assert width[4] < got["ci_high"][4] - got["ci_low"][4]
+
+    def test_matches_binomial_width(self):
+        """For a single file, the interval approaches p +/- 1.96 * sqrt(p(1-p)/n)."""
+        got = bootstrap_pass_rates([400], [120], ["g"], n_boot=4000, seed=1)
+        half = 1.96 * np.sqrt(0.3 * 0.7 / 400)
+        assert got["ci_low"][0] == pytest.approx(0.3 - half, abs=0.01)
+        assert got["ci_high"][0] == pytest.approx(0.3 + half, abs=0.01)
+
+    def test_seeded_and_independent_of_order(self, monkeypatch):
+        """Same seed -> same result, whatever the group order or replicate block size."""
+        a = bootstrap_pass_rates(N_WIN, N_PASS, GROUPS, n_boot=500, seed=3)
+        order = [4, 5, 0, 1, 2, 3]
+        b = bootstrap_pass_rates([N_WIN[i] for i in order], [N_PASS[i] for i in order],
+                                 [GROUPS[i] for i in order], n_boot=500, seed=3)
+        monkeypatch.setattr(bootstrap, "MAX_BLOCK_CELLS", 100)
+        c = bootstrap_pass_rates(N_WIN, N_PASS, GROUPS, n_boot=500, seed=3)
+        for key in a:
+            np.testing.assert_array_equal(np.asarray(b[key]), np.asarray(a[key])[order])
+            np.testing.assert_array_equal(c[key], a[key])
+
+    @pytest.mark.parametrize("kwargs", [{"n_boot": 0}, {"level": 1.0}])
+    def test_invalid_settings(self, kwargs):
+        """n_boot < 1 or a level outside (0, 1) is rejected."""
+        with pytest.raises(ValueError):
+            bootstrap_pass_rates(N_WIN, N_PASS, GROUPS, **kwargs)
+
+
+class TestPassRatesFrame:
+    """Tests for the CI columns of pass_rates.csv."""
+
+    def test_ci_columns(self):
+        """With bootstrap settings the per-file and per-group intervals are added."""
+        records = [{"person": p, "state": s, "path": Path(f"f{i}.csv")}
+                   for i, (p, s) in enumerate(GROUPS)]
+        orchestrator = HRVAnalysisOrchestrator()
+        plain = orchestrator._pass_rates_frame(records, N_WIN, N_PASS)
+        df = orchestrator._pass_rates_frame(records, N_WIN, N_PASS, {"n_boot": 200, "level": 0.9, "seed": 0})
+
+        assert list(df.columns) == list(plain.columns) + [
+            "pass_rate_ci_low", "pass_rate_ci_high", "group_pass_rate", "group_ci_low", "group_ci_high"]
+        pd.testing.assert_frame_equal(df[plain.columns], plain)
+        ci = bootstrap_pass_rates(N_WIN, N_PASS, GROUPS, n_boot=200, level=0.9)
+        row = df.loc[df["file"] == "f0.csv"].iloc[0]
+        assert (row["pass_rate_ci_low"], row["pass_rate_ci_high"]) == (ci["ci_low"][0], ci["ci_high"][0])
@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the golden-reference equivalence harness."""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import equivalence
+from src.equivalence import (
+    CASES,
+    check_run_dataset,
+    compare_features,
+    dataset_records,
+    register_case,
+    run_equivalence,
+    summarize_equivalence,
+)
+from src.tools.detector_benchmark import synthetic_record
+
+
+FS = 250
+
+
+@pytest.fixture
+def records():
+    return [synthetic_record(duration_sec=90, fs=500, seed=1),
+            synthetic_record(duration_sec=90, fs=250, heart_rate=85, seed=2)]
+
+
+@pytest.fixture
+def config(dataset_config):
+    return dataset_config(duration_sec=80, heart_rate=lambda i, j: 70 + 15 * j)
+
+
+class TestCompareFeatures:
+    """Tests for compare_features()."""
+
+    def test_tolerances_and_deviations(self):
+        """Deviations are reported per feature and checked against (atol, rtol)."""
+        ref = {"a": [1.0, 2.0, np.nan], "b": [100.0], "c": [0, 10]}
+        opt = {"a": [1.0, 2.0 + 1e-12, np.nan], "b": [100.5], "c": [1, 10]}
+        rows = {r["feature"]: r for r in compare_features(ref, opt, {"b": (0.0, 0.01), "c": (1.0, 0.0)})}
+
+        assert rows["a"]["passed"] and rows["a"]["max_abs_dev"] == pytest.approx(1e-12)
+        assert rows["b"]["passed"] and rows["b"]["max_rel_dev"] == pytest.approx(0.005)
+        assert rows["c"]["passed"] and rows["c"]["max_abs_dev"] == 1.0
+        assert [r["n_values"] for r in rows.values()] == [3, 1, 2]
+
+    @pytest.mark.parametrize("opt", [{"a": [1.0, 2.0]}, {"a": [1.0, 2.0, 3.0, 4.0]},
+                                     {"a": [1.0, 2.0, 3.0]}, {}])
+    def test_mismatches_fail(self, opt):
+        """Shifted NaNs, shape mismatches and missing features fail with infinite deviation."""
+        (row,) = compare_features({"a": [1.0, 2.0, np.nan]}, opt)
+        assert not row["passed"]
+        assert row["max_abs_dev"] == np.inf
+
+
+class TestRecordCases:
+    """Tests for run_equivalence() and the built-in record cases."""
+
+    def test_builtin_cases_pass(self, records):
+        """Every optimized path reproduces its reference on synthetic records."""
+        results = run_equivalence(records, repeat=1)
+
+        assert set(results["case"]) == set(CASES)
+        assert set(results["record"]) == {r["name"] for r in records}
+        failed = results.loc[~results["passed"], ["case", "record", "feature", "max_abs_dev"]]
+        assert failed.empty, failed.to_string()
+        assert (results["speedup"] > 0).all()
+
+        summary = summarize_equivalence(results)
+        assert summary["passed"].all()
+        assert (summary["failed"] == "").all()
+        assert summary.loc["entropy", "n_features"] == 6
+
+    def test_perturbed_case_fails(self, records, monkeypatch):
+        """A deviating optimized path is caught and named in the summary."""
+        monkeypatch.setattr(equivalence, "CASES", dict(CASES))
+        reference = CASES["window_metrics"]["reference"]
+
+        def perturbed(rec):
+            out = reference(rec)
+            out["rmssd"] = np.asarray(out["rmssd"]) * (1 + 1e-6)
+            return out
+
+        register_case("perturbed", reference, perturbed, tolerances={"sdnn": (0.0, 1e-3)})
+        results = run_equivalence(records[:1], cases=["perturbed"], repeat=1)
+        summary = summarize_equivalence(results)
+
+        assert not summary.loc["perturbed", "passed"]
+        assert summary.loc["perturbed", "failed"] == "rmssd"
+        assert summary.loc["perturbed", "max_rel_dev"] == pytest.approx(1e-6)
+
+    def test_float32_features_within_tolerance(self):
+        """float32 signals keep R-peaks within one sample and feature means within FLOAT32_TOLERANCES."""
+        records = []
+        for fs in (250, 700, 1000):
+            for seed in range(3):
+                rec = synthetic_record(duration_sec=240, fs=fs, heart_rate=60 + 5 * seed,
+                                       noise_std=0.1, seed=seed)
+                rec["signal"] = np.round(rec["signal"] * 1000)   # ADC counts
+                records.append(rec)
+        results = run_equivalence(records, cases=["float32"], repeat=1)
+
+        failed = results.loc[~results["passed"], ["record", "feature", "max_abs_dev", "max_rel_dev"]]
+        assert failed.empty, failed.to_string()
+        assert results.loc[results["feature"] == "r_peaks", "max_abs_dev"].max() <= 1.0
+
+    def test_unknown_case_raises(self, records):
+        """Requesting an unregistered case is rejected."""
+        with pytest.raises(KeyError):
+            run_equivalence(records, cases=["nope"])
+
+
+class TestRunDatasetCase:
+    """Tests for recorded inputs and check_run_dataset()."""
+
+    def test_recorded_inputs(self, config):
+        """Dataset recordings carry the config's rate, window and band and pass every case."""
+        records = dataset_records(config, limit=2)
+        assert [r["name"] for r in records] == ["p1__Rest__rec1", "p1__Active__rec1"]
+        assert records[0]["sampling_rate"] == FS and records[0]["win_sec"] == 30.0
+        assert len(records[0]["signal"]) == 80 * FS
+
+        results = run_equivalence(records, repeat=1)
+        assert results["passed"].all()
+
+    def test_variants_match_serial_run(self, tmp_path, config):
+        """Parallel, out-of-core and staged runs reproduce the serial pass rates and baselines."""
+        results = check_run_dataset(config, tmp_path / "eq", repeat=2)
+
+        assert set(results["record"]) == set(equivalence.DATASET_VARIANTS)
+        assert {"n_windows", "n_pass", "pass_rate", "baseline.sdnn.mean"} <= set(results["feature"])
+        assert results["passed"].all(), results.loc[~results["passed"]].to_string()
+        rates = pd.read_csv(tmp_path / "eq" / "reference" / "pass_rates.csv", encoding="utf-8-sig")
+        assert rates["n_windows"].sum() > 0
+        assert (tmp_path / "eq" / "stage_cache" / "stages").is_dir()
+
+    def test_float32_variants_match_serial_run(self, tmp_path, config):
+        """With signal.dtype float32, every processing path reproduces the serial float32 run."""
+        config["signal"]["dtype"] = "float32"
+        results = check_run_dataset(config, tmp_path / "eq")
+        assert results["passed"].all(), results.loc[~results["passed"]].to_string()
+
+        reference = check_run_dataset({**config, "signal": {**config["signal"], "dtype": "float64"}},
+                                      tmp_path / "eq64", variants={})
+        rates32 = pd.read_csv(tmp_path / "eq" / "reference" / "pass_rates.csv", encoding="utf-8-sig")
+        rates64 = pd.read_csv(tmp_path / "eq64" / "reference" / "pass_rates.csv", encoding="utf-8-sig")
+        assert reference.empty
+        assert rates32["n_windows"].tolist() == rates64["n_windows"].tolist()
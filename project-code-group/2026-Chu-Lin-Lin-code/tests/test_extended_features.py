@@ -8,11 +8,14 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.tools import extended_features
 from src.tools.extended_features import (
     extract_extended_features,
     FEATURE_NAMES,
     FEATURE_DESCRIPTIONS,
     FEATURE_CATEGORIES,
+    OPTIONAL_CATEGORIES,
+    OPTIONAL_FEATURE_NAMES,
 )
 
 
@@ -45,7 +48,7 @@ class TestFeatureConstants:
 
     def test_feature_categories_valid(self):
         """Test that categories are valid."""
-        valid_categories = {"Time-domain", "Frequency-domain", "Non-linear"}
+        valid_categories = {"Time-domain", "Frequency-domain", "Non-linear", "Fractal", "Multiscale entropy"}
         for category_name in FEATURE_CATEGORIES.keys():
             assert category_name in valid_categories, f"Invalid category: {category_name}"
 
@@ -324,5 +327,88 @@ class TestWithRealLikeData:
         assert features["sdnn"] > 30
 
 
+class TestOptionalFeatures:
+    """Tests for the optional DFA and multiscale entropy groups."""
+
+    @staticmethod
+    def _naive_sample_entropy(x, m, r):
+        """Reference: the O(N^2) pair loop."""
+        def count(template_len):
+            n = len(x) - template_len
+            return sum(
+                np.max(np.abs(x[i:i + template_len] - x[j:j + template_len])) < r
+                for i in range(n) for j in range(i + 1, n)
+            )
+        A, B = count(m + 1), count(m)
+        return -np.log(A / B) if A > 0 and B > 0 else np.nan
+
+    def test_optional_groups_only_on_request(self):
+        """Default output keeps the 20 features; include adds the named groups."""
+        rng = np.random.default_rng(0)
+        rr = 1000 + 50 * rng.standard_normal(300)
+
+        assert set(extract_extended_features(rr)) == set(FEATURE_NAMES)
+        features = extract_extended_features(rr, include=OPTIONAL_CATEGORIES)
+        assert set(features) == set(FEATURE_NAMES) | set(OPTIONAL_FEATURE_NAMES)
+        assert all(np.isfinite(features[name]) for name in OPTIONAL_FEATURE_NAMES)
+        for name in OPTIONAL_FEATURE_NAMES:
+            assert name in FEATURE_DESCRIPTIONS
+
+        short = extract_extended_features(rr[:5], include=["Fractal"])
+        assert np.isnan(short["dfa_alpha1"]) and np.isnan(short["dfa_alpha2"])
+        with pytest.raises(ValueError):
+            extract_extended_features(rr, include=["Chaos"])
+
+    @pytest.mark.parametrize("n", [12, 50, 200])
+    def test_sample_entropy_kernel_matches_loop(self, monkeypatch, n):
+        """The sorted neighbour-count kernel gives exactly the pair-loop result (also in small blocks)."""
+        rng = np.random.default_rng(n)
+        x = np.round(1000 + 50 * rng.standard_normal(n), -1)   # many ties at the tolerance
+        r = 0.2 * np.std(x)
+        expected = self._naive_sample_entropy(x, 2, r)
+        assert extended_features._compute_sample_entropy(x) == pytest.approx(expected, nan_ok=True)
+        monkeypatch.setattr(extended_features, "_PAIR_BLOCK", 5)
+        assert extended_features._compute_sample_entropy(x) == pytest.approx(expected, nan_ok=True)
+
+    def test_dfa_matches_per_box_fit(self):
+        """Reshaped closed-form detrending equals a per-box polyfit."""
+        rng = np.random.default_rng(1)
+        rr = 1000 + 50 * rng.standard_normal(500)
+        profile = np.cumsum(rr - rr.mean())
+        scales = np.arange(4, 17)
+        fluct = []
+        for n in scales:
+            res = []
+            for k in range(len(rr) // n):
+                seg = profile[k * n:(k + 1) * n]
+                t = np.arange(n)
+                res.append(seg - np.polyval(np.polyfit(t, seg, 1), t))
+            fluct.append(np.sqrt(np.mean(np.concatenate(res) ** 2)))
+        expected = np.polyfit(np.log(scales), np.log(fluct), 1)[0]
+        assert extended_features._compute_dfa_alpha(rr, 4, 16) == pytest.approx(expected, rel=1e-9)
+
+    def test_dfa_known_exponents(self):
+        """White noise gives alpha near 0.5, its cumulative sum near 1.5; too few boxes give NaN."""
+        rng = np.random.default_rng(2)
+        w = rng.standard_normal(4096)
+        assert extended_features._compute_dfa_alpha(w, 16, 64) == pytest.approx(0.5, abs=0.1)
+        assert extended_features._compute_dfa_alpha(np.cumsum(w), 16, 64) == pytest.approx(1.5, abs=0.1)
+        assert np.isnan(extended_features._compute_dfa_alpha(w[:60], 16, 64))
+
+    def test_multiscale_entropy(self):
+        """Scale s is the sample entropy of s-beat means with r fixed from the original series."""
+        rng = np.random.default_rng(3)
+        x = 1000 + 50 * rng.standard_normal(400)
+        mse = extended_features._compute_multiscale_entropy(x)
+        r = 0.2 * np.std(x)
+        for s in (1, 3):
+            coarse = x[:len(x) // s * s].reshape(-1, s).mean(axis=1)
+            assert mse[f"mse_{s}"] == pytest.approx(self._naive_sample_entropy(coarse, 2, r))
+        assert mse["mse_1"] == pytest.approx(extended_features._compute_sample_entropy(x))
+        assert mse["mse_area"] == pytest.approx(sum(mse[f"mse_{s}"] for s in range(1, 6)))
+        # white noise loses entropy under coarse-graining
+        assert mse["mse_5"] < mse["mse_1"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the per-window feature store written by run_dataset()."""
+
+import copy
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools.extended_features import extract_extended_features
+from src.tools.feature_store import FEATURE_STORE_NAME, read_feature_index, read_feature_series
+
+
+FS = 250
+
+
+@pytest.fixture
+def config(dataset_config):
+    return dataset_config(duration_sec=lambda i, j: 70 + 10 * i)
+
+
+def _run(config, outdir, **processing):
+    cfg = copy.deepcopy(config)
+    cfg["processing"].update(processing)
+    cfg["output"]["dir"] = str(outdir)
+    HRVAnalysisOrchestrator().run_dataset(cfg)
+    return outdir / FEATURE_STORE_NAME
+
+
+class TestFeatureStore:
+    """Tests for window_features.npz."""
+
+    def test_index_and_passes_match_outputs(self, tmp_path, config):
+        """The index and pass flags agree with pass_rates.csv."""
+        store = _run(config, tmp_path / "out")
+        rates = pd.read_csv(tmp_path / "out" / "pass_rates.csv", encoding="utf-8-sig")
+        index = read_feature_index(store)
+
+        assert [Path(f).name for f in index["file"]] == ["rec1.csv"] * 4
+        assert index["n_windows"].tolist() == rates["n_windows"].tolist()
+        series = read_feature_series(store, ["sdnn"])
+        n_pass = series.groupby(["person", "state"], sort=False)["passed"].sum()
+        assert n_pass.tolist() == rates["n_pass"].tolist()
+        assert np.all(np.diff(series.loc[series["person"] == "p1", "time_sec"].to_numpy()[:3]) == 15.0)
+
+    def test_features_equal_extraction_on_stored_rr(self, tmp_path, config):
+        """Stored features equal extract_extended_features() of each window's RR; optional ones are derived."""
+        store = _run(config, tmp_path / "out")
+        names = ["mean_hr", "sdnn", "pnn50", "lf_hf_ratio", "sample_entropy", "mse_1", "dfa_alpha1"]
+        series = read_feature_series(store, names, person="p2", state="Active")
+
+        with np.load(store) as z:
+            rows = slice(int(z["offset"][3]), int(z["offset"][3] + z["count"][3]))
+            rr, offsets, counts = z["rr"], z["rr_offset"][rows], z["rr_count"][rows]
+        assert len(series) == len(offsets) > 0
+        for i, (o, c) in enumerate(zip(offsets, counts)):
+            expected = extract_extended_features(rr[o:o + c], fs=FS, include=("Fractal", "Multiscale entropy"))
+            for name in names:
+                np.testing.assert_allclose(series[name].iloc[i], expected[name], equal_nan=True)
+
+    def test_filters_and_unknown_feature(self, tmp_path, config):
+        """Person/state/file filters select recordings; unknown features are rejected."""
+        store = _run(config, tmp_path / "out")
+        assert set(read_feature_series(store, ["rmssd"], person="p1")["state"]) == {"Rest", "Active"}
+        assert len(read_feature_series(store, ["rmssd"], person="p1", state="Rest", file="rec1.csv")) == 3
+        with pytest.raises(KeyError):
+            read_feature_series(store, ["not_a_feature"])
+
+    def test_same_store_for_every_processing_path(self, tmp_path, config):
+        """Serial, staged and out-of-core runs write the same feature time series."""
+        names = ["sdnn", "rmssd", "hf_power"]
+        reference = read_feature_series(_run(config, tmp_path / "serial"), names)
+        for i, processing in enumerate([{"stage_cache": {"enabled": True}},
+                                        {"out_of_core": {"enabled": True, "block_windows": 2}}]):
+            other = read_feature_series(_run(config, tmp_path / f"run{i}", **processing), names)
+            pd.testing.assert_frame_equal(other.drop(columns="file"), reference.drop(columns="file"))
+
+    def test_disabled(self, tmp_path, config):
+        """output.feature_store: false skips the store."""
+        config["output"]["feature_store"] = False
+        assert not _run(config, tmp_path / "out").exists()
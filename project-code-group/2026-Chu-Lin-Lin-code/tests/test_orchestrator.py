@@ -219,14 +219,13 @@ class TestHRVAnalysisOrchestrator:
         m_fail_sdnn = {"rr": np.array([1000.0]), "sdnn": 60.0, "rmssd": 40.0}
         assert orchestrator._window_pass(m_fail_sdnn, base, k, rr_min, rr_max) is False
 
-    @patch("pandas.DataFrame.to_csv")
+    @patch("pandas.DataFrame.to_csv", autospec=True)
     @patch("pathlib.Path.write_text")
-    @patch("src.orchestrator.HRVAnalysisOrchestrator._window_pass")
     @patch("src.orchestrator.HRVAnalysisOrchestrator._fit_baseline")
-    @patch("src.orchestrator.HRVAnalysisOrchestrator._window_metrics")
+    @patch("src.orchestrator.HRVAnalysisOrchestrator._window_metrics_batch")
     @patch("src.tools.ecg_loader.read_ecg_csv_column") # Updated patch target
     @patch("src.orchestrator.HRVAnalysisOrchestrator._scan_dataset_from_config")
-    def test_run_dataset(self, mock_scan_dataset_from_config, mock_read_ecg_csv_column, mock_window_metrics, mock_fit_baseline, mock_window_pass, mock_write_text, mock_to_csv, sample_config, temp_dirs): # Updated mock argument name
+    def test_run_dataset(self, mock_scan_dataset_from_config, mock_read_ecg_csv_column, mock_window_metrics, mock_fit_baseline, mock_write_text, mock_to_csv, sample_config, temp_dirs): # Updated mock argument name
         orchestrator = HRVAnalysisOrchestrator()
         data_dir, output_dir = temp_dirs
 
@@ -240,8 +239,9 @@ class TestHRVAnalysisOrchestrator:
         # Mock read_ecg_csv_column to return a signal with enough length for windowing
         mock_read_ecg_csv_column.return_value = np.zeros(50 * 60 * 2) # 2 minutes of signal
 
-        # Mock window metrics
-        mock_window_metrics.return_value = {"rr": np.array([1000]), "sdnn": 50.0, "rmssd": 40.0}
+        # Mock window metrics (one dict per row of each window matrix)
+        window_metrics = {"rr": np.array([1000]), "sdnn": 50.0, "rmssd": 40.0}
+        mock_window_metrics.side_effect = lambda windows, *args, **kwargs: [window_metrics] * len(windows)
 
         # Mock baseline fitting
         mock_fit_baseline.return_value = {
@@ -250,9 +250,6 @@ class TestHRVAnalysisOrchestrator:
             "rmssd": {"mean": 40.0, "std": 4.0},
         }
 
-        # Mock window pass/fail
-        mock_window_pass.return_value = True
-
         result = orchestrator.run_dataset(sample_config)
 
         assert result["status"] == "success"
@@ -283,8 +280,11 @@ class TestHRVAnalysisOrchestrator:
 
         assert found_baselines_call, "Expected baselines.json content not found or did not match in mock_write_text calls"
 
-        # Verify pass_rates.csv is written
+        # Verify pass_rates.csv is written; every window matches the baseline exactly
         mock_to_csv.assert_called_once()
+        pass_rates = mock_to_csv.call_args[0][0]
+        assert (pass_rates["n_windows"] > 0).all()
+        assert pass_rates["n_pass"].tolist() == pass_rates["n_windows"].tolist()
 
         # Verify per-file JSON is written
         assert mock_write_text.call_count == 1 + len(mock_scan_records) # baselines.json (1) + per-file.json (2) = 3 calls
@@ -292,5 +292,72 @@ class TestHRVAnalysisOrchestrator:
 
 
 
+class TestVectorizedEvaluation:
+    """The columnar window evaluation must agree with the per-window rules."""
+
+    def test_fit_baseline_table_matches_rows(self):
+        """_fit_baseline gives the same result for a window table and dict rows."""
+        orchestrator = HRVAnalysisOrchestrator()
+        rows = [
+            {"rr": np.array([1000.0, 900.0]), "sdnn": 50.0, "rmssd": 40.0},
+            {"rr": np.array([1050.0]), "sdnn": np.nan, "rmssd": 45.0},
+            {"rr": np.array([0.8, 0.9]), "sdnn": 55.0, "rmssd": 35.0},
+        ]
+        table = pd.DataFrame({
+            "rr_mean": [0.95, 1.05, 0.85],
+            "sdnn": [50.0, np.nan, 55.0],
+            "rmssd": [40.0, 45.0, 35.0],
+        })
+        from_table = orchestrator._fit_baseline(table)
+        from_rows = orchestrator._fit_baseline(rows)
+        for metric in ("rr_mean", "sdnn", "rmssd"):
+            assert from_table[metric] == pytest.approx(from_rows[metric])
+
+    def test_evaluate_windows_matches_window_pass(self):
+        """Array evaluation equals _window_pass() for every window, including edge cases."""
+        orchestrator = HRVAnalysisOrchestrator()
+        rng = np.random.default_rng(0)
+        records = [
+            {"person": "p1", "state": "Rest", "path": Path("a.csv")},
+            {"person": "p1", "state": "Active", "path": Path("b.csv")},
+            {"person": "p2", "state": "Rest", "path": Path("c.csv")},
+        ]
+        baselines = {
+            "p1": {
+                "Rest": {"rr_mean": {"mean": 1.0, "std": 0.05}, "sdnn": {"mean": 50.0, "std": 5.0},
+                         "rmssd": {"mean": 40.0, "std": 4.0}},
+                "Active": {"rr_mean": {"mean": 0.7, "std": 0.0}, "sdnn": {"mean": 30.0, "std": np.nan},
+                           "rmssd": {"mean": 20.0, "std": 3.0}},
+            },
+            "p2": {
+                "Rest": {"rr_mean": {"mean": np.nan, "std": np.nan}, "sdnn": {"mean": 50.0, "std": 5.0},
+                         "rmssd": {"mean": 40.0, "std": 4.0}},
+            },
+        }
+
+        n = 300
+        rec_idx = rng.integers(0, len(records), n)
+        rr_ms = rng.normal(850.0, 200.0, n)
+        sdnn = rng.normal(40.0, 12.0, n)
+        rmssd = rng.normal(30.0, 10.0, n)
+        sdnn[::17] = np.nan
+        table = pd.DataFrame({
+            "record": rec_idx,
+            "rr_mean": rr_ms / 1000.0,
+            "sdnn": sdnn,
+            "rmssd": rmssd,
+        })
+
+        got = orchestrator._evaluate_windows(table, records, baselines, 1.5, 2.0, 0.3, 2.0)
+
+        for i in range(n):
+            rec = records[rec_idx[i]]
+            k = 1.5 if rec["state"] == "Rest" else 2.0
+            m = {"rr": np.array([rr_ms[i]]), "sdnn": sdnn[i], "rmssd": rmssd[i]}
+            expected = orchestrator._window_pass(m, baselines[rec["person"]][rec["state"]], k, 0.3, 2.0)
+            assert bool(got[i]) == expected
+        assert 0 < got.sum() < n
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
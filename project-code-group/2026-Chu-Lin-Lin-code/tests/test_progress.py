@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for progress and throughput reporting."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.utils.progress import ProgressReporter
+
+
+FS = 250
+
+
+class TestProgressReporter:
+    """Tests for ProgressReporter."""
+
+    def test_counts_and_progress_json(self, tmp_path):
+        """Windows, files and samples are counted and written to progress.json."""
+        records = [{"path": tmp_path / f"r{i}.csv"} for i in range(3)]
+        for i, rec in enumerate(records):
+            rec["path"].write_bytes(b"x" * 100 * (i + 1))
+        progress = ProgressReporter(records, tmp_path, interval_sec=0.0)
+
+        progress.set_length(0, 1000)
+        for end in (400, 700, 1000):
+            progress.window_done(0, end)
+        progress.set_length(1, 2000)
+        progress.window_done(1, 1000)
+
+        snap = json.loads((tmp_path / "progress.json").read_text())
+        assert snap["status"] == "running"
+        assert (snap["files_done"], snap["files_pending"]) == (1, 2)
+        assert snap["windows_done"] == 4
+        assert snap["samples_done"] == 2000
+        # file 0 (100 bytes) done, half of file 1 (200 bytes) of 600 bytes total
+        assert snap["fraction_done"] == pytest.approx(200 / 600, abs=1e-4)
+        assert snap["eta_sec"] is not None
+        assert snap["current_file"] == str(records[1]["path"])
+
+        progress.close()
+        snap = json.loads((tmp_path / "progress.json").read_text())
+        assert snap["status"] == "done"
+        assert (snap["files_done"], snap["files_pending"]) == (3, 0)
+        assert snap["samples_done"] == 3000
+        assert snap["fraction_done"] == 1.0
+
+    def test_reports_are_throttled(self, tmp_path):
+        """No report is written before interval_sec has elapsed."""
+        progress = ProgressReporter([{"path": None}], tmp_path, interval_sec=3600.0)
+        for end in range(100):
+            progress.window_done(0, end)
+        assert not (tmp_path / "progress.json").exists()
+        progress.close()
+        assert json.loads((tmp_path / "progress.json").read_text())["windows_done"] == 100
+
+    def test_disabled_reporter_is_a_no_op(self, tmp_path):
+        """enabled=False writes nothing."""
+        progress = ProgressReporter([{"path": None}], tmp_path, interval_sec=0.0, enabled=False)
+        progress.window_done(0, 10)
+        progress.close()
+        assert not (tmp_path / "progress.json").exists()
+
+
+class TestRunDatasetProgress:
+    """Tests for progress.json written by run_dataset()."""
+
+    @pytest.mark.parametrize("processing", [
+        {},
+        {"workers": 2, "chunk_windows": 1},
+        {"stage_cache": {"enabled": True}},
+    ])
+    def test_final_progress(self, tmp_path, dataset_config, processing):
+        """Serial, process-pool and staged runs all end with complete totals."""
+        config = dataset_config(processing={"progress": {"interval_sec": 0.0}, **processing}, duration_sec=70)
+        HRVAnalysisOrchestrator().run_dataset(config)
+        snap = json.loads((tmp_path / "out" / "progress.json").read_text())
+
+        # 70 s recordings, 30 s windows with 15 s stride -> 3 windows each
+        assert snap["status"] == "done"
+        assert (snap["files_total"], snap["files_done"], snap["files_pending"]) == (4, 4, 0)
+        assert snap["windows_done"] == 4 * 3
+        assert snap["samples_done"] == 4 * 70 * FS
+        assert snap["windows_per_sec"] > 0 and snap["samples_per_sec"] > 0
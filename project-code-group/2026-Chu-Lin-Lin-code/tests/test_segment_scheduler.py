@@ -0,0 +1,205 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for out-of-core segment scheduling."""
+
+import json
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools.ecg_loader import read_ecg_csv_column
+from src.tools.segment_scheduler import (
+    csv_to_memmap,
+    iter_window_blocks,
+    iter_window_segments,
+    nanmedian_blocked,
+    open_memmap_signal,
+    sliding_window_matrix,
+)
+
+
+def _synthetic_ecg(n: int, fs: int, offset: int = 0, seed: int = 0) -> np.ndarray:
+    """ECG-like test signal: respiration sine plus sharp beats at ~72 bpm."""
+    rng = np.random.default_rng(seed + offset)
+    t = (offset + np.arange(n)) / fs
+    x = 0.2 * np.sin(2 * np.pi * 0.25 * t) + 0.02 * rng.standard_normal(n)
+    beat = int(0.83 * fs)
+    phase = (offset + np.arange(n)) % beat
+    x[phase == 0] += 2.0
+    x[(phase == 1) | (phase == beat - 1)] += 0.6
+    return x
+
+
+class TestWindowBlocks:
+    """Tests for block layout of sliding windows."""
+
+    @pytest.mark.parametrize("n,win,stride,block_windows", [
+        (100, 20, 10, 3), (100, 20, 20, 1), (57, 10, 3, 4), (20, 20, 5, 8), (19, 20, 5, 8),
+    ])
+    def test_blocks_cover_window_slices(self, n, win, stride, block_windows):
+        """Windows from blocks match _window_slices() exactly."""
+        expected = list(HRVAnalysisOrchestrator()._window_slices(n, win, stride))
+        got = []
+        for b0, b1, starts in iter_window_blocks(n, win, stride, block_windows):
+            assert len(starts) <= block_windows
+            for s in starts:
+                assert b0 <= s and s + win <= b1
+                got.append((int(s), int(s) + win))
+        assert got == expected
+
+    def test_segments_match_direct_slicing(self):
+        """Block-wise segments carry the same samples as direct slices."""
+        x = np.random.default_rng(1).standard_normal(1000)
+        for s, e, seg in iter_window_segments(x, 100, 30, block_windows=4):
+            np.testing.assert_array_equal(seg, x[s:e])
+
+    @pytest.mark.parametrize("n,win,stride", [(1000, 100, 30), (100, 20, 20), (19, 20, 5)])
+    def test_window_matrix_is_read_only_view(self, n, win, stride):
+        """sliding_window_matrix() rows are the _window_slices() windows, without a copy."""
+        x = np.random.default_rng(2).standard_normal(n)
+        matrix = sliding_window_matrix(x, win, stride)
+        slices = list(HRVAnalysisOrchestrator()._window_slices(n, win, stride))
+
+        assert matrix.shape == (len(slices), win)
+        for row, (s, e) in zip(matrix, slices):
+            np.testing.assert_array_equal(row, x[s:e])
+        if len(slices):
+            assert np.shares_memory(matrix, x)
+            assert not matrix.flags.writeable
+
+
+class TestCsvToMemmap:
+    """Tests for CSV to memmap conversion."""
+
+    def test_matches_read_ecg_csv_column(self, tmp_path):
+        """Converted values, including NaN filling, match the in-memory loader."""
+        x = np.random.default_rng(2).standard_normal(5003)
+        x[[3, 100, 4000]] = np.nan
+        df = pd.DataFrame({"a": np.arange(5003), "b": 0.0, "c": 1.0, "d": x})
+        csv_path = tmp_path / "rec.csv"
+        df.to_csv(csv_path, header=False, index=False)
+
+        mm = csv_to_memmap(csv_path, tmp_path / "rec.f8", chunksize=700, block_size=256)
+        np.testing.assert_array_equal(np.asarray(mm), read_ecg_csv_column(csv_path))
+
+    def test_float32_conversion(self, tmp_path):
+        """A float32 conversion matches the float32 loader and replaces a float64 copy."""
+        x = np.random.default_rng(4).integers(-2000, 2000, 3001).astype(float)
+        x[[5, 17]] = np.nan
+        csv_path = tmp_path / "rec.csv"
+        pd.DataFrame({"ECG": x}).to_csv(csv_path, index=False)
+        out = tmp_path / "rec.f"
+
+        csv_to_memmap(csv_path, out)
+        mm = csv_to_memmap(csv_path, out, chunksize=700, dtype=np.float32)
+        expected = read_ecg_csv_column(csv_path, dtype=np.float32)
+        assert mm.dtype == expected.dtype == np.float32
+        assert out.stat().st_size == 4 * len(x)
+        np.testing.assert_array_equal(np.asarray(mm), expected)
+
+    def test_conversion_is_reused(self, tmp_path):
+        """A second conversion of an unchanged file reuses the existing array."""
+        csv_path = tmp_path / "rec.csv"
+        pd.DataFrame({"ECG": np.arange(10.0)}).to_csv(csv_path, index=False)
+        out = tmp_path / "rec.f8"
+        csv_to_memmap(csv_path, out)
+        mtime = out.stat().st_mtime_ns
+        mm = csv_to_memmap(csv_path, out)
+        assert out.stat().st_mtime_ns == mtime
+        np.testing.assert_array_equal(np.asarray(mm), np.arange(10.0))
+
+    def test_nanmedian_blocked(self):
+        """Blocked median equals np.nanmedian for odd/even counts and ties."""
+        rng = np.random.default_rng(3)
+        for n in [1, 2, 7, 1000, 20001]:
+            x = np.round(rng.standard_normal(n), 2)
+            x[rng.random(n) < 0.1] = np.nan
+            expected = np.nanmedian(x) if np.any(~np.isnan(x)) else np.nan
+            assert nanmedian_blocked(x, block_size=64) == pytest.approx(expected, nan_ok=True, abs=0)
+
+
+class TestOutOfCorePipeline:
+    """Out-of-core results must be identical to the in-memory path."""
+
+    def test_24h_700hz_windows_identical_with_bounded_memory(self, tmp_path):
+        """A 24 h, 700 Hz recording is windowed block by block in bounded memory."""
+        fs = 700
+        n = 24 * 3600 * fs
+        win, stride, block_windows = 30 * fs, 15 * fs, 32
+
+        path = tmp_path / "day.f8"
+        mm = np.memmap(path, dtype=np.float64, mode="w+", shape=(n,))
+        chunk = 2_000_000
+        for b0 in range(0, n, chunk):
+            b1 = min(n, b0 + chunk)
+            mm[b0:b1] = _synthetic_ecg(b1 - b0, fs, offset=b0)
+        mm.flush()
+        del mm
+        (tmp_path / "day.f8.json").write_text(
+            json.dumps({"dtype": "float64", "n_samples": n}), encoding="utf-8"
+        )
+        sig = open_memmap_signal(path)
+
+        block_bytes = ((block_windows - 1) * stride + win) * 8
+        expected = HRVAnalysisOrchestrator()._window_slices(n, win, stride)
+
+        tracemalloc.start()
+        n_windows = 0
+        for (s, e, seg), (es, ee) in zip(iter_window_segments(sig, win, stride, block_windows), expected):
+            assert (s, e) == (es, ee)
+            # cheap per-window reduction instead of the full HRV chain
+            assert seg.argmax() == np.asarray(sig[s:e]).argmax()
+            assert seg.sum() == np.asarray(sig[s:e]).sum()
+            n_windows += 1
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert n_windows == (n - win) // stride + 1
+        assert peak < 3 * block_bytes
+        assert peak < n * 8 / 50
+
+    def test_run_dataset_identical_to_in_memory(self, tmp_path, dataset_config):
+        """run_dataset writes identical outputs with and without out-of-core mode."""
+        def config(outdir, ooc):
+            return dataset_config(outdir, {"out_of_core": {"enabled": ooc, "block_windows": 2}},
+                                  duration_sec=120, fs=700)
+
+        HRVAnalysisOrchestrator().run_dataset(config(tmp_path / "mem", False))
+        HRVAnalysisOrchestrator().run_dataset(config(tmp_path / "ooc", True))
+
+        mem, ooc = tmp_path / "mem", tmp_path / "ooc"
+        assert (mem / "baselines.json").read_text() == (ooc / "baselines.json").read_text()
+        assert (mem / "pass_rates.csv").read_text() == (ooc / "pass_rates.csv").read_text()
+        for f in sorted((mem / "per_file").glob("*.json")):
+            assert f.read_text() == (ooc / "per_file" / f.name).read_text()
+        assert list((ooc / "cache").glob("*.f8"))
+
+
+class TestParallelChunks:
+    """Chunked multi-process window processing must match the serial path."""
+
+    @pytest.mark.parametrize("ooc", [False, True])
+    def test_run_dataset_parallel_identical_to_serial(self, tmp_path, dataset_config, ooc):
+        """One long and several short recordings give identical outputs with workers=2."""
+        def config(outdir, workers):
+            processing = {
+                "workers": workers,
+                "chunk_windows": 3,
+                "out_of_core": {"enabled": ooc, "block_windows": 4},
+            }
+            return dataset_config(outdir, processing, duration_sec=lambda i, j: 600 if (i, j) == (0, 0) else 75)
+
+        HRVAnalysisOrchestrator().run_dataset(config(tmp_path / "serial", 1))
+        HRVAnalysisOrchestrator().run_dataset(config(tmp_path / "parallel", 2))
+
+        serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+        assert (serial / "baselines.json").read_text() == (parallel / "baselines.json").read_text()
+        assert (serial / "pass_rates.csv").read_text() == (parallel / "pass_rates.csv").read_text()
+        for f in sorted((serial / "per_file").glob("*.json")):
+            assert f.read_text() == (parallel / "per_file" / f.name).read_text()
@@ -0,0 +1,107 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for streaming quantile sketches and the robust baseline."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools.sketches import MAD_TO_STD, TDigest, robust_stats
+
+
+class TestTDigest:
+    """Tests for the t-digest sketch."""
+
+    @pytest.mark.parametrize("n", [1, 2, 5, 40, 100])
+    def test_small_inputs_are_exact(self, n):
+        """Median, MAD and quantiles are exact while the input is kept verbatim."""
+        x = np.random.default_rng(n).standard_normal(n)
+        d = TDigest().update(x)
+        med = np.median(x)
+        assert d.median() == pytest.approx(med)
+        assert d.mad() == pytest.approx(np.median(np.abs(x - med)))
+        assert d.quantile(0.25) == pytest.approx(np.quantile(x, 0.25, method="hazen"))
+
+    def test_merged_digest_is_accurate_and_bounded(self):
+        """Digests merged across chunks stay small and estimate median/MAD closely."""
+        x = np.random.default_rng(0).lognormal(0.0, 0.5, 200_000)
+        parts = [TDigest().update(chunk) for chunk in np.array_split(x, 8)]
+        d = parts[0]
+        for p in parts[1:]:
+            d.merge(p)
+
+        med = np.median(x)
+        mad = np.median(np.abs(x - med))
+        assert d.count == len(x)
+        assert len(d.centroids()[0]) <= d.compression
+        assert d.median() == pytest.approx(med, rel=0.01)
+        assert d.mad() == pytest.approx(mad, rel=0.03)
+        assert (d.min, d.max) == (x.min(), x.max())
+
+    def test_non_finite_values_are_ignored(self):
+        """NaN and inf values do not enter the digest."""
+        d = TDigest().update([1.0, np.nan, 3.0, np.inf])
+        assert d.count == 2
+        assert d.median() == pytest.approx(2.0)
+
+    def test_serialization_round_trip(self):
+        """to_dict/from_dict preserve the digest through JSON."""
+        d = TDigest().update(np.random.default_rng(1).standard_normal(5000))
+        restored = TDigest.from_dict(json.loads(json.dumps(d.to_dict())))
+        assert restored.count == d.count
+        assert restored.median() == pytest.approx(d.median())
+        assert restored.mad() == pytest.approx(d.mad())
+
+
+class TestRobustStats:
+    """Tests for robust centre/spread from a digest."""
+
+    def test_outliers_are_dropped_by_z_max(self):
+        """Values beyond z_max MAD-z are excluded before the final statistics."""
+        x = np.r_[np.random.default_rng(2).normal(50.0, 5.0, 60), [500.0, -300.0]]
+        stats = robust_stats(TDigest().update(x), "robust", z_max=3.5)
+        assert stats["n_outliers"] == 2
+        assert stats["center"] == pytest.approx(np.median(x[:60]))
+        assert stats["spread"] == pytest.approx(MAD_TO_STD * stats["mad"])
+
+    def test_unknown_method_raises(self):
+        """Only robust and median_iqr are sketch-based."""
+        with pytest.raises(ValueError):
+            robust_stats(TDigest().update([1.0, 2.0]), "mean_std")
+
+
+class TestRobustBaseline:
+    """Tests for the robust baseline in the orchestrator."""
+
+    def test_fit_baseline_robust(self):
+        """_fit_baseline(method='robust') gives median and scaled MAD per metric."""
+        orchestrator = HRVAnalysisOrchestrator()
+        table = pd.DataFrame({
+            "rr_mean": [0.8, 0.82, 0.85, 0.9, 3.0],
+            "sdnn": [40.0, 42.0, 45.0, 41.0, 300.0],
+            "rmssd": [30.0, 35.0, 33.0, np.nan, 31.0],
+        })
+        base = orchestrator._fit_baseline(table, method="robust")
+        assert base["rr_mean"]["center"] == pytest.approx(0.85)
+        assert base["rr_mean"]["spread"] == pytest.approx(MAD_TO_STD * 0.05)
+        assert base["rmssd"]["n"] == 4
+
+    def test_window_pass_uses_robust_center(self):
+        """A single extreme window does not drag the robust baseline with it."""
+        orchestrator = HRVAnalysisOrchestrator()
+        table = pd.DataFrame({
+            "rr_mean": [0.80, 0.81, 0.82, 0.83, 0.84, 1.9],
+            "sdnn": [40.0, 41.0, 42.0, 43.0, 44.0, 200.0],
+            "rmssd": [30.0, 31.0, 32.0, 33.0, 34.0, 150.0],
+        })
+        m = {"rr": np.array([820.0]), "sdnn": 42.0, "rmssd": 32.0}
+
+        robust = orchestrator._fit_baseline(table, method="robust", z_max=3.5)
+        assert orchestrator._window_pass(m, robust, k=2.0, rr_min=0.3, rr_max=2.0) is True
+        assert robust["sdnn"]["n_outliers"] == 1
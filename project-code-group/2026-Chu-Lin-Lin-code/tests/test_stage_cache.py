@@ -0,0 +1,136 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the memoized pipeline stages."""
+
+import copy
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools.stage_cache import StageCache, stage_key
+
+
+FS = 250
+PER_RECORD_STAGES = ("load", "filter", "peaks", "rr", "features")
+
+
+@pytest.fixture
+def make_config(tmp_path, dataset_config):
+    def config(outdir, stages=True):
+        return dataset_config(outdir, {"stage_cache": {"enabled": stages, "dir": str(tmp_path / "stages")}})
+
+    return config
+
+
+def _read_outputs(outdir: Path) -> dict:
+    files = [outdir / "baselines.json", outdir / "pass_rates.csv", *sorted((outdir / "per_file").glob("*.json"))]
+    return {p.name: p.read_text() for p in files}
+
+
+def _misses(result: dict) -> dict:
+    return {stage: counts["miss"] for stage, counts in result["stages"].items()}
+
+
+class TestStageKey:
+    """Tests for stage_key()."""
+
+    def test_key_depends_on_inputs_and_params(self):
+        """Equal inputs give equal keys; any change gives a different key."""
+        key = stage_key("filter", "abc", {"fs": 250, "bandpass_high": 20.0})
+        assert key == stage_key("filter", "abc", {"bandpass_high": 20.0, "fs": 250})
+        assert key != stage_key("filter", "abd", {"fs": 250, "bandpass_high": 20.0})
+        assert key != stage_key("filter", "abc", {"fs": 250, "bandpass_high": 25.0})
+        assert key != stage_key("peaks", "abc", {"fs": 250, "bandpass_high": 20.0})
+
+    def test_run_builds_once(self, tmp_path):
+        """StageCache.run() builds a missing entry and loads it afterwards."""
+        cache = StageCache(tmp_path)
+        calls = []
+
+        def build(p):
+            calls.append(p)
+            np.save(p, np.arange(3))
+
+        for _ in range(2):
+            out = cache.run("demo", "k1", ".npy", build, np.load)
+            np.testing.assert_array_equal(out, np.arange(3))
+        assert len(calls) == 1
+        assert cache.stats["demo"] == {"hit": 1, "miss": 1}
+        assert [p.name for p in (tmp_path / "demo").iterdir()] == ["k1.npy"]
+
+
+class TestStagedRunDataset:
+    """Tests for run_dataset() with processing.stage_cache enabled."""
+
+    def test_outputs_match_unstaged_run(self, tmp_path, make_config):
+        """Staged outputs equal a plain run; a repeated run hits every stage."""
+        orchestrator = HRVAnalysisOrchestrator()
+        orchestrator.run_dataset(make_config(tmp_path / "plain", stages=False))
+        first = orchestrator.run_dataset(make_config(tmp_path / "staged"))
+        second = orchestrator.run_dataset(make_config(tmp_path / "again"))
+
+        assert _read_outputs(tmp_path / "staged") == _read_outputs(tmp_path / "plain")
+        assert _read_outputs(tmp_path / "again") == _read_outputs(tmp_path / "plain")
+        assert all(n == 4 for stage, n in _misses(first).items() if stage in PER_RECORD_STAGES)
+        assert all(n == 0 for n in _misses(second).values())
+
+    def test_bandpass_change_recomputes_from_filter(self, tmp_path, make_config):
+        """Changing bandpass_high reuses the loaded signals and rebuilds the rest."""
+        orchestrator = HRVAnalysisOrchestrator()
+        orchestrator.run_dataset(make_config(tmp_path / "a"))
+
+        config = make_config(tmp_path / "b")
+        config["signal"]["bandpass_high"] = 25.0
+        misses = _misses(orchestrator.run_dataset(config))
+
+        assert misses["load"] == 0
+        assert all(misses[s] == 4 for s in ("filter", "peaks", "rr", "features"))
+        assert misses["baseline"] == 4
+
+        plain = copy.deepcopy(config)
+        plain["processing"]["stage_cache"]["enabled"] = False
+        plain["output"]["dir"] = str(tmp_path / "plain")
+        orchestrator.run_dataset(plain)
+        assert _read_outputs(tmp_path / "b") == _read_outputs(tmp_path / "plain")
+
+    def test_threshold_change_only_reevaluates(self, tmp_path, make_config):
+        """Changing k_rest reuses every cached stage, including the baselines."""
+        orchestrator = HRVAnalysisOrchestrator()
+        orchestrator.run_dataset(make_config(tmp_path / "a"))
+
+        config = make_config(tmp_path / "b")
+        config["baseline"]["k_rest"] = 0.1
+        assert all(n == 0 for n in _misses(orchestrator.run_dataset(config)).values())
+
+        rates = pd.read_csv(tmp_path / "b" / "pass_rates.csv", encoding="utf-8-sig")
+        before = pd.read_csv(tmp_path / "a" / "pass_rates.csv", encoding="utf-8-sig")
+        rest = rates["state"] == "Rest"
+        assert rates.loc[rest, "pass_rate"].sum() < before.loc[rest, "pass_rate"].sum()
+        assert (tmp_path / "b" / "baselines.json").read_text() == (tmp_path / "a" / "baselines.json").read_text()
+
+    def test_aggregation_change_only_refits_baselines(self, tmp_path, make_config):
+        """Changing the baseline method rebuilds baselines but no per-record stage."""
+        orchestrator = HRVAnalysisOrchestrator()
+        orchestrator.run_dataset(make_config(tmp_path / "a"))
+
+        config = make_config(tmp_path / "b")
+        config["baseline"]["aggregation"] = {"method": "robust"}
+        misses = _misses(orchestrator.run_dataset(config))
+        assert all(misses[s] == 0 for s in PER_RECORD_STAGES)
+        assert misses["baseline"] == 4
+
+    def test_parallel_records_match_serial(self, tmp_path, make_config):
+        """With workers > 1 records run on a pool and give the same outputs."""
+        orchestrator = HRVAnalysisOrchestrator()
+        orchestrator.run_dataset(make_config(tmp_path / "serial", stages=False))
+
+        config = make_config(tmp_path / "parallel")
+        config["processing"]["workers"] = 2
+        result = orchestrator.run_dataset(config)
+        assert _misses(result)["features"] == 4
+        assert _read_outputs(tmp_path / "parallel") == _read_outputs(tmp_path / "serial")
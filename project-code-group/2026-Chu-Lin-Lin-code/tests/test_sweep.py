@@ -0,0 +1,91 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the parameter-sweep runner."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.sweep import apply_params, expand_grid, run_sweep
+
+
+FS = 250
+
+
+@pytest.fixture
+def config(dataset_config):
+    return dataset_config(duration_sec=80, heart_rate=lambda i, j: 75 - 5 * j)
+
+
+GRID = {
+    "features.window_size_sec": [20, 30],
+    "signal.bandpass_high": [15.0, 20.0],
+    "r_peak.min_rr_sec": [0.3, 0.75],
+    "baseline.k_rest": [0.5, 2.5],
+}
+
+
+class TestGridHelpers:
+    """Tests for grid expansion and dotted-key overrides."""
+
+    def test_expand_grid_order(self):
+        """Combinations vary the last key fastest."""
+        combos = expand_grid({"a.x": [1, 2], "b": ["u", "v"]})
+        assert combos == [{"a.x": 1, "b": "u"}, {"a.x": 1, "b": "v"},
+                          {"a.x": 2, "b": "u"}, {"a.x": 2, "b": "v"}]
+
+    def test_apply_params_copies(self):
+        """Dotted keys are set on a copy; missing sections are created."""
+        base = {"signal": {"bandpass_high": 20.0}}
+        out = apply_params(base, {"signal.bandpass_high": 15.0, "baseline.aggregation.method": "robust"})
+        assert out["signal"]["bandpass_high"] == 15.0
+        assert out["baseline"]["aggregation"]["method"] == "robust"
+        assert base == {"signal": {"bandpass_high": 20.0}}
+
+
+class TestRunSweep:
+    """Tests for run_sweep()."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_results_match_run_dataset_and_share_work(self, tmp_path, config, workers):
+        """Each row equals a full run_dataset(); the signal chain runs once per upstream setting."""
+        results = run_sweep(config, GRID, workers=workers, outdir=tmp_path / "sweep")
+
+        assert len(results) == 16
+        assert results["config_id"].tolist() == list(range(16))
+        assert (tmp_path / "sweep" / "sweep_results.csv").exists()
+        # 4 upstream settings (window size x bandpass_high), each shared by 4 configs
+        assert (results["shared_by"] == 4).all()
+        assert results.groupby(["features.window_size_sec", "signal.bandpass_high"]).ngroups == 4
+        # every recording was parsed once up front; groups reuse it
+        assert (results["stages_reused"] >= 4).all()
+        assert (results["stages_built"] == 4 * 4).all()
+        for col in ("upstream_sec", "eval_sec", "total_sec"):
+            assert (results[col] >= 0).all()
+
+        for config_id in (0, 7, 13):
+            row = results.iloc[config_id]
+            params = {k: row[k] for k in GRID}
+            out = tmp_path / f"single{config_id}"
+            single = apply_params(config, {**params, "output.dir": str(out)})
+            HRVAnalysisOrchestrator().run_dataset(single)
+            rates = pd.read_csv(out / "pass_rates.csv", encoding="utf-8-sig")
+
+            assert row["n_windows"] == rates["n_windows"].sum()
+            assert row["n_pass"] == rates["n_pass"].sum()
+            assert row["pass_rate_rest"] == pytest.approx(rates.loc[rates["state"] == "Rest", "pass_rate"].mean())
+
+    def test_downstream_keys_change_results(self, tmp_path, config):
+        """Evaluation-only keys still change pass rates within a shared group."""
+        results = run_sweep(config, {"baseline.k_rest": [0.1, 3.0]}, outdir=tmp_path / "sweep")
+        assert (results["shared_by"] == 2).all()
+        assert results["pass_rate_rest"].iloc[0] < results["pass_rate_rest"].iloc[1]
+
+    def test_empty_grid_raises(self, config):
+        """A grid without values is rejected."""
+        with pytest.raises(ValueError):
+            run_sweep(config, {"features.overlap": []})
@@ -1,10 +1,12 @@
 # SPDX-License-Identifier: Apache-2.0
 """Unit tests for HRV analysis tools."""
 
+import pickle
 import numpy as np
 import pytest
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 import pandas as pd # Added import
 
 import sys
@@ -12,15 +14,27 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.tools.ecg_loader import (
     load_ecg,
+    load_wesad_channels,
     pick_ecg_column,
     pick_time_column,
 )
 from src.tools.signal_processor import (
+    ARTIFACT_LABELS,
     bandpass_filter,
+    classify_rr_artifacts,
+    correct_rr_artifacts,
+    remove_ectopic_beats,
     detect_r_peaks,
+    detect_r_peaks_multirate,
     compute_rr_intervals,
-    process_signal
+    fuse_r_peaks,
+    _processed_result,
+    process_signal,
+    process_signal_batch,
+    signal_dtype,
 )
+from src.tools.segment_scheduler import sliding_window_matrix
+from src.tools.detector_benchmark import synthetic_record
 from src.tools.extended_features import (
     extract_extended_features
 )
@@ -68,6 +82,82 @@ class TestECGLoader:
             Path(temp_path).unlink()
 
 
+def _write_wesad_pickle(path: Path, n: int = 7000) -> dict:
+    """Write a small pickle with the WESAD subject layout."""
+    rng = np.random.default_rng(0)
+    subject = {
+        "subject": "S0",
+        "signal": {
+            "chest": {
+                "ACC": rng.standard_normal((n, 3)),
+                "ECG": rng.standard_normal((n, 1)),
+                "EMG": rng.standard_normal((n, 1)),
+                "EDA": rng.standard_normal((n, 1)),
+                "Temp": rng.standard_normal((n, 1)),
+                "Resp": rng.standard_normal((n, 1)),
+            },
+            "wrist": {
+                "ACC": rng.standard_normal((n // 700 * 32, 3)),
+                "BVP": rng.standard_normal((n // 700 * 64, 1)),
+            },
+        },
+        "label": rng.integers(0, 5, n),
+    }
+    with open(path, "wb") as f:
+        pickle.dump(subject, f)
+    return subject
+
+
+class TestWESADLoader:
+    """Tests for the WESAD pickle loader with per-channel memmap cache."""
+
+    def test_load_ecg_pickle(self, tmp_path):
+        """load_ecg() returns the chest ECG and labels from a WESAD pickle."""
+        pkl = tmp_path / "S0.pkl"
+        subject = _write_wesad_pickle(pkl)
+
+        result = load_ecg(pkl, cache_dir=tmp_path / "cache")
+
+        assert result["sampling_rate"] == 700
+        assert result["n_samples"] == 7000
+        assert result["signal"].ndim == 1
+        np.testing.assert_array_equal(result["signal"], subject["signal"]["chest"]["ECG"][:, 0])
+        np.testing.assert_array_equal(result["labels"], subject["label"])
+
+    def test_only_requested_channels_are_extracted(self, tmp_path):
+        """Only requested channels and labels are written to the cache."""
+        pkl = tmp_path / "S0.pkl"
+        _write_wesad_pickle(pkl)
+        cache = tmp_path / "cache"
+
+        arrays = load_wesad_channels(pkl, channels=["chest/ECG", "wrist/BVP"], cache_dir=cache)
+
+        assert set(arrays) == {"chest/ECG", "wrist/BVP", "label"}
+        assert sorted(p.name for p in cache.glob("*.npy")) == [
+            "chest_ECG.npy", "label.npy", "wrist_BVP.npy"
+        ]
+
+    def test_second_load_uses_memmap_cache(self, tmp_path):
+        """Later loads return memory-mapped views without unpickling."""
+        pkl = tmp_path / "S0.pkl"
+        subject = _write_wesad_pickle(pkl)
+        load_wesad_channels(pkl, cache_dir=tmp_path / "cache")
+
+        with patch("src.tools.ecg_loader.pickle.load", side_effect=AssertionError("unpickled")):
+            arrays = load_wesad_channels(pkl, cache_dir=tmp_path / "cache")
+
+        assert isinstance(arrays["chest/ECG"], np.memmap)
+        assert not arrays["chest/ECG"].flags.writeable
+        np.testing.assert_array_equal(arrays["chest/ECG"], subject["signal"]["chest"]["ECG"])
+
+    def test_missing_channel(self, tmp_path):
+        """Requesting a channel absent from the pickle raises ValueError."""
+        pkl = tmp_path / "S0.pkl"
+        _write_wesad_pickle(pkl)
+        with pytest.raises(ValueError, match="wrist/EDA"):
+            load_wesad_channels(pkl, channels=["wrist/EDA"], cache_dir=tmp_path / "cache")
+
+
 class TestSignalProcessor:
     """Tests for signal processing functionality."""
 
@@ -152,8 +242,300 @@ class TestSignalProcessor:
         assert "n_beats" in result
         assert result["n_beats"] > 0
 
+    @staticmethod
+    def _synthetic_ecg(fs: int, duration: float, seed: int = 0) -> np.ndarray:
+        """Gaussian P/QRS/T beats with jittered RR, baseline wander and noise."""
+        rng = np.random.default_rng(seed)
+        t = np.arange(int(duration * fs)) / fs
+        x = 0.15 * np.sin(2 * np.pi * 0.3 * t) + 0.05 * rng.standard_normal(len(t))
+        beat = 0.5
+        while beat < duration - 0.5:
+            for off, amp, width in [(-0.2, 0.15, 0.025), (-0.03, -0.1, 0.008),
+                                    (0.0, 1.0, 0.01), (0.03, -0.2, 0.008), (0.25, 0.3, 0.04)]:
+                x += amp * np.exp(-0.5 * ((t - beat - off) / width) ** 2)
+            beat += 0.85 + 0.05 * rng.standard_normal()
+        return x
+
+    @pytest.mark.parametrize("fs,trim", [(700, 0), (700, 123), (500, 7), (1000, 0)])
+    def test_multirate_matches_full_rate(self, fs, trim):
+        """Decimate-detect-refine peaks match detect_r_peaks within one sample."""
+        x = self._synthetic_ecg(fs, 60, seed=fs + trim)[trim:]
+        filtered = bandpass_filter(x, fs, lowcut=0.5, highcut=20.0)
+
+        full = detect_r_peaks(filtered, fs)
+        multi = detect_r_peaks_multirate(filtered, fs, detection_fs=50, min_fs=0, min_duration_sec=0)
+
+        assert len(full) > 50
+        assert len(multi) == len(full)
+        assert np.max(np.abs(multi - full)) <= 1
+
+    @staticmethod
+    def _matched(reference: np.ndarray, peaks: np.ndarray, tol: int) -> int:
+        """Number of reference peaks with a peak within tol samples."""
+        return int(np.sum(np.min(np.abs(reference[:, None] - peaks[None, :]), axis=1) <= tol))
+
+    @pytest.mark.parametrize("fs,noise_std", [(700, 0.4), (700, 0.6), (1000, 0.4)])
+    def test_multirate_agrees_on_noisy_band_limited_signal(self, fs, noise_std):
+        """With a 20 Hz band-pass, noisy records give the full-rate beats and no worse accuracy."""
+        rec = synthetic_record(duration_sec=300, fs=fs, noise_std=noise_std, seed=1)
+        filtered = bandpass_filter(rec["signal"], fs, lowcut=0.5, highcut=20.0)
+
+        full = detect_r_peaks(filtered, fs)
+        multi = detect_r_peaks_multirate(filtered, fs, detection_fs=50)
+
+        assert abs(len(multi) - len(full)) <= 0.02 * len(full)
+        assert self._matched(full, multi, 1) >= 0.95 * len(full)
+        tol = int(0.05 * fs)
+        assert self._matched(rec["beats"], multi, tol) >= self._matched(rec["beats"], full, tol) - 2
+
+    def test_multirate_rejects_noise_above_detection_band(self):
+        """Noise between detection_fs / 2 and the band edge adds no false beats to the multirate path."""
+        fs = 700
+        rec = synthetic_record(duration_sec=300, fs=fs, noise_std=0.4, seed=1)
+        filtered = bandpass_filter(rec["signal"], fs, lowcut=0.5, highcut=40.0)
+
+        full = detect_r_peaks(filtered, fs)
+        multi = detect_r_peaks_multirate(filtered, fs, detection_fs=50)
+
+        n_beats = len(rec["beats"])
+        assert abs(len(multi) - n_beats) <= 0.02 * n_beats
+        assert len(full) > len(multi)
+        tol = int(0.05 * fs)
+        assert self._matched(rec["beats"], multi, tol) >= self._matched(rec["beats"], full, tol)
+
+    @pytest.mark.parametrize("fs,duration", [(50, 30), (500, 300), (700, 60)])
+    def test_multirate_falls_back_below_break_even(self, fs, duration, monkeypatch):
+        """Without room to decimate, or below the break-even rate or length, the full-rate detector is used."""
+        x = self._synthetic_ecg(fs, duration, seed=fs)
+        filtered = bandpass_filter(x, fs, lowcut=0.5, highcut=20.0)
+        monkeypatch.setattr("src.tools.signal_processor._decimate_fir",
+                            lambda *args: pytest.fail("decimated below break-even"))
+        np.testing.assert_array_equal(
+            detect_r_peaks_multirate(filtered, fs, detection_fs=50),
+            detect_r_peaks(filtered, fs),
+        )
 
-
+    def test_process_signal_detection_fs(self):
+        """process_signal(detection_fs=...) yields the same RR intervals."""
+        fs = 700
+        ecg_data = {"signal": self._synthetic_ecg(fs, 60, seed=3), "sampling_rate": fs}
+        reference = process_signal(ecg_data, filter_high=20.0)
+        multirate = process_signal(ecg_data, filter_high=20.0, detection_fs=50)
+        assert multirate["n_beats"] == reference["n_beats"]
+        np.testing.assert_allclose(multirate["rr_intervals"], reference["rr_intervals"], atol=2 * 1000 / fs)
+
+    def test_batched_filter_and_peaks_match_per_window(self):
+        """Filtering and peak detection along axis=1 equal the per-window calls."""
+        fs = 250
+        windows = sliding_window_matrix(self._synthetic_ecg(fs, 120, seed=5), 30 * fs, 15 * fs)
+        filtered = bandpass_filter(windows, fs, lowcut=0.5, highcut=20.0, axis=1)
+        peaks = detect_r_peaks(filtered, fs)
+
+        assert filtered.shape == windows.shape
+        assert len(peaks) == len(windows)
+        for row, f, p in zip(windows, filtered, peaks):
+            np.testing.assert_array_equal(f, bandpass_filter(row, fs, lowcut=0.5, highcut=20.0))
+            np.testing.assert_array_equal(p, detect_r_peaks(f, fs))
+
+    def test_process_signal_batch_matches_process_signal(self):
+        """process_signal_batch() gives one process_signal() result per row."""
+        fs = 250
+        windows = sliding_window_matrix(self._synthetic_ecg(fs, 90, seed=6), 30 * fs, 10 * fs)
+        batch = process_signal_batch(windows, fs, filter_high=20.0)
+
+        assert len(batch) == len(windows)
+        for row, got in zip(windows, batch):
+            expected = process_signal({"signal": row, "sampling_rate": fs}, filter_high=20.0)
+            assert got["n_beats"] == expected["n_beats"]
+            np.testing.assert_array_equal(got["r_peaks"], expected["r_peaks"])
+            np.testing.assert_array_equal(got["rr_intervals"], expected["rr_intervals"])
+
+    def test_process_signal_batch_rejects_1d(self):
+        """A 1-D signal is not a window matrix."""
+        with pytest.raises(ValueError):
+            process_signal_batch(np.zeros(1000), 250)
+
+    def test_float32_signal_path(self):
+        """A float32 signal stays float32 through filtering; RR intervals stay float64."""
+        fs = 250
+        ecg = np.round(self._synthetic_ecg(fs, 60, seed=8) * 1000)
+        ref = process_signal({"signal": ecg, "sampling_rate": fs}, filter_high=20.0)
+        got = process_signal({"signal": ecg.astype(np.float32), "sampling_rate": fs}, filter_high=20.0)
+
+        assert got["filtered_signal"].dtype == np.float32
+        assert got["rr_intervals"].dtype == np.float64
+        np.testing.assert_allclose(got["filtered_signal"], ref["filtered_signal"],
+                                   atol=1e-5 * np.abs(ref["filtered_signal"]).max())
+        assert len(got["r_peaks"]) == len(ref["r_peaks"])
+        assert np.abs(got["r_peaks"] - ref["r_peaks"]).max() <= 1
+
+        windows = sliding_window_matrix(ecg.astype(np.float32), 30 * fs, 15 * fs)
+        assert all(r["filtered_signal"].dtype == np.float32 for r in process_signal_batch(windows, fs))
+
+    def test_signal_dtype(self):
+        """Only float64 and float32 are accepted as signal dtypes."""
+        assert signal_dtype("float32") == np.float32
+        assert signal_dtype(None) == np.float64
+        with pytest.raises(ValueError):
+            signal_dtype("float16")
+
+
+
+
+
+class TestMultiLead:
+    """Tests for (n_samples, n_channels) loading and processing."""
+
+    def test_load_device_csv(self, tmp_path):
+        """All columns of a comma-separated file load as channels; columns= selects leads."""
+        data = np.column_stack([np.arange(100), np.arange(100) * 160.0, np.random.default_rng(0).random((100, 4))])
+        path = tmp_path / "rec.csv"
+        np.savetxt(path, data, delimiter=", ", fmt="%.6f")
+
+        result = load_ecg(path, sampling_rate=50)
+        assert result["signal"].shape == (100, 6)
+        assert result["n_channels"] == 6
+
+        leads = load_ecg(path, sampling_rate=50, columns=[3, 4, 5])
+        np.testing.assert_allclose(leads["signal"], data[:, 3:], atol=1e-6)
+        assert leads["n_channels"] == 3
+        assert load_ecg(path, sampling_rate=50, columns=[3])["signal"].ndim == 1
+
+    def test_load_wesad_channel_list(self, tmp_path):
+        """A list of WESAD channels is stacked into columns."""
+        pkl = tmp_path / "S0.pkl"
+        subject = _write_wesad_pickle(pkl)
+        result = load_ecg(pkl, channel=["chest/ECG", "chest/ACC"], cache_dir=tmp_path / "cache")
+        assert result["signal"].shape == (7000, 4)
+        np.testing.assert_array_equal(result["signal"][:, 0], subject["signal"]["chest"]["ECG"][:, 0])
+        np.testing.assert_array_equal(result["signal"][:, 1:], subject["signal"]["chest"]["ACC"])
+        with pytest.raises(ValueError):
+            load_ecg(pkl, channel=["chest/ECG", "wrist/BVP"], cache_dir=tmp_path / "cache")
+
+    def test_leads_match_single_channel_processing(self):
+        """One filter call along the time axis gives each lead's single-channel result."""
+        fs = 250
+        signal = np.column_stack([TestSignalProcessor._synthetic_ecg(fs, 60, seed=s) for s in (1, 2, 3)])
+        result = process_signal({"signal": signal, "sampling_rate": fs}, filter_high=20.0)
+
+        assert result["n_channels"] == 3
+        assert result["filtered_signal"].shape == signal.shape
+        for c, lead in enumerate(result["leads"]):
+            expected = process_signal({"signal": signal[:, c], "sampling_rate": fs}, filter_high=20.0)
+            np.testing.assert_allclose(lead["filtered_signal"], expected["filtered_signal"], atol=1e-12)
+            np.testing.assert_array_equal(lead["r_peaks"], expected["r_peaks"])
+            np.testing.assert_array_equal(lead["rr_intervals"], expected["rr_intervals"])
+        np.testing.assert_array_equal(result["r_peaks"], result["leads"][0]["r_peaks"])
+
+    def test_fusion_outvotes_a_bad_lead(self):
+        """A lead that misses beats or fires on noise is outvoted by the other leads."""
+        fs = 250
+        truth = np.arange(100, 15000, 210)
+        rng = np.random.default_rng(0)
+        peaks = [truth + rng.integers(-2, 3, len(truth)) for _ in range(2)]
+        peaks.append(np.sort(np.r_[truth[::2], [155, 7010]]))    # misses every other beat, 2 false peaks
+
+        fused = fuse_r_peaks(peaks, fs)
+        assert len(fused) == len(truth)
+        assert np.max(np.abs(fused - truth)) <= 2
+        assert len(fuse_r_peaks(peaks, fs, min_leads=3)) == len(truth[::2])
+        assert len(fuse_r_peaks([np.array([], int)] * 2, fs)) == 0
+
+    def test_process_signal_fused_peaks(self):
+        """fuse_leads recovers the beats of a lead corrupted by bursts of noise."""
+        fs = 250
+        clean = TestSignalProcessor._synthetic_ecg(fs, 60, seed=4)
+        noisy = clean.copy()
+        noisy[3000:4500] += 3.0 * np.random.default_rng(1).standard_normal(1500)
+        signal = np.column_stack([noisy, clean, clean * 0.8])
+
+        reference = process_signal({"signal": clean, "sampling_rate": fs}, filter_high=20.0)
+        fused = process_signal({"signal": signal, "sampling_rate": fs}, filter_high=20.0, fuse_leads=True)
+        assert fused["leads"][0]["n_beats"] < reference["n_beats"]
+        assert fused["n_beats"] == reference["n_beats"]
+        assert np.max(np.abs(fused["r_peaks"] - reference["r_peaks"])) <= 1
+
+
+class TestRRArtifacts:
+    """Tests for RR artifact classification and correction."""
+
+    @staticmethod
+    def planted():
+        """Clean RR series and a copy with an ectopic pair, a missed and an extra beat and a pause."""
+        rr = np.random.default_rng(0).normal(800, 20, 40)
+        bad = list(rr)
+        bad[5], bad[6] = 500.0, 1100.0               # premature beat + compensatory pause
+        bad[12:14] = [rr[12] + rr[13]]               # missed beat
+        bad[18:19] = [0.3 * rr[19], 0.7 * rr[19]]    # extra beat (indices realign after it)
+        bad[30] = 1300.0                             # long interval
+        return rr, np.array(bad)
+
+    def test_remove_ectopic_matches_loop(self):
+        """The vectorized ectopic removal keeps exactly the intervals of the original loop."""
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            rr = rng.normal(800, 150, rng.integers(3, 60))
+            valid = np.ones(len(rr), dtype=bool)
+            for i, d in enumerate(np.abs(np.diff(rr)) / rr[:-1]):
+                if d > 0.2:
+                    valid[i] = False
+                    valid[i + 1] = False
+            np.testing.assert_array_equal(remove_ectopic_beats(rr), rr[valid])
+
+    def test_classify_planted_artifacts(self):
+        """Each planted artifact gets its class; all other intervals are normal."""
+        _, bad = self.planted()
+        labels = classify_rr_artifacts(bad)
+        found = {int(i): ARTIFACT_LABELS[labels[i]] for i in np.flatnonzero(labels)}
+        assert found == {5: "ectopic", 6: "ectopic", 12: "missed", 18: "extra", 19: "extra", 30: "long"}
+
+    def test_correction_keeps_alignment(self):
+        """Correction merges and splits beats instead of dropping them, restoring the series."""
+        rr, bad = self.planted()
+        corrected = correct_rr_artifacts(bad)
+
+        assert len(corrected) == len(rr)
+        ok = np.ones(len(rr), dtype=bool)
+        ok[[5, 6, 30]] = False
+        # split / merged intervals sum to the true durations
+        np.testing.assert_allclose(corrected[ok].cumsum()[-1], rr[ok].sum())
+        np.testing.assert_allclose(corrected[12] + corrected[13], rr[12] + rr[13])
+        np.testing.assert_allclose(corrected[19], rr[19])
+        # interpolated intervals are back in the normal range
+        assert np.all(np.abs(corrected[[5, 6, 30]] - 800) < 100)
+        assert len(remove_ectopic_beats(bad)) < len(rr) - 3
+
+    def test_short_and_clean_series(self):
+        """Series shorter than 3 intervals and artifact-free series are returned unchanged."""
+        np.testing.assert_array_equal(correct_rr_artifacts(np.array([800.0, 1600.0])), [800.0, 1600.0])
+        rr, _ = self.planted()
+        assert not classify_rr_artifacts(rr).any()
+        np.testing.assert_array_equal(correct_rr_artifacts(rr), rr)
+
+    def test_day_long_series(self):
+        """A day of beats (~100k intervals) is classified and corrected in one pass."""
+        rng = np.random.default_rng(1)
+        rr = rng.normal(850, 15, 100_000)
+        missed = rng.choice(len(rr), 300, replace=False)
+        rr[missed] *= 2
+        labels = classify_rr_artifacts(rr)
+
+        assert set(np.flatnonzero(labels == 2)) >= set(missed)
+        corrected = correct_rr_artifacts(rr, labels)
+        assert len(corrected) == len(rr) + 300
+        np.testing.assert_allclose(corrected.sum(), rr.sum())
+
+    def test_processed_result_correct_mode(self):
+        """With correct_artifacts, a missed R-peak no longer shortens the RR series."""
+        fs = 500
+        peaks = np.arange(0, 60 * fs, 400)
+        peaks = np.delete(peaks, 40)
+        corrected = _processed_result(np.zeros(60 * fs), peaks, fs, True, correct_artifacts=True)
+        removed = _processed_result(np.zeros(60 * fs), peaks, fs, True)
+
+        assert len(corrected["rr_intervals"]) == len(peaks)
+        np.testing.assert_allclose(corrected["rr_intervals"], 800.0)
+        assert len(removed["rr_intervals"]) < len(peaks) - 1
 
 
 class TestIntegration:
@@ -0,0 +1,119 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the watch-folder ingestion daemon."""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.watcher import DatasetWatcher
+
+
+FS = 250
+
+
+@pytest.fixture
+def dataset(tmp_path, dataset_config):
+    def config(outdir):
+        return dataset_config(outdir, {"watch": {"poll_interval_sec": 0, "workers": 2}})
+
+    config(tmp_path / "out")
+    return tmp_path / "data", config
+
+
+def _assert_same_outputs(a: Path, b: Path) -> None:
+    assert (a / "baselines.json").read_text() == (b / "baselines.json").read_text()
+    assert (a / "pass_rates.csv").read_text() == (b / "pass_rates.csv").read_text()
+    names_a = sorted(p.name for p in (a / "per_file").glob("*.json"))
+    names_b = sorted(p.name for p in (b / "per_file").glob("*.json"))
+    assert names_a == names_b
+    for name in names_a:
+        assert (a / "per_file" / name).read_text() == (b / "per_file" / name).read_text()
+    assert (a / "dataset_summary.json").read_text() == (b / "dataset_summary.json").read_text()
+    with np.load(a / "window_features.npz") as za, np.load(b / "window_features.npz") as zb:
+        assert sorted(za.files) == sorted(zb.files)
+        for key in za.files:
+            np.testing.assert_array_equal(za[key], zb[key])
+
+
+class TestDatasetWatcher:
+    """Tests for DatasetWatcher."""
+
+    def test_outputs_match_run_dataset(self, tmp_path, dataset):
+        """After ingesting the tree, outputs equal a full run_dataset()."""
+        _, config = dataset
+        result = DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)
+        HRVAnalysisOrchestrator().run_dataset(config(tmp_path / "batch_out"))
+
+        assert result["n_processed"] == 4
+        _assert_same_outputs(tmp_path / "watch_out", tmp_path / "batch_out")
+
+    def test_new_file_is_processed_incrementally(self, tmp_path, dataset, write_recording):
+        """A restarted watcher only processes the new file and updates its group."""
+        data_dir, config = dataset
+        DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)
+
+        write_recording(data_dir / "p1" / "Rest" / "rec2.csv", heart_rate=80, seed=42)
+        result = DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)
+        HRVAnalysisOrchestrator().run_dataset(config(tmp_path / "batch_out"))
+
+        assert result["n_processed"] == 1
+        _assert_same_outputs(tmp_path / "watch_out", tmp_path / "batch_out")
+
+    def test_deleted_file_is_dropped(self, tmp_path, dataset, write_recording):
+        """Removing a recording removes it from pass_rates.csv and its baseline."""
+        data_dir, config = dataset
+        write_recording(data_dir / "p2" / "Active" / "rec2.csv", heart_rate=90, seed=7)
+        DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)
+
+        (data_dir / "p2" / "Active" / "rec2.csv").unlink()
+        result = DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)
+
+        pass_rates = pd.read_csv(tmp_path / "watch_out" / "pass_rates.csv", encoding="utf-8-sig")
+        assert result["n_processed"] == 0
+        assert len(pass_rates) == 4
+        assert not pass_rates["file"].str.endswith("rec2.csv").any()
+
+    def test_failing_file_is_attempted_once(self, tmp_path, dataset, write_recording, caplog):
+        """A file that fails is not retried on later polls, only after it changes."""
+        data_dir, config = dataset
+        bad = data_dir / "p1" / "Rest" / "bad.csv"
+        bad.write_text("ECG\nabc\ndef\n")
+
+        watcher = DatasetWatcher(config(tmp_path / "watch_out"))
+        with caplog.at_level("ERROR", logger="hrv_agent.watcher"):
+            results = [watcher.run(until_idle=True) for _ in range(3)]
+            results.append(DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True))
+        failures = [r for r in caplog.records if r.getMessage().startswith(f"Failed to process {bad}")]
+
+        assert len(failures) == 1
+        assert [r["n_processed"] for r in results] == [4, 0, 0, 0]
+        pass_rates = pd.read_csv(tmp_path / "watch_out" / "pass_rates.csv", encoding="utf-8-sig")
+        assert len(pass_rates) == 4 and not pass_rates["file"].str.endswith("bad.csv").any()
+
+        write_recording(bad, heart_rate=80, seed=3)
+        assert DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)["n_processed"] == 1
+
+    def test_queue_survives_restart(self, tmp_path, dataset):
+        """Queued but unprocessed files are persisted and resumed by the next watcher."""
+        _, config = dataset
+        watcher = DatasetWatcher(config(tmp_path / "watch_out"))
+        watcher.scan()
+        watcher.scan()   # signatures stable -> queued
+        queue = json.loads((watcher.state_dir / "queue.json").read_text())
+        assert len(queue) == 4
+
+        # a stopped watcher leaves the queue untouched
+        watcher.stop()
+        assert watcher.run()["n_processed"] == 0
+        assert len(json.loads((watcher.state_dir / "queue.json").read_text())) == 4
+
+        result = DatasetWatcher(config(tmp_path / "watch_out")).run(until_idle=True)
+        assert result["n_processed"] == 4
+        assert json.loads((watcher.state_dir / "queue.json").read_text()) == []
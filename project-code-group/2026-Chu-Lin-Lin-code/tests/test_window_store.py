@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: Apache-2.0
+"""Tests for the struct-of-arrays window metrics store."""
+
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.orchestrator import HRVAnalysisOrchestrator
+from src.tools.window_store import FEATURE_COLUMNS, WINDOW_DTYPE, WindowStore
+
+
+def _filled_store(n: int = 50, seed: int = 0) -> tuple[WindowStore, list[np.ndarray]]:
+    """Store with n windows of varying RR counts, plus the RR arrays appended."""
+    rng = np.random.default_rng(seed)
+    store = WindowStore(capacity=4, rr_capacity=8)   # force both buffers to grow
+    rrs = []
+    for i in range(n):
+        rr = rng.normal(800.0, 40.0, rng.integers(0, 40))
+        rrs.append(rr)
+        store.append(i % 3, 100 * i, 100 * i + 300, rr, rr_mean=0.8, sdnn=float(i), rmssd=2.0 * i)
+    return store, rrs
+
+
+class TestWindowStore:
+    """Tests for WindowStore."""
+
+    def test_append_and_read_back(self):
+        """Columns and per-window RR slices round-trip through growth of both buffers."""
+        store, rrs = _filled_store()
+        assert len(store) == 50
+        assert store.rows.dtype == WINDOW_DTYPE
+        np.testing.assert_array_equal(store["sdnn"], np.arange(50, dtype=float))
+        np.testing.assert_array_equal(store["start"], 100 * np.arange(50))
+        assert np.isnan(store["lf_hf_ratio"]).all()
+        for i, rr in enumerate(rrs):
+            np.testing.assert_array_equal(store.rr(i), rr)
+        assert store.rr_buffer.size == sum(len(rr) for rr in rrs)
+
+    def test_subset_shares_rr_buffer(self):
+        """A row subset is a store whose RR slices still point into the shared buffer."""
+        store, rrs = _filled_store()
+        mask = store["record"] == 1
+        sub = store[mask]
+        assert len(sub) == int(mask.sum())
+        assert np.shares_memory(sub.rr_buffer, store.rr_buffer)
+        for j, i in enumerate(np.flatnonzero(mask)):
+            np.testing.assert_array_equal(sub.rr(j), rrs[i])
+
+    def test_concatenate_compacts_and_relabels(self):
+        """concatenate() gathers only the referenced RR slices and sets record indices."""
+        store, rrs = _filled_store()
+        a, b = store[10:20], store[np.array([3, 1])]
+        joined = WindowStore.concatenate([a, b], records=[5, 7])
+
+        expected = rrs[10:20] + [rrs[3], rrs[1]]
+        assert joined["record"].tolist() == [5] * 10 + [7] * 2
+        assert joined.rr_buffer.size == sum(len(rr) for rr in expected)
+        for i, rr in enumerate(expected):
+            np.testing.assert_array_equal(joined.rr(i), rr)
+
+    def test_save_load_and_pickle(self, tmp_path):
+        """save()/load() and pickling preserve rows and RR intervals."""
+        store, rrs = _filled_store()
+        store.save(tmp_path / "windows.npz")
+        for restored in (WindowStore.load(tmp_path / "windows.npz"), pickle.loads(pickle.dumps(store))):
+            pd.testing.assert_frame_equal(restored.to_frame(), store.to_frame())
+            np.testing.assert_array_equal(restored.rr(7), rrs[7])
+
+    def test_feature_matrix_follows_rows(self, tmp_path):
+        """Per-window features grow with the store and survive subsets, joins, save/load and pickling."""
+        store = WindowStore(capacity=2)
+        feats = np.arange(5 * len(FEATURE_COLUMNS), dtype=float).reshape(5, -1)
+        for i in range(5):
+            store.append(0, i, i + 1, [800.0], features=feats[i] if i != 2 else None)
+        feats[2] = np.nan
+
+        np.testing.assert_array_equal(store.features, feats)
+        np.testing.assert_array_equal(store.feature("rmssd"), feats[:, FEATURE_COLUMNS.index("rmssd")])
+        np.testing.assert_array_equal(store[np.array([4, 0])].features, feats[[4, 0]])
+        np.testing.assert_array_equal(WindowStore.concatenate([store[3:], store[:1]]).features,
+                                      feats[[3, 4, 0]])
+        store.save(tmp_path / "windows.npz")
+        for restored in (WindowStore.load(tmp_path / "windows.npz"), pickle.loads(pickle.dumps(store))):
+            np.testing.assert_array_equal(restored.features, feats)
+
+    def test_memory_per_window(self):
+        """Per window, the store's metric columns take a tenth of the old dicts' overhead."""
+        store, rrs = _filled_store()
+        fs = 250
+        dict_bytes = 0
+        for i, rr in enumerate(rrs):
+            # what run_dataset used to hold per window: the _window_metrics dict
+            # (RR array and four floats) and the per-file 'windows' entry
+            m = {"rr": np.array(rr, dtype=float), "mean_hr_bpm": float(store["mean_hr_bpm"][i]),
+                 "sdnn": float(store["sdnn"][i]), "rmssd": float(store["rmssd"][i]),
+                 "lf_hf_ratio": float(store["lf_hf_ratio"][i])}
+            detail = {"start_sec": store["start"][i] / fs, "end_sec": store["end"][i] / fs, "pass": True,
+                      "rr_mean": float(np.mean(rr)) if len(rr) else np.nan,
+                      "sdnn": m["sdnn"], "rmssd": m["rmssd"]}
+            dict_bytes += 2 * 8   # their slots in the per-group and per-file lists
+            dict_bytes += sys.getsizeof(m) + sys.getsizeof(m["rr"])
+            dict_bytes += sum(sys.getsizeof(m[k]) for k in ("mean_hr_bpm", "sdnn", "rmssd", "lf_hf_ratio"))
+            dict_bytes += sys.getsizeof(detail)
+            dict_bytes += sum(sys.getsizeof(detail[k]) for k in ("start_sec", "end_sec", "rr_mean"))
+
+        # both layouts keep the RR values themselves (8 bytes each); the feature
+        # matrix holds values the old dicts never kept
+        rr_bytes = store.rr_buffer.nbytes
+        assert rr_bytes == sum(rr.nbytes for rr in rrs)
+        assert store.nbytes - store.features.nbytes - rr_bytes == len(store) * WINDOW_DTYPE.itemsize
+        assert (dict_bytes - rr_bytes) >= 10 * len(store) * WINDOW_DTYPE.itemsize
+
+
+class TestWindowStoreInOrchestrator:
+    """Tests for using a WindowStore as the orchestrator's window table."""
+
+    def test_store_and_dataframe_give_same_results(self):
+        """_fit_baseline and _evaluate_windows accept a store like the equivalent DataFrame."""
+        orchestrator = HRVAnalysisOrchestrator()
+        rng = np.random.default_rng(3)
+        store = WindowStore()
+        for i in range(40):
+            rr = rng.normal(0.8, 0.05, 30)
+            store.append(i % 2, i, i + 10, rr, rr_mean=float(rr.mean()),
+                         sdnn=float(rng.normal(40, 5)), rmssd=float(rng.normal(30, 5)))
+        frame = store.to_frame()
+        records = [{"person": "p1", "state": "Rest"}, {"person": "p1", "state": "Active"}]
+
+        baselines = {"p1": {}}
+        for st in ("Rest", "Active"):
+            sel = orchestrator._group_mask(store, records, "p1", st)
+            baselines["p1"][st] = orchestrator._fit_baseline(store[sel])
+            assert baselines["p1"][st] == orchestrator._fit_baseline(frame[sel])
+
+        np.testing.assert_array_equal(
+            orchestrator._evaluate_windows(store, records, baselines, 1.5, 2.0, 0.3, 2.0),
+            orchestrator._evaluate_windows(frame, records, baselines, 1.5, 2.0, 0.3, 2.0),
+        )
@@ -1,16 +1,62 @@
 #License:Apache License 2.0
 from .data import load_ecg_record
-from .tools import preprocess_ecg, detect_rpeaks, validate_signal_quality
+from .tools import preprocess_ecg, detect_rpeaks, validate_signal_quality, PreprocessMemo
 from .metrics import compute_hrv_metrics
 from .plotting import plot_results
 from .report import generate_markdown_report
+from multiprocessing.connection import wait
+import multiprocessing
 import os
 import json
 import logging
 
+def run_policy(ecg, fs, policy, clean_ecg=None):
+    """
+    Act + Verify for one (preprocess, detector) policy.
+    Module-level so it can run in a worker process.
+    clean_ecg: Already preprocessed signal for this policy (skips preprocessing).
+    """
+    if clean_ecg is None:
+        clean_ecg = preprocess_ecg(ecg, fs, strategy=policy['preprocess'])
+    rpeaks = detect_rpeaks(clean_ecg, fs, method=policy['detector'])
+    quality = validate_signal_quality(clean_ecg, rpeaks, fs)
+    return clean_ecg, rpeaks, quality
+
+def _policy_group_worker(conn, ecg, fs, policies, clean_ecg=None):
+    """
+    Worker process for parallel mode: one preprocessing step and its detectors.
+
+    Cleans the signal once (unless clean_ecg is given), runs the (index, policy)
+    pairs in priority order and sends (index, result, None) for each, or
+    (None, None, exception) if one raised. Stops after the first Grade A:
+    later policies of the group could not win anyway.
+    """
+    try:
+        if clean_ecg is None:
+            clean_ecg = preprocess_ecg(ecg, fs, strategy=policies[0][1]['preprocess'])
+        for i, policy in policies:
+            result = run_policy(ecg, fs, policy, clean_ecg)
+            conn.send((i, result, None))
+            if result[2]['grade'] == 'A':
+                break
+    except Exception as e:
+        conn.send((None, None, e))
+    finally:
+        conn.close()
+
 class HRVCoachAgent:
-    def __init__(self, output_dir="outputs"):
+    def __init__(self, output_dir="outputs", parallel=False, max_workers=None):
+        """
+        parallel: Start all strategies at once instead of trying them one
+            after another, one worker process per preprocessing step. The
+            first Grade A in priority order wins (as in the serial loop);
+            workers still running then are terminated.
+        max_workers: Maximum number of worker processes at a time
+            (default: one per preprocessing step).
+        """
         self.output_dir = output_dir
+        self.parallel = parallel
+        self.max_workers = max_workers
         os.makedirs(self.output_dir, exist_ok=True)
         self.logger = self._setup_logger()
         
@@ -24,6 +70,72 @@ class HRVCoachAgent:
             logger.addHandler(ch)
         return logger
 
+    def _run_parallel(self, ecg, fs, strategies, memo):
+        """
+        Run all strategies speculatively; return their results in priority order.
+
+        Strategies are grouped by preprocessing step and each group runs in
+        its own process, which cleans the signal once and then runs the
+        group's detectors in priority order (Standard and RobustDetect share
+        'A', StrongFilter runs 'B' next to them). Waits until some strategy
+        has Grade A and every strategy before it has finished (so ties go to
+        the earlier one), then terminates the workers still running, so
+        nothing keeps computing after run() returns. Strategies after the
+        winner are left out of the returned list. Cleaned signals already in
+        the memo are handed to the workers, and the ones the workers compute
+        are added to it.
+        """
+        groups = {}
+        for i, policy in enumerate(strategies):
+            groups.setdefault(policy['preprocess'], []).append((i, policy))
+        todo = list(groups.items())  # in priority order of each group's first strategy
+        n_workers = min(self.max_workers or len(todo), len(todo))
+        results = [None] * len(strategies)
+        running = {}  # result pipe -> process
+        try:
+            while todo or running:
+                while todo and len(running) < n_workers:
+                    step, policies = todo.pop(0)
+                    recv, send = multiprocessing.Pipe(duplex=False)
+                    proc = multiprocessing.Process(
+                        target=_policy_group_worker, daemon=True,
+                        args=(send, ecg, fs, policies, memo.peek(step)))
+                    proc.start()
+                    send.close()
+                    running[recv] = proc
+
+                for conn in wait(list(running)):
+                    try:
+                        i, result, error = conn.recv()
+                    except EOFError:
+                        # Group finished
+                        proc = running.pop(conn)
+                        conn.close()
+                        proc.join()
+                        if proc.exitcode != 0:
+                            raise RuntimeError(f"Strategy worker exited with code {proc.exitcode}")
+                        continue
+                    if error is not None:
+                        raise error
+                    results[i] = result
+                    memo.store(strategies[i]['preprocess'], result[0])
+
+                # Winner: first Grade A with all higher-priority strategies done
+                for i, res in enumerate(results):
+                    if res is None:
+                        break
+                    if res[2]['grade'] == 'A':
+                        if running:
+                            self.logger.info(f"{strategies[i]['name']} reached Grade A; terminating {len(running)} remaining workers")
+                        return results[:i + 1]
+            return results
+        finally:
+            # Stop strategies that are no longer needed
+            for conn, proc in running.items():
+                proc.terminate()
+                proc.join()
+                conn.close()
+
     def run(self, record_id, dataset='mitdb', **kwargs):
         self.logger.info(f"Starting run for Record {record_id} from {dataset}")
         
@@ -50,16 +162,26 @@ class HRVCoachAgent:
         history = []
         best_result = None
         
+        # Cleaned signals per preprocessing strategy ('A' is shared by two policies)
+        memo = PreprocessMemo(ecg, fs)
+        
         # Policy Loop
+        if self.parallel:
+            self.logger.info(f"Trying {len(strategies)} strategies in parallel")
+            results = self._run_parallel(ecg, fs, strategies, memo)
+        else:
+            results = None
+
         for i, policy in enumerate(strategies):
+            if results is not None and i >= len(results):
+                break  # terminated: a higher-priority strategy reached Grade A
             self.logger.info(f"Attempt {i+1}: Trying {policy['name']} (Pre: {policy['preprocess']}, Det: {policy['detector']})")
             
-            # Act
-            clean_ecg = preprocess_ecg(ecg, fs, strategy=policy['preprocess'])
-            rpeaks = detect_rpeaks(clean_ecg, fs, method=policy['detector'])
-            
-            # Verify / Quality Check
-            quality = validate_signal_quality(clean_ecg, rpeaks, fs)
+            # Act + Verify / Quality Check
+            if results is not None:
+                clean_ecg, rpeaks, quality = results[i]
+            else:
+                clean_ecg, rpeaks, quality = run_policy(ecg, fs, policy, memo.preprocess(policy['preprocess']))
             
             log_entry = {
                 'step': i+1,
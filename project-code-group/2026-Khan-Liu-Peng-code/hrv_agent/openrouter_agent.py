@@ -7,7 +7,7 @@ import os
 from .config import Config
 from .prompts import *
 from .data import load_ecg_record
-from .tools import preprocess_ecg, detect_rpeaks, validate_signal_quality
+from .tools import detect_rpeaks, validate_signal_quality, PreprocessMemo
 from .metrics import compute_hrv_metrics
 from .plotting import plot_results
 
@@ -102,6 +102,9 @@ class OpenRouterHRVAgent:
         strategies = ['A', 'B', 'C', 'D']
         detectors = ['neurokit', 'pantompkins', 'neurokit', 'pantompkins']
         
+        # Cleaned signals per strategy, shared with later runs on the same record
+        memo = PreprocessMemo(ecg, fs)
+        
         for attempt in range(max_attempts):
             strategy = strategies[attempt]
             detector = detectors[attempt]
@@ -109,7 +112,7 @@ class OpenRouterHRVAgent:
             self.logger.info(f"Attempt {attempt + 1}: Strategy {strategy}, Detector {detector}")
             
             try:
-                clean_ecg = preprocess_ecg(ecg, fs, strategy=strategy)
+                clean_ecg = memo.preprocess(strategy)
                 rpeaks = detect_rpeaks(clean_ecg, fs, method=detector)
                 quality = validate_signal_quality(clean_ecg, rpeaks, fs)
                 
@@ -10,6 +10,7 @@ def main():
     parser.add_argument('--out', type=str, default='outputs', help="Output directory")
     parser.add_argument('--use-openrouter', action='store_true', help="Use OpenRouter AI (Hardcoded: deepseek/deepseek-v3.2)")
     parser.add_argument('--channel', type=str, default='ECG', choices=['ECG', 'PPG'], help="Signal channel for local CSV data")
+    parser.add_argument('--parallel', action='store_true', help="Rule-based mode: try all strategies at once in worker processes")
     
     args = parser.parse_args()
     
@@ -25,7 +26,7 @@ def main():
         agent = OpenRouterHRVAgent(output_dir=args.out)
     else:
         print("Using rule-based agent...")
-        agent = HRVCoachAgent(output_dir=args.out)
+        agent = HRVCoachAgent(output_dir=args.out, parallel=args.parallel)
     
     # Pass channel for local data
     run_kwargs = {'channel': args.channel} if args.dataset == 'local_646' else {}
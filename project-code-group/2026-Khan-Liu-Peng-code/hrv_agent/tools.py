@@ -2,6 +2,12 @@
 import neurokit2 as nk
 import numpy as np
 import pandas as pd
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Cleaned signals kept across runs (e.g. repeated runs in the Streamlit app)
+PREPROCESS_CACHE_SIZE = 8
 
 def preprocess_ecg(ecg_signal, fs, strategy='A'):
     """
@@ -59,6 +65,82 @@ def preprocess_ecg(ecg_signal, fs, strategy='A'):
         # Final fallback: no filtering
         return ecg_signal
 
+def signal_key(ecg_signal, fs):
+    """Identity of a signal by content (same samples and fs -> same key)."""
+    arr = np.ascontiguousarray(ecg_signal)
+    h = hashlib.sha1(arr.view(np.uint8).reshape(-1) if arr.size else b"")
+    h.update(f"{arr.dtype.str}|{arr.shape}|{float(fs)}".encode())
+    return h.hexdigest()
+
+class PreprocessLRU:
+    """Bounded, thread-safe LRU of cleaned signals keyed by (signal key, fs, strategy)."""
+
+    def __init__(self, maxsize=PREPROCESS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, clean):
+        with self._lock:
+            self._data[key] = clean
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+PREPROCESS_LRU = PreprocessLRU()
+
+class PreprocessMemo:
+    """
+    Per-run memo of preprocess_ecg() results for one signal.
+
+    Strategies that share a preprocessing step (e.g. 'A' with two detectors)
+    clean the record once; results also go to the shared LRU so a later run
+    on the same record reuses them. Callers must not modify returned arrays.
+    """
+
+    def __init__(self, ecg_signal, fs, lru=PREPROCESS_LRU):
+        self.ecg_signal = ecg_signal
+        self.fs = fs
+        self.key = signal_key(ecg_signal, fs)
+        self.lru = lru
+        self._cleaned = {}
+
+    def peek(self, strategy):
+        """Cleaned signal if already computed (this run or the LRU), else None."""
+        if strategy not in self._cleaned and self.lru is not None:
+            clean = self.lru.get((self.key, float(self.fs), strategy))
+            if clean is not None:
+                self._cleaned[strategy] = clean
+        return self._cleaned.get(strategy)
+
+    def store(self, strategy, clean):
+        self._cleaned[strategy] = clean
+        if self.lru is not None:
+            self.lru.put((self.key, float(self.fs), strategy), clean)
+
+    def preprocess(self, strategy='A'):
+        """preprocess_ecg(ecg_signal, fs, strategy), computed at most once."""
+        clean = self.peek(strategy)
+        if clean is None:
+            clean = preprocess_ecg(self.ecg_signal, self.fs, strategy=strategy)
+            self.store(strategy, clean)
+        return clean
+
 def detect_rpeaks(cleaned_ecg, fs, method='neurokit'):
     """
     Detect R-peaks.
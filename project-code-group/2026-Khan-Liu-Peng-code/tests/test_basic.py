@@ -1,8 +1,14 @@
 #License:Apache License 2.0
+import multiprocessing
+import time
 import pytest
 import numpy as np
 import neurokit2 as nk
 from hrv_agent.tools import preprocess_ecg, detect_rpeaks
+from hrv_agent import agent as agent_module
+from hrv_agent import tools as tools_module
+from hrv_agent.tools import PreprocessMemo, PreprocessLRU
+from hrv_agent.agent import HRVCoachAgent
 
 def test_preprocess_shape():
     # Synthetic float signal
@@ -25,3 +31,80 @@ def test_peak_detection():
     
     # Allow +/- 1 beat tolerance
     assert 9 <= len(peaks) <= 11, f"Expected ~10 peaks, got {len(peaks)}"
+
+
+def test_parallel_strategies_match_serial(tmp_path, monkeypatch):
+    # Speculative parallel mode must pick the same strategy as the serial loop
+    ecg = nk.ecg_simulate(duration=30, heart_rate=70, sampling_rate=250, noise=0.3, random_state=1)
+    monkeypatch.setattr(agent_module, "load_ecg_record", lambda *a, **k: {'signal': ecg, 'fs': 250})
+
+    serial = HRVCoachAgent(output_dir=str(tmp_path / "serial")).run("sim")
+    parallel = HRVCoachAgent(output_dir=str(tmp_path / "parallel"), parallel=True).run("sim")
+
+    assert parallel['grade'] == serial['grade']
+    assert parallel['strategy_used'] == serial['strategy_used']
+    assert np.array_equal(parallel['rpeaks'], serial['rpeaks'])
+    assert [h['grade'] for h in parallel['history']] == [h['grade'] for h in serial['history']]
+
+
+def test_parallel_terminates_losing_strategies(tmp_path, monkeypatch):
+    # Once Standard wins, the strategies still running are killed, not left to finish
+    ecg = nk.ecg_simulate(duration=30, heart_rate=70, sampling_rate=250, random_state=1)
+    monkeypatch.setattr(agent_module, "load_ecg_record", lambda *a, **k: {'signal': ecg, 'fs': 250})
+    real = agent_module.run_policy
+    monkeypatch.setattr(agent_module, "run_policy",
+                        lambda ecg, fs, policy, clean_ecg=None: real(ecg, fs, policy, clean_ecg) if policy['name'] == 'Standard' else time.sleep(60))
+
+    start = time.monotonic()
+    result = HRVCoachAgent(output_dir=str(tmp_path), parallel=True).run("sim")
+
+    assert result['strategy_used'] == 'Standard'
+    assert time.monotonic() - start < 30
+    assert multiprocessing.active_children() == []
+
+
+def test_parallel_cleans_each_step_once(tmp_path, monkeypatch):
+    # Standard and RobustDetect share one worker, so 'A' is cleaned once even with no winner
+    ecg = nk.ecg_simulate(duration=10, sampling_rate=250, random_state=3)
+    log = tmp_path / "cleaned.txt"
+    real = agent_module.preprocess_ecg
+
+    def preprocess(x, fs, strategy='A'):
+        with open(log, "a") as f:
+            f.write(strategy)
+        return real(x, fs, strategy=strategy)
+
+    monkeypatch.setattr(agent_module, "preprocess_ecg", preprocess)
+    monkeypatch.setattr(agent_module, "validate_signal_quality", lambda *a: {'grade': 'D', 'reason': 'forced'})
+    agent = HRVCoachAgent(output_dir=str(tmp_path), parallel=True)
+    strategies = [
+        {'name': 'Standard', 'preprocess': 'A', 'detector': 'neurokit'},
+        {'name': 'StrongFilter', 'preprocess': 'B', 'detector': 'neurokit'},
+        {'name': 'RobustDetect', 'preprocess': 'A', 'detector': 'pantompkins'},
+    ]
+    results = agent._run_parallel(ecg, 250, strategies, PreprocessMemo(ecg, 250, lru=None))
+
+    assert len(results) == 3
+    assert sorted(log.read_text()) == ['A', 'B']
+    assert np.array_equal(results[0][0], results[2][0])
+
+
+def test_preprocess_memo(monkeypatch):
+    # Each (signal, fs, strategy) is cleaned once per run and reused across runs via the LRU
+    calls = []
+    real = tools_module.preprocess_ecg
+    monkeypatch.setattr(tools_module, "preprocess_ecg", lambda x, fs, strategy='A': calls.append(strategy) or real(x, fs, strategy))
+    ecg = nk.ecg_simulate(duration=5, sampling_rate=250, random_state=2)
+    lru = PreprocessLRU(maxsize=2)
+
+    memo = PreprocessMemo(ecg, 250, lru=lru)
+    first = memo.preprocess('A')
+    assert memo.preprocess('A') is first
+    assert np.array_equal(first, real(ecg, 250, strategy='A'))
+    assert PreprocessMemo(ecg.copy(), 250, lru=lru).preprocess('A') is first  # same content, next run
+    assert calls == ['A']
+
+    PreprocessMemo(ecg, 500, lru=lru).preprocess('A')  # other fs -> other key
+    PreprocessMemo(ecg, 250, lru=lru).preprocess('B')  # evicts the oldest entry
+    PreprocessMemo(ecg, 250, lru=lru).preprocess('A')
+    assert calls == ['A', 'A', 'B', 'A']